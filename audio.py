@@ -0,0 +1,192 @@
+"""
+audio.py
+
+One audio service for the whole application.
+
+pygame is imported and the mixer initialized once, on a dedicated thread,
+so neither the menu nor a game window waits for the audio device. The mixer
+runs with a small buffer so effects start quickly, and stays up until the
+process exits. Every mixer call happens on that thread; the UI only queues
+commands. If pygame or an audio device is missing, commands are dropped
+silently.
+
+The short effects (flip, match, mismatch, win) are decoded into memory when
+the mixer starts and play on reserved channels, so music or a long effect
+never delays them. A ``<name>.wav`` or ``<name>.ogg`` in ``sonidos/``
+replaces the built-in version of an effect, which is synthesized otherwise.
+The time from ``play_effect`` to the channel starting is kept in
+``AudioService.latency``.
+"""
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import time
+from typing import Dict, Optional
+
+from profiling import LatencyHistogram
+
+FREQUENCY = 44100
+# samples per mixer callback: 256 at 44.1 kHz is ~6 ms, well under a frame
+BUFFER = 256
+EFFECTS = ("flip", "match", "mismatch", "win")
+# effects sharing a channel cut each other off; the flip never waits
+EFFECT_CHANNELS = {"flip": 0, "match": 1, "mismatch": 1, "win": 2}
+EFFECT_VOLUME = 0.4
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+EFFECTS_DIR = os.path.join(BASE_DIR, "sonidos")
+MUSIC_FILE = os.path.join(BASE_DIR, "music.mp3")
+
+
+def synth_effect(name: str, rate: int = FREQUENCY):
+    """Return a built-in effect as float samples in [-1, 1] (mono NumPy array)."""
+    import numpy as np
+
+    def tone(freqs, ms, decay=8.0):
+        t = np.arange(int(rate * ms / 1000)) / rate
+        wave = sum(np.sin(2 * np.pi * f * t) for f in freqs) / len(freqs)
+        return wave * np.exp(-decay * t / t[-1])
+
+    if name == "flip":
+        # a short filtered noise burst, like a card snapping over
+        noise = np.random.default_rng(7).uniform(-1, 1, int(rate * 0.03))
+        wave = np.convolve(noise, np.ones(8) / 8, mode="same")
+        wave *= np.exp(-np.linspace(0, 10, len(wave)))
+    elif name == "match":
+        wave = np.concatenate([tone([660], 60, 3), tone([990], 110)])
+    elif name == "mismatch":
+        wave = tone([196, 208], 180, 4)
+    elif name == "win":
+        wave = np.concatenate([tone([f], 110, 3) for f in (523, 659, 784)] + [tone([1047], 320)])
+    else:
+        raise ValueError(f"efecto desconocido: {name}")
+    return wave.astype(np.float32)
+
+
+class AudioService:
+    """Owns the pygame mixer for the lifetime of the process."""
+
+    def __init__(self):
+        self._commands: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._ready = threading.Event()
+        self.available = False  # set once the mixer is up
+        self._mixer = None
+        self._effects: Dict[str, object] = {}
+        self._channels: Dict[int, object] = {}
+        # ms from play_effect to the channel playing
+        self.latency = LatencyHistogram("effect_latency")
+
+    def start(self) -> None:
+        """Start the audio thread (idempotent, returns immediately)."""
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="memorama-audio", daemon=True)
+                self._thread.start()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until the mixer finished initializing; return whether audio works."""
+        self.start()
+        self._ready.wait(timeout)
+        return self.available
+
+    def play_music(self, path: str = MUSIC_FILE, loops: int = -1) -> None:
+        """Play background music, looping forever by default."""
+        self.start()
+        self._commands.put(("music", path, loops))
+
+    def stop_music(self) -> None:
+        """Stop the music; the mixer stays initialized for the next game."""
+        if self._thread is not None:
+            self._commands.put(("stop",))
+
+    def play_effect(self, name: str) -> None:
+        """Play one of EFFECTS; returns at once, does nothing without audio."""
+        self.start()
+        self._commands.put(("effect", name, time.perf_counter()))
+
+    def _init_mixer(self) -> None:
+        # keep pygame's banner out of the console
+        os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+        from pygame import mixer
+        if not mixer.get_init():
+            mixer.pre_init(FREQUENCY, -16, 2, BUFFER)
+            mixer.init()
+        self._mixer = mixer
+
+    def _load_effects(self) -> None:
+        mixer = self._mixer
+        mixer.set_reserved(max(EFFECT_CHANNELS.values()) + 1)
+        self._channels = {n: mixer.Channel(n) for n in set(EFFECT_CHANNELS.values())}
+        for name in EFFECTS:
+            try:
+                sound = self._effect_file(name) or self._synthesized(name)
+                sound.set_volume(EFFECT_VOLUME)
+                self._effects[name] = sound
+            except Exception:
+                pass  # that effect stays silent
+
+    def _effect_file(self, name: str):
+        for ext in (".wav", ".ogg"):
+            path = os.path.join(EFFECTS_DIR, name + ext)
+            if os.path.exists(path):
+                return self._mixer.Sound(path)
+        return None
+
+    def _synthesized(self, name: str):
+        import numpy as np
+        rate, size, channels = self._mixer.get_init()
+        wave = synth_effect(name, rate)
+        # in the mixer's own format, so playing needs no conversion
+        bits = abs(size)
+        if size < 0:
+            samples = (wave * (2 ** (bits - 1) - 1)).astype(f"<i{bits // 8}")
+        else:
+            samples = ((wave + 1) * (2 ** (bits - 1) - 1)).astype(f"<u{bits // 8}")
+        samples = np.repeat(samples[:, None], channels, axis=1)
+        return self._mixer.Sound(buffer=samples.tobytes())
+
+    def _run(self) -> None:
+        try:
+            self._init_mixer()
+            self.available = True
+        except Exception:
+            # Silently ignore if pygame or device not available
+            self.available = False
+        if self.available:
+            try:
+                self._load_effects()
+            except Exception:
+                pass  # music may still work
+        self._ready.set()
+        while True:
+            command = self._commands.get()
+            if not self.available:
+                continue
+            try:
+                self._handle(command)
+            except Exception:
+                pass
+
+    def _handle(self, command) -> None:
+        kind = command[0]
+        if kind == "effect":
+            _kind, name, queued = command
+            sound = self._effects.get(name)
+            if sound is not None:
+                self._channels[EFFECT_CHANNELS[name]].play(sound)
+                self.latency.record((time.perf_counter() - queued) * 1000.0)
+        elif kind == "music":
+            _kind, path, loops = command
+            self._mixer.music.load(path)
+            self._mixer.music.play(loops)
+        elif kind == "stop":
+            self._mixer.music.stop()
+
+
+# shared by the menu and every GameWindow
+AUDIO = AudioService()
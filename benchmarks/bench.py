@@ -0,0 +1,402 @@
+"""
+bench.py
+
+Performance benchmarks of the memorama, checked against a stored baseline.
+
+Times GameWindow construction per grid size, click sequences, card redraws
+at several card sizes and score I/O (writes, reads and the win-screen rank)
+against files of 10^2 to 10^6 entries for both score backends. Every metric
+is in milliseconds, best of a few runs. A metric fails when it is slower
+than its baseline by more than the threshold in two consecutive runs.
+Metrics without a baseline are only reported; with ``--require-baseline`` a
+selected group that has no metric in the baseline fails the run instead.
+
+The committed baseline.json only holds the ``scores`` group. The GUI groups
+(window, click, redraw) guard nothing until they are recorded on the
+machine that runs the comparison, e.g. under Xvfb:
+    python benchmarks/bench.py --update --only window,click,redraw
+
+Run from the repository root:
+    python benchmarks/bench.py                     # compare with baseline.json
+    python benchmarks/bench.py --update            # record a new baseline
+    python benchmarks/bench.py --only scores --max-scores 10000
+    python benchmarks/bench.py --require-gui --require-baseline   # strict, for CI
+
+On Linux without a ``DISPLAY`` an Xvfb server is started for the GUI
+benchmarks when it is installed (or run under ``xvfb-run -a``); otherwise
+they are skipped, which fails the run under ``--require-gui``. Baselines
+are machine specific: record one on the box that runs the comparison.
+"""
+from __future__ import annotations
+
+# the repository has its own json.py; take the standard one before the
+# repository root is put on sys.path
+import json
+
+import argparse
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import scores  # noqa: E402
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_THRESHOLD = 0.5
+# differences below this are timer noise, whatever the ratio
+MIN_DELTA_MS = 0.5
+GRIDS = (4, 5, 6, 8)
+CARD_SIDES = (64, 128, 200)
+SCORE_SIZES = tuple(10 ** k for k in range(2, 7))
+GROUPS = ("window", "click", "redraw", "scores")
+
+Results = Dict[str, float]
+
+
+def _best_ms(fn: Callable[[], Optional[float]], repeat: int) -> float:
+    # the fastest run is the least disturbed by the rest of the machine;
+    # fn may return its own measurement (seconds) to exclude setup work
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        measured = fn()
+        samples.append(measured if measured is not None else time.perf_counter() - start)
+    return min(samples) * 1000.0
+
+
+@contextmanager
+def virtual_display() -> Iterator[bool]:
+    """Provide an X display for Tk; yields whether one is available."""
+    if os.environ.get("DISPLAY") or not sys.platform.startswith("linux"):
+        yield True
+        return
+    xvfb = shutil.which("Xvfb")
+    if xvfb is None:
+        yield False
+        return
+    number = next((n for n in range(99, 199) if not os.path.exists(f"/tmp/.X11-unix/X{n}")), 199)
+    proc = subprocess.Popen([xvfb, f":{number}", "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + 5.0
+        while not os.path.exists(f"/tmp/.X11-unix/X{number}") and proc.poll() is None:
+            if time.monotonic() > deadline:
+                break
+            time.sleep(0.05)
+        if proc.poll() is not None:
+            yield False
+            return
+        os.environ["DISPLAY"] = f":{number}"
+        try:
+            yield True
+        finally:
+            del os.environ["DISPLAY"]
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def _make_theme(dir_path: str, count: int = 33, side: int = 256) -> None:
+    from PIL import Image
+    # 1.png is the back; enough faces for an 8x8 board
+    for i in range(count):
+        img = Image.new("RGB", (side, side), (i * 37 % 255, i * 67 % 255, i * 97 % 255))
+        img.save(os.path.join(dir_path, f"{i + 1}.png"))
+
+
+def _pump(root, done: Callable[[], bool], timeout: float = 30.0) -> None:
+    # run the Tk loop until the window reports it is finished
+    deadline = time.monotonic() + timeout
+    while not done():
+        if time.monotonic() > deadline:
+            raise RuntimeError("el tablero no terminó de cargar a tiempo")
+        root.update()
+        time.sleep(0.001)
+
+
+def _solve_order(values) -> List[int]:
+    """Clicks for one game: every pair is missed once, then found."""
+    cells: Dict[int, List[int]] = {}
+    for i, v in enumerate(values):
+        cells.setdefault(v, []).append(i)
+    pairs = list(cells.values())
+    order = []
+    for a, b in zip(pairs, pairs[1:]):
+        order += [a[0], b[0]]  # mismatch
+    for a, b in pairs:
+        order += [a, b]
+    return order
+
+
+def bench_gui(theme: str, repeat: int, groups: List[str]) -> Results:
+    from tkinter import Tk
+    from image_cache import CARD_CACHE
+    from ventana import GameWindow
+
+    results: Results = {}
+    root = Tk()
+    root.withdraw()
+    patches = [mock.patch.object(GameWindow, "_init_music", return_value=None),
+               mock.patch.object(GameWindow, "_win", return_value=None),
+               # games are recorded as usual, just not into the working directory
+               mock.patch.dict(os.environ, {"MEMORAMA_RECORDINGS": os.path.join(os.path.dirname(theme), "recordings")})]
+    for p in patches:
+        p.start()
+    try:
+        if "window" in groups:
+            for grid in GRIDS:
+                ready = []
+
+                def build():
+                    CARD_CACHE.clear()
+                    start = time.perf_counter()
+                    gw = GameWindow(root, grid_size=grid, theme_dir=theme, player_name="bench", resume=False)
+                    interactive = time.perf_counter() - start
+                    _pump(root, lambda: "faces_ready" in gw.load_timings)
+                    ready.append(time.perf_counter() - start)
+                    gw.destroy()
+                    return interactive
+
+                results[f"window.{grid}.interactive"] = _best_ms(build, repeat)
+                results[f"window.{grid}.faces_ready"] = min(ready) * 1000.0
+
+        gw = GameWindow(root, grid_size=6, theme_dir=theme, player_name="bench", resume=False)
+        _pump(root, lambda: "faces_ready" in gw.load_timings)
+        if "click" in groups:
+            clicks = []
+
+            def play():
+                gw.reset_game()
+                root.update_idletasks()
+                order = _solve_order(gw.card_values)
+                start = time.perf_counter()
+                for i in order:
+                    gw.on_card_click(i)
+                    if gw.engine.locked:
+                        # flip back now instead of waiting FLIP_BACK_MS
+                        gw._cancel_flip()
+                        gw._flip_back(gw.engine.first, gw.engine.second)
+                    root.update_idletasks()
+                clicks.append(len(order))
+                return time.perf_counter() - start
+
+            game_ms = _best_ms(play, repeat)
+            results["click.6x6.game"] = game_ms
+            results["click.6x6.per_click"] = game_ms / clicks[0]
+
+        if "redraw" in groups:
+            for side in CARD_SIDES:
+                with mock.patch.object(gw, "_card_size", return_value=(side, side)):
+                    def cold():
+                        CARD_CACHE.clear()
+                        start = time.perf_counter()
+                        gw._redraw_images()
+                        _pump(root, lambda: not gw._render_jobs)
+                        root.update_idletasks()
+                        return time.perf_counter() - start
+
+                    def warm():
+                        gw._redraw_images()
+                        root.update_idletasks()
+
+                    results[f"redraw.{side}.cold"] = _best_ms(cold, repeat)
+                    results[f"redraw.{side}.warm"] = _best_ms(warm, repeat)
+        gw.destroy()
+    finally:
+        for p in patches:
+            p.stop()
+        root.destroy()
+    return results
+
+
+def _write_score_file(path: str, n: int) -> None:
+    entries = [{"name": f"jugador{i:07d}", "score": i * 7919 % 1001,
+                "difficulty": scores.DIFFICULTIES[i % 3]} for i in range(n)]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(entries, f)
+
+
+def bench_scores(tmpdir: str, repeat: int, max_entries: int) -> Results:
+    results: Results = {}
+    saved_backend = scores.SCORES_BACKEND
+    try:
+        for backend in ("json", "sqlite"):
+            scores.SCORES_BACKEND = backend
+            for n in SCORE_SIZES:
+                if n > max_entries:
+                    break
+                path = os.path.join(tmpdir, f"{backend}_{n}.json")
+                _write_score_file(path, n)
+                scores.close_stores()
+                label = f"scores.{backend}.1e{len(str(n)) - 1}"
+
+                # the big files are slow enough that fewer runs are as stable
+                runs = repeat if n <= 10 ** 4 else max(1, repeat // 3)
+
+                def read():
+                    scores.read_scores(path)
+
+                def fresh_import():
+                    # first use imports the JSON file into the database
+                    scores.close_stores()
+                    db = scores.sqlite_path(path)
+                    if os.path.exists(db):
+                        os.remove(db)
+                    start = time.perf_counter()
+                    read()
+                    return time.perf_counter() - start
+
+                if backend == "sqlite":
+                    results[f"{label}.import"] = _best_ms(fresh_import, runs)
+                counter = iter(range(10 ** 9))
+                results[f"{label}.write"] = _best_ms(
+                    lambda: scores.write_score(f"nuevo{next(counter)}", 500, "medio", path=path), runs)
+                results[f"{label}.read"] = _best_ms(read, runs)
+
+                def rank():
+                    # what the win popup pays right after a fresh start
+                    scores.close_stores()
+                    scores.rank_for("jugador0000001", "medio", path=path)
+
+                results[f"{label}.rank"] = _best_ms(rank, runs)
+                scores.close_stores()
+    finally:
+        scores.SCORES_BACKEND = saved_backend
+        scores.close_stores()
+    return results
+
+
+def run(groups: List[str], repeat: int, max_entries: int) -> Tuple[Results, List[str]]:
+    """Run the selected benchmarks; returns the metrics and skip notes."""
+    results: Results = {}
+    notes: List[str] = []
+    with tempfile.TemporaryDirectory(prefix="memorama_bench_") as tmpdir:
+        gui = [g for g in groups if g != "scores"]
+        if gui:
+            with virtual_display() as available:
+                if available:
+                    theme = os.path.join(tmpdir, "theme")
+                    os.mkdir(theme)
+                    _make_theme(theme)
+                    results.update(bench_gui(theme, repeat, gui))
+                else:
+                    notes.append("sin DISPLAY ni Xvfb: se omiten " + ", ".join(gui))
+        if "scores" in groups:
+            results.update(bench_scores(tmpdir, repeat, max_entries))
+    return results, notes
+
+
+def load_baseline(path: str = BASELINE_FILE) -> dict:
+    if not os.path.exists(path):
+        return {"threshold": DEFAULT_THRESHOLD, "metrics": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(results: Results, threshold: float, path: str = BASELINE_FILE) -> None:
+    data = {
+        "machine": f"{platform.system()} {platform.machine()} / Python {platform.python_version()}",
+        "threshold": threshold,
+        "metrics": {k: round(v, 4) for k, v in sorted(results.items())},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+
+def compare(results: Results, baseline: Dict[str, float], threshold: float) -> Tuple[List[str], List[str]]:
+    """Return the report lines and the names of regressed metrics."""
+    lines = [f"{'métrica':<32} {'ms':>10} {'base':>10} {'cambio':>8}"]
+    regressions = []
+    for name in sorted(results):
+        ms = results[name]
+        base = baseline.get(name)
+        if base is None:
+            lines.append(f"{name:<32} {ms:10.3f} {'-':>10} {'nueva':>8}")
+            continue
+        change = (ms - base) / base if base else 0.0
+        flag = ""
+        if ms > base * (1 + threshold) and ms - base > MIN_DELTA_MS:
+            regressions.append(name)
+            flag = "  REGRESIÓN"
+        lines.append(f"{name:<32} {ms:10.3f} {base:10.3f} {change:+8.0%}{flag}")
+    return lines, regressions
+
+
+def check_groups(groups: List[str], results: Results, baseline: Dict[str, float]) -> Tuple[List[str], List[str]]:
+    """Return the selected groups that were skipped and those without a baseline."""
+    ran = {name.split(".")[0] for name in results}
+    recorded = {name.split(".")[0] for name in baseline}
+    skipped = [g for g in groups if g not in ran]
+    unrecorded = [g for g in groups if g in ran and g not in recorded]
+    return skipped, unrecorded
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks del memorama comparados con una línea base.")
+    parser.add_argument("--only", default=",".join(GROUPS), help="grupos: " + ", ".join(GROUPS))
+    parser.add_argument("--repeat", type=int, default=5, help="corridas por métrica (se usa la mejor)")
+    parser.add_argument("--max-scores", type=int, default=SCORE_SIZES[-1],
+                        help="tamaño máximo de los archivos de puntajes")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="regresión tolerada, p. ej. 0.5 = 50%% (por defecto, la de la línea base)")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--update", action="store_true", help="guarda los resultados como nueva línea base")
+    parser.add_argument("--require-gui", action="store_true",
+                        help="falla si los grupos gráficos no se pueden medir (sin DISPLAY ni Xvfb)")
+    parser.add_argument("--require-baseline", action="store_true",
+                        help="falla si un grupo medido no tiene métricas en la línea base")
+    args = parser.parse_args(argv)
+
+    groups = [g.strip() for g in args.only.split(",") if g.strip()]
+    unknown = [g for g in groups if g not in GROUPS]
+    if unknown:
+        parser.error(f"grupo desconocido: {', '.join(unknown)}")
+
+    baseline = load_baseline(args.baseline)
+    threshold = args.threshold if args.threshold is not None else baseline.get("threshold", DEFAULT_THRESHOLD)
+    results, notes = run(groups, max(1, args.repeat), args.max_scores)
+    for note in notes:
+        print(note)
+    skipped, unrecorded = check_groups(groups, results, baseline.get("metrics", {}))
+    if skipped and args.require_gui:
+        print(f"no se midieron: {', '.join(skipped)}")
+        return 1
+
+    if args.update:
+        # keep the metrics that were not run this time
+        merged = dict(baseline.get("metrics", {}))
+        merged.update(results)
+        save_baseline(merged, threshold, args.baseline)
+        print(f"{len(results)} métricas guardadas en {args.baseline}")
+        return 0
+
+    lines, regressions = compare(results, baseline.get("metrics", {}), threshold)
+    if regressions:
+        # a busy machine slows single metrics down; only a second slow run counts
+        again, _notes = run(sorted({name.split(".")[0] for name in regressions}), max(1, args.repeat), args.max_scores)
+        for name, ms in again.items():
+            results[name] = min(ms, results.get(name, ms))
+        lines, regressions = compare(results, baseline.get("metrics", {}), threshold)
+    print("\n".join(lines))
+    failed = False
+    if unrecorded:
+        print(f"sin línea base para {', '.join(unrecorded)}: grábela con --update")
+        failed = args.require_baseline
+    if regressions:
+        print(f"{len(regressions)} métricas empeoraron más de {threshold:.0%}: {', '.join(regressions)}")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
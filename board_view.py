@@ -0,0 +1,251 @@
+"""
+board_view.py
+
+Widgets that show the cards of a GameWindow.
+
+A view only knows which image each cell currently shows. GameWindow marks
+the cells whose state changed and calls ``flush`` once per frame; the view
+then reconfigures just those cells, and only if their image really changed.
+"""
+from __future__ import annotations
+
+from tkinter import Button, Canvas, RAISED, BOTH
+from typing import Any, Callable, List, Optional, Set
+
+CELL_PAD = 8
+# boards with more cells than this default to the canvas renderer
+CANVAS_THRESHOLD = 36
+# frame around the cards a hint points out
+HINT_COLOR = "#facc15"
+
+
+def card_side(width: int, height: int, rows: int, cols: int) -> int:
+    """Side of the square cards of a ``rows`` x ``cols`` board drawn in ``width`` x ``height``."""
+    cw = width // cols - 20
+    ch = height // rows - 20
+    return max(32, min(cw, ch))
+
+
+class ButtonBoardView:
+    """One ``Button`` per cell, laid out with the grid geometry manager.
+
+    Args:
+        parent: Frame that holds the board.
+        rows (int): Number of rows.
+        cols (int): Number of columns.
+        on_click (callable): Called with the cell index when a card is clicked.
+    """
+
+    def __init__(self, parent, rows: int, cols: int, on_click: Callable[[int], None]):
+        self.parent = parent
+        self.rows = rows
+        self.cols = cols
+        # clear previous
+        for w in parent.winfo_children():
+            w.destroy()
+        self.buttons: List[Button] = []
+        for r in range(rows):
+            parent.rowconfigure(r, weight=1)
+            for c in range(cols):
+                parent.columnconfigure(c, weight=1)
+                idx = r * cols + c
+                btn = Button(parent, relief=RAISED, bd=2, bg="#1f2937", activebackground="#374151")
+                btn.grid(row=r, column=c, sticky="nsew", padx=CELL_PAD, pady=CELL_PAD)
+                btn.configure(command=lambda i=idx: on_click(i))
+                self.buttons.append(btn)
+        self._shown: List[Any] = [None] * (rows * cols)
+        self._dirty: Set[int] = set(range(rows * cols))
+
+    def card_size(self):
+        # estimate cell size based on board size
+        bw = max(self.parent.winfo_width(), 200)
+        bh = max(self.parent.winfo_height(), 200)
+        side = card_side(bw, bh, self.rows, self.cols)
+        return side, side
+
+    def mark(self, index: int) -> None:
+        self._dirty.add(index)
+
+    def mark_all(self) -> None:
+        self._dirty.update(range(len(self.buttons)))
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._dirty)
+
+    def flush(self, image_for: Callable[[int], Any]) -> int:
+        """Show ``image_for(i)`` on every marked cell.
+
+        Returns:
+            int: Number of widgets actually reconfigured.
+        """
+        updated = 0
+        shown = self._shown
+        for i in self._dirty:
+            img = image_for(i)
+            if img is shown[i]:
+                continue
+            btn = self.buttons[i]
+            btn.config(image=img)
+            btn.image = img
+            shown[i] = img
+            updated += 1
+        self._dirty.clear()
+        return updated
+
+    def highlight(self, index: int, on: bool) -> None:
+        """Frame a card in HINT_COLOR, or restore its usual border."""
+        self.buttons[index].configure(bg=HINT_COLOR if on else "#1f2937")
+
+    def shown(self, index: int) -> Any:
+        """Return the image currently on a cell."""
+        return self._shown[index]
+
+    def __len__(self) -> int:
+        return len(self.buttons)
+
+
+class CanvasBoardView:
+    """Whole board drawn on a single ``Canvas``.
+
+    Each cell is a background tile plus an image item; clicks are mapped to
+    cells from their coordinates. Only two canvas items per cell exist, so
+    large boards avoid the cost of hundreds of Button widgets and of the grid
+    geometry manager.
+
+    Args:
+        parent: Frame that holds the board.
+        rows (int): Number of rows.
+        cols (int): Number of columns.
+        on_click (callable): Called with the cell index when a card is clicked.
+    """
+
+    def __init__(self, parent, rows: int, cols: int, on_click: Callable[[int], None]):
+        self.parent = parent
+        self.rows = rows
+        self.cols = cols
+        self._on_click = on_click
+        for w in parent.winfo_children():
+            w.destroy()
+        self.canvas = Canvas(parent, bg=parent.cget("bg"), highlightthickness=0, bd=0)
+        self.canvas.pack(expand=True, fill=BOTH)
+        self.buttons: List[Any] = []  # no per-cell widgets
+        self._tiles: List[int] = []
+        self._items: List[int] = []
+        for _ in range(rows * cols):
+            self._tiles.append(self.canvas.create_rectangle(0, 0, 0, 0, fill="#1f2937",
+                                                            activefill="#374151", outline=""))
+            self._items.append(self.canvas.create_image(0, 0))
+        self._shown: List[Any] = [None] * (rows * cols)
+        self._dirty: Set[int] = set(range(rows * cols))
+        self._pressed: Optional[int] = None
+        self._layout_size = None
+        self.canvas.bind("<ButtonPress-1>", self._on_press)
+        self.canvas.bind("<ButtonRelease-1>", self._on_release)
+        self.canvas.bind("<Configure>", lambda _e: self._layout())
+
+    def _extent(self):
+        return max(self.canvas.winfo_width(), 200), max(self.canvas.winfo_height(), 200)
+
+    def card_size(self):
+        # same estimate as the Button board so both render identical cards
+        side = card_side(*self._extent(), self.rows, self.cols)
+        return side, side
+
+    def _layout(self):
+        size = self._extent()
+        if size == self._layout_size:
+            return
+        self._layout_size = size
+        bw, bh = size
+        cell_w = bw / self.cols
+        cell_h = bh / self.rows
+        coords = self.canvas.coords
+        for i, (tile, item) in enumerate(zip(self._tiles, self._items)):
+            r, c = divmod(i, self.cols)
+            x0 = c * cell_w + CELL_PAD
+            y0 = r * cell_h + CELL_PAD
+            x1 = (c + 1) * cell_w - CELL_PAD
+            y1 = (r + 1) * cell_h - CELL_PAD
+            coords(tile, x0, y0, x1, y1)
+            coords(item, (x0 + x1) / 2, (y0 + y1) / 2)
+
+    def cell_at(self, x: float, y: float) -> Optional[int]:
+        """Return the cell whose tile contains canvas point (x, y), if any."""
+        bw, bh = self._layout_size or self._extent()
+        cell_w = bw / self.cols
+        cell_h = bh / self.rows
+        c = int(x // cell_w)
+        r = int(y // cell_h)
+        if not (0 <= r < self.rows and 0 <= c < self.cols):
+            return None
+        # the padding between tiles is not part of any card
+        if not (CELL_PAD <= x - c * cell_w <= cell_w - CELL_PAD and CELL_PAD <= y - r * cell_h <= cell_h - CELL_PAD):
+            return None
+        return r * self.cols + c
+
+    def _on_press(self, event):
+        self._pressed = self.cell_at(self.canvas.canvasx(event.x), self.canvas.canvasy(event.y))
+
+    def _on_release(self, event):
+        # like a Button: the click counts if released over the pressed card
+        pressed, self._pressed = self._pressed, None
+        if pressed is not None and pressed == self.cell_at(self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)):
+            self._on_click(pressed)
+
+    def mark(self, index: int) -> None:
+        self._dirty.add(index)
+
+    def mark_all(self) -> None:
+        self._dirty.update(range(len(self._items)))
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._dirty)
+
+    def flush(self, image_for: Callable[[int], Any]) -> int:
+        """Show ``image_for(i)`` on every marked cell.
+
+        Returns:
+            int: Number of canvas items actually reconfigured.
+        """
+        self._layout()
+        updated = 0
+        shown = self._shown
+        itemconfigure = self.canvas.itemconfigure
+        for i in self._dirty:
+            img = image_for(i)
+            if img is shown[i]:
+                continue
+            itemconfigure(self._items[i], image=img)
+            shown[i] = img  # also keeps the PhotoImage alive
+            updated += 1
+        self._dirty.clear()
+        return updated
+
+    def highlight(self, index: int, on: bool) -> None:
+        """Frame a card in HINT_COLOR, or restore its usual tile."""
+        self.canvas.itemconfigure(self._tiles[index], fill=HINT_COLOR if on else "#1f2937")
+
+    def shown(self, index: int) -> Any:
+        """Return the image currently on a cell."""
+        return self._shown[index]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+RENDERERS = {
+    "buttons": ButtonBoardView,
+    "canvas": CanvasBoardView,
+}
+
+
+def view_class(renderer: Optional[str], cells: int):
+    """Return the view for a renderer name; ``None`` picks by board size."""
+    if renderer is None:
+        renderer = "canvas" if cells > CANVAS_THRESHOLD else "buttons"
+    try:
+        return RENDERERS[renderer]
+    except KeyError:
+        raise ValueError(f"renderizador desconocido: {renderer}") from None
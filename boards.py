@@ -0,0 +1,121 @@
+"""
+boards.py
+
+Board generation with NumPy.
+
+A board is a row-major array of pair ids where every id in ``0..pairs-1``
+appears exactly twice. Boards are produced in batches as an integer array of
+shape ``(K, rows * cols)``: every row is shuffled independently by a single
+``Generator.permuted`` call, and boards that break a constraint are redrawn
+until none does.
+
+The engine deals single boards with ``deal``; simulations and tournaments
+take whole batches from a seeded ``BoardGenerator``, so the same seed gives
+every player the same boards.
+"""
+from __future__ import annotations
+
+from typing import Callable, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+# a constraint gets boards shaped (m, rows, cols) and returns the rejected ones
+Constraint = Callable[[np.ndarray], np.ndarray]
+Seed = Union[None, int, np.random.Generator]
+
+DTYPE = np.uint16
+# give up on constraints that (almost) no board satisfies
+MAX_REDRAWS = 1000
+BATCH = 4096
+
+
+def adjacent_pairs(grids: np.ndarray) -> np.ndarray:
+    """Reject boards where both cards of a pair touch horizontally or vertically."""
+    across = (grids[:, :, 1:] == grids[:, :, :-1]).any(axis=(1, 2))
+    down = (grids[:, 1:, :] == grids[:, :-1, :]).any(axis=(1, 2))
+    return across | down
+
+
+def _rejected(boards: np.ndarray, rows: int, cols: int, constraints: Sequence[Constraint]) -> np.ndarray:
+    grids = boards.reshape(-1, rows, cols)
+    bad = np.zeros(len(boards), dtype=bool)
+    for constraint in constraints:
+        bad |= constraint(grids)
+    return bad
+
+
+def generate_boards(k: int, rows: int, cols: int, rng: Seed = None, no_adjacent: bool = False,
+                    constraints: Sequence[Constraint] = ()) -> np.ndarray:
+    """Return ``k`` shuffled boards as an array of shape ``(k, rows * cols)``.
+
+    Args:
+        k (int): Number of boards.
+        rows (int): Rows of every board.
+        cols (int): Columns of every board.
+        rng: Seed or ``numpy.random.Generator``; a generator keeps its stream
+            going across calls.
+        no_adjacent (bool): Shortcut for the ``adjacent_pairs`` constraint.
+        constraints (sequence): Functions rejecting boards, see ``Constraint``.
+
+    Raises:
+        ValueError: If the board cannot hold pairs only, or the constraints
+            reject boards after MAX_REDRAWS rounds.
+    """
+    size = rows * cols
+    if rows <= 0 or cols <= 0 or size % 2:
+        raise ValueError(f"un tablero de {rows}x{cols} no se puede llenar con pares")
+    if size // 2 > np.iinfo(DTYPE).max:
+        raise ValueError(f"un tablero de {rows}x{cols} es demasiado grande")
+    rng = np.random.default_rng(rng)
+    base = np.arange(size, dtype=DTYPE) >> 1  # 0, 0, 1, 1, ...
+    boards = rng.permuted(np.broadcast_to(base, (k, size)), axis=1)
+    checks = list(constraints) + ([adjacent_pairs] if no_adjacent else [])
+    if not checks or not k:
+        return boards
+    bad = np.flatnonzero(_rejected(boards, rows, cols, checks))
+    for _ in range(MAX_REDRAWS):
+        if not bad.size:
+            return boards
+        redrawn = rng.permuted(boards[bad], axis=1)
+        boards[bad] = redrawn
+        bad = bad[_rejected(redrawn, rows, cols, checks)]
+    if bad.size:
+        raise ValueError(f"ningún tablero de {rows}x{cols} cumple las restricciones")
+    return boards
+
+
+def deal(rows: int, cols: int, seed: int, no_adjacent: bool = False) -> List[int]:
+    """Return the single board of a game seed as a list of pair ids."""
+    return generate_boards(1, rows, cols, seed, no_adjacent)[0].tolist()
+
+
+class BoardGenerator:
+    """Seeded stream of boards of one shape.
+
+    Args:
+        rows (int): Rows of every board.
+        cols (int): Columns of every board.
+        seed: Seed of the stream; ``None`` draws one from the OS.
+        no_adjacent (bool): Keep the two cards of a pair apart.
+        constraints (sequence): Extra constraints, see ``generate_boards``.
+    """
+
+    def __init__(self, rows: int, cols: int, seed: Seed = None, no_adjacent: bool = False,
+                 constraints: Sequence[Constraint] = ()):
+        self.rows = rows
+        self.cols = cols
+        self.rng = np.random.default_rng(seed)
+        self.no_adjacent = no_adjacent
+        self.constraints = tuple(constraints)
+
+    def boards(self, k: int) -> np.ndarray:
+        """Return the next ``k`` boards, shape ``(k, rows * cols)``."""
+        return generate_boards(k, self.rows, self.cols, self.rng, self.no_adjacent, self.constraints)
+
+    def take(self, n: int, batch: Optional[int] = None) -> Iterator[List[int]]:
+        """Yield ``n`` boards as lists, generated ``batch`` at a time."""
+        batch = batch or BATCH
+        while n > 0:
+            k = min(n, batch)
+            yield from self.boards(k).tolist()
+            n -= k
@@ -0,0 +1,335 @@
+"""
+clickstream.py
+
+Recording and replay of played games.
+
+Every GameWindow appends its games to one file under ``recordings/`` while
+they are played. A file starts with ``MREC`` and a version byte, followed by
+records that each begin with a varint ``value << 3 | kind``:
+
+- kind 0..4: a click; ``value`` is the cell and the kind is the engine
+  outcome (IGNORED, FIRST, MATCH, MISMATCH, WIN). A varint with the
+  milliseconds since the previous record follows.
+- RESOLVE: a mismatched pair was turned face-down; ``value`` is unused,
+  followed by the time delta.
+- GAME: a new board. ``value`` is the number of distinct faces when the
+  theme had fewer faces than pairs (0 otherwise, see MemoryEngine); then
+  rows, cols and the start time (unix seconds) as varints, the 8-byte seed
+  and the player, difficulty and theme as length-prefixed UTF-8.
+
+A click costs two or three bytes. Records are written unbuffered as they
+happen, so a crash loses at most the record being written; readers stop at
+a truncated tail.
+
+Replay re-deals each board from its seed and feeds the clicks to a
+MemoryEngine (headless, as fast as possible) or to a GameWindow at the
+recorded pace::
+
+    python clickstream.py recordings/
+    python clickstream.py recordings/20260101-120000-1234-0.mrec --gui --game 0 --speed 2
+"""
+from __future__ import annotations
+
+import argparse
+import glob
+import os
+import struct
+import time
+from typing import BinaryIO, Iterator, List, NamedTuple, Optional, Tuple
+
+from engine import MemoryEngine
+
+MAGIC = b"MREC"
+VERSION = 1
+RESOLVE = 5
+GAME = 6
+KIND_BITS = 3
+KIND_MASK = (1 << KIND_BITS) - 1
+
+RECORDINGS_ENV = "MEMORAMA_RECORDINGS"
+DEFAULT_RECORDINGS_DIR = "recordings"
+
+
+def _varint(n: int) -> bytes:
+    out = bytearray()
+    while n >= 0x80:
+        out.append(n & 0x7F | 0x80)
+        n >>= 7
+    out.append(n)
+    return bytes(out)
+
+
+def _text(s: str) -> bytes:
+    data = s.encode("utf-8")[:255]
+    return bytes((len(data),)) + data
+
+
+class Game(NamedTuple):
+    rows: int
+    cols: int
+    seed: int
+    started: int  # unix seconds
+    player: str
+    difficulty: str
+    theme: str
+    # (kind, cell, ms since the previous event); kind is an engine outcome or RESOLVE
+    events: List[Tuple[int, int, int]]
+    faces: int = 0
+
+
+class ClickRecorder:
+    """Streams the games of one window to an append-only file.
+
+    The file is created on the first game. Clicks made before the first
+    ``start_game`` (a resumed board) have no game to belong to and are not
+    written. Write errors switch recording off silently; the game itself
+    must never fail because of it.
+
+    Args:
+        path (str): File to append to.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._f: Optional[BinaryIO] = None
+        self._last_ms = 0
+        self._t0 = 0.0
+        self._in_game = False
+        self.failed = False
+
+    def _write(self, data: bytes) -> None:
+        if self.failed:
+            return
+        try:
+            if self._f is None:
+                directory = os.path.dirname(os.path.abspath(self.path))
+                os.makedirs(directory, exist_ok=True)
+                self._f = open(self.path, "ab", buffering=0)
+                if self._f.tell() == 0:
+                    self._f.write(MAGIC + bytes((VERSION,)))
+            self._f.write(data)
+        except OSError:
+            self.failed = True
+
+    def _delta(self) -> bytes:
+        ms = int((time.monotonic() - self._t0) * 1000)
+        delta, self._last_ms = ms - self._last_ms, ms
+        return _varint(delta)
+
+    def start_game(self, rows: int, cols: int, seed: int, player: str = "",
+                   difficulty: str = "", theme: str = "", faces: int = 0) -> None:
+        self._t0 = time.monotonic()
+        self._last_ms = 0
+        self._in_game = True
+        self._write(_varint(faces << KIND_BITS | GAME) + _varint(rows) + _varint(cols) + _varint(int(time.time()))
+                    + struct.pack("<Q", seed) + _text(player) + _text(difficulty) + _text(theme))
+
+    def click(self, index: int, outcome: int) -> None:
+        if not self._in_game:
+            return
+        self._write(_varint(index << KIND_BITS | outcome) + self._delta())
+
+    def resolve(self) -> None:
+        if not self._in_game:
+            return
+        self._write(_varint(RESOLVE) + self._delta())
+
+    def close(self) -> None:
+        if self._f is not None:
+            try:
+                self._f.close()
+            except OSError:
+                pass
+            self._f = None
+
+
+def recordings_dir() -> Optional[str]:
+    """Directory for new recordings, or None if MEMORAMA_RECORDINGS=0."""
+    value = os.environ.get(RECORDINGS_ENV, DEFAULT_RECORDINGS_DIR)
+    return None if value in ("", "0") else value
+
+
+_counter = iter(range(1 << 30))
+
+
+def new_recorder() -> Optional[ClickRecorder]:
+    """Return a recorder writing to a new file, or None if recording is off."""
+    directory = recordings_dir()
+    if directory is None:
+        return None
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_counter)}.mrec"
+    return ClickRecorder(os.path.join(directory, name))
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    shift = n = 0
+    while True:
+        b = data[pos]  # IndexError on a truncated record
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+
+def _read_text(data: bytes, pos: int) -> Tuple[str, int]:
+    n = data[pos]
+    end = pos + 1 + n
+    if end > len(data):
+        raise IndexError("truncated text")
+    return data[pos + 1:end].decode("utf-8", "replace"), end
+
+
+def read_games(path: str) -> List[Game]:
+    """Parse a recording; a truncated last record is dropped.
+
+    Raises:
+        ValueError: If the file is not a recording.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < 5 or data[:4] != MAGIC:
+        raise ValueError(f"{path} no es una grabación de memorama")
+    if data[4] != VERSION:
+        raise ValueError(f"{path}: versión {data[4]} no soportada")
+    games: List[Game] = []
+    pos = 5
+    try:
+        while pos < len(data):
+            head, p = _read_varint(data, pos)
+            kind, value = head & KIND_MASK, head >> KIND_BITS
+            if kind == GAME:
+                rows, p = _read_varint(data, p)
+                cols, p = _read_varint(data, p)
+                started, p = _read_varint(data, p)
+                if p + 8 > len(data):
+                    raise IndexError("truncated seed")
+                (seed,) = struct.unpack_from("<Q", data, p)
+                player, p = _read_text(data, p + 8)
+                difficulty, p = _read_text(data, p)
+                theme, p = _read_text(data, p)
+                games.append(Game(rows, cols, seed, started, player, difficulty, theme, [], value))
+            elif kind <= RESOLVE:
+                delta, p = _read_varint(data, p)
+                if games:
+                    games[-1].events.append((kind, value, delta))
+            else:
+                raise ValueError(f"{path}: registro desconocido en el byte {pos}")
+            pos = p
+    except IndexError:
+        pass  # the writer stopped mid-record
+    return games
+
+
+def iter_games(paths: List[str]) -> Iterator[Tuple[str, Game]]:
+    """Yield ``(file, game)`` for recording files and directories of them."""
+    for path in paths:
+        files = sorted(glob.glob(os.path.join(path, "*.mrec"))) if os.path.isdir(path) else [path]
+        for file in files:
+            for game in read_games(file):
+                yield file, game
+
+
+class ReplayResult(NamedTuple):
+    clicks: int
+    divergences: int  # clicks whose outcome differs from the recording
+    won: bool
+    attempts: int
+    score: int
+
+
+def replay(game: Game) -> ReplayResult:
+    """Re-run a game on a MemoryEngine as fast as possible."""
+    eng = MemoryEngine(game.rows, game.cols, seed=game.seed, faces=game.faces)
+    click = eng.click
+    clicks = divergences = 0
+    for kind, cell, _delta in game.events:
+        if kind == RESOLVE:
+            eng.resolve()
+            continue
+        clicks += 1
+        if click(cell) != kind:
+            divergences += 1
+    return ReplayResult(clicks, divergences, eng.done, eng.attempts, eng.score())
+
+
+def replay_in_window(window, game: Game, speed: float = 1.0, on_done=None) -> None:
+    """Play a recorded game on a GameWindow at ``speed`` times the recorded pace.
+
+    The window stops recording and does not save the score of the replay.
+    """
+    if window._recorder is not None:
+        window._recorder.close()
+        window._recorder = None
+    window.keep_score = False
+    window.reset_game(seed=game.seed)
+    events = game.events
+
+    def delay(ms: int) -> int:
+        return max(1, int(ms / speed))
+
+    def step(k: int):
+        kind, cell, _delta = events[k]
+        if kind == RESOLVE:
+            # the recorded flip-back time replaces the window's own timer
+            window._cancel_flip()
+            if window.engine.locked:
+                window._flip_back(window.engine.first, window.engine.second)
+        else:
+            window.on_card_click(cell)
+        if k + 1 < len(events):
+            window.after(delay(events[k + 1][2]), step, k + 1)
+        elif on_done is not None:
+            on_done()
+
+    if events:
+        window.after(delay(events[0][2]), step, 0)
+    elif on_done is not None:
+        on_done()
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Reproduce partidas grabadas del memorama.")
+    parser.add_argument("paths", nargs="+", help="archivos .mrec o carpetas con grabaciones")
+    parser.add_argument("--gui", action="store_true", help="reproduce una partida en una ventana de juego")
+    parser.add_argument("--game", type=int, default=0, help="partida a mostrar con --gui (en orden de lectura)")
+    parser.add_argument("--speed", type=float, default=1.0, help="velocidad relativa de la reproducción con --gui")
+    args = parser.parse_args(argv)
+
+    if args.gui:
+        games = [g for _f, g in iter_games(args.paths)]
+        if not 0 <= args.game < len(games):
+            parser.error(f"hay {len(games)} partidas grabadas")
+        return _replay_gui(games[args.game], args.speed)
+
+    start = time.perf_counter()
+    games = clicks = divergent = 0
+    for file, game in iter_games(args.paths):
+        result = replay(game)
+        games += 1
+        clicks += result.clicks
+        if result.divergences:
+            divergent += 1
+            print(f"{file}: semilla {game.seed} difiere en {result.divergences} clics")
+    elapsed = time.perf_counter() - start
+    print(f"{games} partidas, {clicks} clics en {elapsed:.2f}s ({clicks / max(elapsed, 1e-9):.0f} clics/s); "
+          f"{divergent} con diferencias")
+    return 1 if divergent else 0
+
+
+def _replay_gui(game: Game, speed: float) -> int:
+    from tkinter import Tk
+    from ventana import GameWindow
+    root = Tk()
+    root.withdraw()
+    # resume=False: the player's suspended game must survive the replay
+    window = GameWindow(root, theme_dir=game.theme or "ImagenesPython", player_name=game.player or "Repetición",
+                        rows=game.rows, cols=game.cols, record=False, resume=False)
+    window.protocol("WM_DELETE_WINDOW", root.destroy)
+    replay_in_window(window, game, speed)
+    root.mainloop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
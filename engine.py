@@ -0,0 +1,221 @@
+"""
+engine.py
+
+Tk-free rules of the memorama: board state, click handling and scoring.
+
+The board is kept compact so simulations can run millions of clicks per
+second: a flat ``array`` of pair ids, an ``int`` used as a bitset of matched
+cells and the indices of the face-up selection.
+"""
+from __future__ import annotations
+
+from array import array
+import random
+from typing import Iterable, List, Optional, Tuple
+
+from boards import deal
+
+# click outcomes returned by MemoryEngine.click
+IGNORED = 0   # locked board, out of range, matched or already face-up card
+FIRST = 1     # first card of an attempt turned face-up
+MATCH = 2     # second card matches the first
+MISMATCH = 3  # second card differs; board is locked until resolve()
+WIN = 4       # match that completes the board
+
+BASE_SCORE = 1000
+ATTEMPT_PENALTY = 20
+
+
+def board_shape(grid_size: int) -> Tuple[int, int]:
+    """Return the (rows, cols) used for a square difficulty setting.
+
+    Odd squares cannot hold pairs only, so they get one extra column
+    (5 -> 5x6).
+
+    Args:
+        grid_size (int): Side requested by the menu.
+
+    Returns:
+        tuple: ``(rows, cols)`` with an even number of cells.
+    """
+    if grid_size * grid_size % 2:
+        return grid_size, grid_size + 1
+    return grid_size, grid_size
+
+
+def score_for(attempts: int, pairs: int) -> int:
+    """Score of a finished board: 1000 minus 20 per attempt beyond optimal."""
+    penalty = max(0, attempts - pairs)
+    return max(0, BASE_SCORE - penalty * ATTEMPT_PENALTY)
+
+
+def _bits(mask: int) -> List[int]:
+    # walk the set bits only, lowest first
+    out = []
+    while mask:
+        low = mask & -mask
+        out.append(low.bit_length() - 1)
+        mask ^= low
+    return out
+
+
+class MemoryEngine:
+    """State and rules of one memorama board.
+
+    Args:
+        rows (int): Number of rows.
+        cols (int): Number of columns.
+        values (iterable, optional): Pair id of every cell, row-major. Each id
+            must appear an even number of times. Shuffled pairs are generated
+            when omitted.
+        rng (random.Random, optional): Source of the seeds of new boards.
+        seed (int, optional): Seed of the first board; drawn from ``rng``
+            when omitted.
+        faces (int, optional): Distinct faces available. Boards dealt for
+            more pairs than faces reuse ids, so every copy of a face matches
+            (an id then appears four or more times). 0 means one per pair.
+
+    Raises:
+        ValueError: If the board has an odd or zero number of cells, or the
+            given values cannot be paired.
+    """
+
+    __slots__ = ("rows", "cols", "size", "pairs", "values", "matched",
+                 "first", "second", "attempts", "matches", "rng", "seed", "faces")
+
+    def __init__(self, rows: int, cols: int, values: Optional[Iterable[int]] = None,
+                 rng: Optional[random.Random] = None, seed: Optional[int] = None, faces: int = 0):
+        size = rows * cols
+        if rows <= 0 or cols <= 0 or size % 2:
+            raise ValueError(f"un tablero de {rows}x{cols} no se puede llenar con pares")
+        self.rows = rows
+        self.cols = cols
+        self.size = size
+        self.pairs = size // 2
+        self.faces = faces if 0 < faces < self.pairs else 0
+        self.rng = rng or random.Random()
+        self.reset(values, seed)
+
+    def reset(self, values: Optional[Iterable[int]] = None, seed: Optional[int] = None,
+              check: bool = True) -> None:
+        """Start a new game, reshuffling unless ``values`` is given.
+
+        Every shuffled board is dealt from its own seed (see boards.deal), kept
+        in ``seed``, so the same board can be dealt again from it.
+
+        Args:
+            values (iterable, optional): Pair ids of the new board.
+            seed (int, optional): Seed to deal from, or to remember with ``values``.
+            check (bool): Validate ``values``; boards from boards.py are valid.
+        """
+        if values is None:
+            seed, pairs = self.deal(seed)
+        elif check:
+            pairs = [int(v) for v in values]
+            self._check_values(pairs)
+        else:
+            pairs = values
+        self.seed = seed
+        self.values = array("H", pairs)
+        self.matched = 0
+        self.first = -1
+        self.second = -1
+        self.attempts = 0
+        self.matches = 0
+
+    def deal(self, seed: Optional[int] = None) -> Tuple[int, List[int]]:
+        """Deal a board of this shape without starting it.
+
+        ``reset(values, seed, check=False)`` starts the board later.
+
+        Returns:
+            tuple: The seed and the pair ids.
+        """
+        if seed is None:
+            seed = self.rng.getrandbits(63)
+        pairs = deal(self.rows, self.cols, seed)
+        if self.faces:
+            pairs = [p % self.faces for p in pairs]
+        return seed, pairs
+
+    def _check_values(self, values: List[int]) -> None:
+        if len(values) != self.size:
+            raise ValueError(f"se esperaban {self.size} fichas, se recibieron {len(values)}")
+        counts = {}
+        for v in values:
+            counts[v] = counts.get(v, 0) + 1
+        if any(c % 2 for c in counts.values()):
+            raise ValueError("cada ficha debe aparecer un número par de veces")
+
+    def click(self, index: int) -> int:
+        """Turn a card face-up and apply the matching rules.
+
+        Args:
+            index (int): Cell index, row-major.
+
+        Returns:
+            int: One of IGNORED, FIRST, MATCH, MISMATCH or WIN.
+        """
+        if self.second >= 0 or index < 0 or index >= self.size:
+            return IGNORED
+        bit = 1 << index
+        if self.matched & bit:
+            return IGNORED
+        first = self.first
+        if first < 0:
+            self.first = index
+            return FIRST
+        if first == index:
+            return IGNORED
+        self.attempts += 1
+        if self.values[first] == self.values[index]:
+            self.matched |= bit | (1 << first)
+            self.first = -1
+            self.matches += 1
+            return WIN if self.matches == self.pairs else MATCH
+        self.second = index
+        return MISMATCH
+
+    def resolve(self) -> Optional[Tuple[int, int]]:
+        """Turn a mismatched pair face-down again and unlock the board.
+
+        Returns:
+            tuple or None: The two cells that were flipped back, if any.
+        """
+        if self.second < 0:
+            return None
+        pair = (self.first, self.second)
+        self.first = -1
+        self.second = -1
+        return pair
+
+    @property
+    def locked(self) -> bool:
+        """True while a mismatched pair waits for resolve()."""
+        return self.second >= 0
+
+    @property
+    def done(self) -> bool:
+        return self.matches == self.pairs
+
+    def is_matched(self, index: int) -> bool:
+        return bool(self.matched >> index & 1)
+
+    def is_face_up(self, index: int) -> bool:
+        return index == self.first or index == self.second or bool(self.matched >> index & 1)
+
+    def matched_indices(self) -> List[int]:
+        """Return the matched cells in ascending order."""
+        return _bits(self.matched)
+
+    def face_up_indices(self) -> List[int]:
+        """Return every face-up cell: matched ones plus the current selection."""
+        m = self.matched
+        if self.first >= 0:
+            m |= 1 << self.first
+        if self.second >= 0:
+            m |= 1 << self.second
+        return _bits(m)
+
+    def score(self) -> int:
+        return score_for(self.attempts, self.pairs)
@@ -0,0 +1,193 @@
+"""
+hints.py
+
+Tk-free memory of what the player has seen, for hints and the demo mode.
+
+``SeenIndex`` follows a board click by click: every seen, unmatched card by
+pair id, the pairs whose cards have both been seen, and the cards nobody has
+looked at yet. Each click updates it in O(1) and every question it answers
+(a known pair, the partner of a face-up card, a card to explore) is O(1)
+too, so hints stay instant on boards of thousands of cells.
+
+``Assist`` decides when to offer a hint without being asked. It counts
+memory lapses, attempts where the partner of the first card had already
+been seen but the player missed it, and steps in after a few in a row. The
+easier the difficulty the sooner it helps; remembering pairs makes it wait
+longer, lapses make it come back sooner.
+"""
+from __future__ import annotations
+
+from array import array
+import random
+from typing import Dict, List, Optional, Tuple
+
+from engine import MATCH, MISMATCH, WIN
+
+# consecutive lapses before the first automatic hint, by difficulty
+ASSIST_LAPSES = {"facil": 1, "medio": 2, "dificil": 3}
+# longest the assist waits between lapses and a hint
+MAX_ASSIST_LAPSES = 5
+# pairs recalled in a row that make the assist wait one lapse more
+RECALLS_TO_BACK_OFF = 2
+
+
+class SeenIndex:
+    """What a perfect-memory player knows about a board.
+
+    Args:
+        size (int): Number of cells.
+    """
+
+    def __init__(self, size: int):
+        self.reset(size)
+
+    def reset(self, size: Optional[int] = None) -> None:
+        """Forget everything, for a new deal of a board with ``size`` cells."""
+        if size is not None:
+            self.size = size
+        # pair id -> seen cells of that pair still on the board
+        self._seen: Dict[int, List[int]] = {}
+        # pair ids with two seen cells, insertion-ordered
+        self._known: Dict[int, None] = {}
+        # never-seen cells; swap-remove list plus each cell's position in it
+        self._unseen = list(range(self.size))
+        self._pos = array("l", range(self.size))
+
+    def _take(self, cell: int) -> bool:
+        # remove ``cell`` from the unseen ones; False if it was not there
+        pos = self._pos[cell]
+        if pos < 0:
+            return False
+        last = self._unseen.pop()
+        if last != cell:
+            self._unseen[pos] = last
+            self._pos[last] = pos
+        self._pos[cell] = -1
+        return True
+
+    def see(self, cell: int, pair: int) -> None:
+        """Record that ``cell`` was turned face-up and shows ``pair``."""
+        if not self._take(cell):
+            return  # seen before
+        cells = self._seen.setdefault(pair, [])
+        cells.append(cell)
+        if len(cells) == 2:
+            self._known[pair] = None
+
+    def drop(self, cell: int) -> None:
+        """Forget a cell matched before the index started (a resumed game)."""
+        self._take(cell)
+
+    def matched(self, a: int, b: int, pair: int) -> None:
+        """Drop two matched cells of ``pair``; both must have been seen."""
+        cells = self._seen[pair]
+        cells.remove(a)
+        cells.remove(b)
+        if len(cells) < 2:
+            self._known.pop(pair, None)
+        if not cells:
+            del self._seen[pair]
+
+    def partner(self, cell: int, pair: int) -> Optional[int]:
+        """Return a seen cell other than ``cell`` that shows ``pair``, if any."""
+        for other in self._seen.get(pair, ()):
+            if other != cell:
+                return other
+        return None
+
+    def known_pair(self) -> Optional[Tuple[int, int]]:
+        """Return two seen cells that match, if any."""
+        for pair in self._known:
+            cells = self._seen[pair]
+            return cells[0], cells[1]
+        return None
+
+    def unseen_cell(self, rng: random.Random) -> Optional[int]:
+        """Return a random never-seen cell, if any is left."""
+        if not self._unseen:
+            return None
+        return self._unseen[rng.randrange(len(self._unseen))]
+
+    @property
+    def unseen(self) -> int:
+        return len(self._unseen)
+
+    def next_click(self, first: int, first_pair: int, rng: random.Random) -> Optional[int]:
+        """The cell a perfect-memory player clicks next.
+
+        Args:
+            first (int): Face-up first card of the attempt, or -1.
+            first_pair (int): Pair id of ``first`` (ignored without one).
+            rng (random.Random): Picks the card to explore.
+
+        Returns:
+            int or None: A cell, or None if the board has nothing to click.
+        """
+        if first >= 0:
+            partner = self.partner(first, first_pair)
+            return partner if partner is not None else self.unseen_cell(rng)
+        pair = self.known_pair()
+        if pair is not None:
+            return pair[0]
+        return self.unseen_cell(rng)
+
+    def hint(self, first: int, first_pair: int) -> Tuple[int, ...]:
+        """Cells worth pointing out: the partner of the face-up card or a known pair.
+
+        Returns an empty tuple when the player has not seen enough yet.
+        """
+        if first >= 0:
+            partner = self.partner(first, first_pair)
+            return () if partner is None else (partner,)
+        pair = self.known_pair()
+        return () if pair is None else pair
+
+
+class Assist:
+    """Offers hints on its own when the player keeps forgetting seen cards.
+
+    Args:
+        difficulty (str): "facil", "medio" or "dificil".
+    """
+
+    def __init__(self, difficulty: str):
+        self.threshold = ASSIST_LAPSES.get(difficulty, ASSIST_LAPSES["medio"])
+        self.lapses = 0  # in a row
+        self.recalls = 0  # in a row
+        self.given = 0  # automatic hints so far
+        self._hinted = False  # the current attempt was helped
+
+    def record(self, event: int, partner_known: bool) -> None:
+        """Follow the second click of an attempt.
+
+        Args:
+            event (int): MATCH, MISMATCH or WIN.
+            partner_known (bool): Whether the first card's partner had been
+                seen when the attempt started.
+        """
+        hinted, self._hinted = self._hinted, False
+        if hinted:
+            self.lapses = 0
+            return  # helped, so neither a lapse nor a recall
+        if not partner_known:
+            return  # a guess, not a test of memory
+        if event == MISMATCH:
+            self.recalls = 0
+            self.lapses += 1
+            if self.lapses > self.threshold:
+                # it takes more than the current patience: help sooner
+                self.threshold = max(1, self.threshold - 1)
+        elif event in (MATCH, WIN):
+            self.lapses = 0
+            self.recalls += 1
+            if self.recalls >= RECALLS_TO_BACK_OFF:
+                self.recalls = 0
+                self.threshold = min(MAX_ASSIST_LAPSES, self.threshold + 1)
+
+    def should_hint(self, partner_known: bool) -> bool:
+        """Whether to point out the partner of a card just turned as first."""
+        if not partner_known or self.lapses < self.threshold:
+            return False
+        self.given += 1
+        self._hinted = True
+        return True
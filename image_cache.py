@@ -0,0 +1,145 @@
+"""
+image_cache.py
+
+Process-wide cache of rendered card images shared by every GameWindow.
+
+Rendering a card means resampling its source image to the current card size
+and wrapping it in a Tk PhotoImage. Both steps are expensive for the large
+theme images, so the result is kept in an LRU keyed by
+(source path, width, height, resample) with a memory cap.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from PIL import Image, ImageTk
+
+# default cap: roughly four 6x6 boards rendered at 200px
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_RESAMPLE = Image.BICUBIC
+
+CacheKey = Tuple[str, int, int, int]
+ImageSource = Union[Image.Image, Callable[[], Image.Image]]
+
+
+class RenderedCardCache:
+    """LRU cache of rendered card images with a byte budget.
+
+    Args:
+        max_bytes (int): Approximate memory cap; the least recently used
+            renders are evicted once it is exceeded.
+        factory (callable, optional): Turns a resized PIL image into the
+            object handed to the widgets. Defaults to ``ImageTk.PhotoImage``.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, factory: Optional[Callable[..., Any]] = None):
+        self.max_bytes = int(max_bytes)
+        self._factory = factory or ImageTk.PhotoImage
+        self._entries: "OrderedDict[CacheKey, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        # PhotoImages belong to one Tk interpreter; renders from a destroyed
+        # root cannot be reused by a new one
+        self._interp = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path: str, src: ImageSource, width: int, height: int,
+            resample: int = DEFAULT_RESAMPLE, master: Any = None) -> Any:
+        """Return the render of ``src`` at ``width`` x ``height``.
+
+        Args:
+            path (str): Identifies the source image (usually its file path).
+            src: The source PIL image, or a callable returning it. A callable
+                is only invoked on a cache miss.
+            width (int): Target width in pixels.
+            height (int): Target height in pixels.
+            resample (int): PIL resampling filter.
+            master: Tk widget owning the render, if the factory needs one.
+
+        Returns:
+            The cached or freshly rendered image.
+        """
+        rendered = self.lookup(path, width, height, resample, master)
+        if rendered is not None:
+            return rendered
+        image = src() if callable(src) else src
+        resized = image.resize((int(width), int(height)), resample)
+        return self.store(path, width, height, resized, resample, master)
+
+    def lookup(self, path: str, width: int, height: int,
+               resample: int = DEFAULT_RESAMPLE, master: Any = None) -> Any:
+        """Return a cached render or None, counting the hit or miss."""
+        if master is not None:
+            self._bind_interp(master)
+        key = (path, int(width), int(height), int(resample))
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def store(self, path: str, width: int, height: int, resized: Image.Image,
+              resample: int = DEFAULT_RESAMPLE, master: Any = None) -> Any:
+        """Wrap an image already resized to ``width`` x ``height`` and cache it.
+
+        The resize can happen on any thread; this must run on the Tk thread.
+        """
+        if master is not None:
+            self._bind_interp(master)
+            rendered = self._factory(resized, master=master)
+        else:
+            rendered = self._factory(resized)
+        key = (path, int(width), int(height), int(resample))
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+        nbytes = int(width) * int(height) * 4
+        self._entries[key] = (rendered, nbytes)
+        self._bytes += nbytes
+        self._evict()
+        return rendered
+
+    def _bind_interp(self, master: Any) -> None:
+        interp = getattr(master, "tk", None)
+        if interp is not self._interp:
+            self.clear()
+            self._interp = interp
+
+    def _evict(self) -> None:
+        # always keep the newest entry, even if it alone exceeds the budget
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _key, (_img, nbytes) = self._entries.popitem(last=False)
+            self._bytes -= nbytes
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every cached render (counters are kept)."""
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the current footprint."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# shared by every GameWindow in the process
+CARD_CACHE = RenderedCardCache()
+
+
+def cache_stats() -> Dict[str, int]:
+    """Return the counters of the process-wide card cache."""
+    return CARD_CACHE.stats()
@@ -0,0 +1,190 @@
+"""
+image_sources.py
+
+Process-wide store of decoded card sources with a memory budget.
+
+Theme images are often camera photos many times larger than any card. A
+source is therefore decoded at reduced scale, just large enough for the
+biggest card a window could show: JPEGs use draft mode, so the decoder
+itself skips most of the pixels, and other formats are shrunk right after
+loading. Every file is decoded once for all open windows; windows hold
+references to the files of their board and release them when they close.
+
+Decoded sources count against a byte budget (``MEMORAMA_SOURCE_BUDGET_MB``).
+Over budget, unreferenced sources go first, then the least recently used
+ones; an evicted source is decoded again the next time a card needs it.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+from PIL import Image
+
+BUDGET_ENV = "MEMORAMA_SOURCE_BUDGET_MB"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# used when a caller does not say how large its cards can get
+DEFAULT_MAX_SIDE = 512
+
+
+def _budget_from_env() -> int:
+    try:
+        return int(float(os.environ[BUDGET_ENV]) * 1024 * 1024)
+    except (KeyError, ValueError):
+        return DEFAULT_MAX_BYTES
+
+
+def decode_source(path: str, side: int) -> Image.Image:
+    """Decode ``path`` so that its shorter edge is about ``side`` pixels (never upscaled)."""
+    img = Image.open(path)
+    if img.format == "JPEG":
+        # the decoder scales by 1/2, 1/4 or 1/8, staying at or above the request
+        img.draft("RGB", (side, side))
+    img.load()
+    w, h = img.size
+    scale = side / min(w, h)
+    if scale < 1:
+        size = (max(1, round(w * scale)), max(1, round(h * scale)))
+        img = img.resize(size, Image.BICUBIC, reducing_gap=3.0)
+    return img
+
+
+def _nbytes(img: Image.Image) -> int:
+    return img.width * img.height * len(img.getbands())
+
+
+class _Source:
+    __slots__ = ("image", "side", "full", "refs", "lock")
+
+    def __init__(self):
+        self.image: Optional[Image.Image] = None
+        self.side = 0      # shorter edge of the decoded image
+        self.full = False  # decoded at the file's own size, cannot grow
+        self.refs = 0
+        self.lock = threading.Lock()
+
+
+class SourceStore:
+    """Decoded sources shared by every window, with reference counts.
+
+    Args:
+        max_bytes (int): Memory budget for decoded pixels.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = _budget_from_env() if max_bytes is None else int(max_bytes)
+        self._entries: "OrderedDict[str, _Source]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.decodes = 0
+        self.hits = 0
+        self.evictions = 0
+
+    def acquire(self, paths: Iterable[str]) -> None:
+        """Take a reference on every file of ``paths`` (one per occurrence)."""
+        with self._lock:
+            for path in paths:
+                entry = self._entries.get(path)
+                if entry is None:
+                    entry = self._entries[path] = _Source()
+                entry.refs += 1
+
+    def release(self, paths: Iterable[str]) -> None:
+        """Drop references taken by ``acquire``; unreferenced sources are freed."""
+        with self._lock:
+            for path in paths:
+                entry = self._entries.get(path)
+                if entry is None:
+                    continue
+                entry.refs -= 1
+                if entry.refs <= 0:
+                    del self._entries[path]
+                    if entry.image is not None:
+                        self._bytes -= _nbytes(entry.image)
+
+    def get(self, path: str, side: int) -> Image.Image:
+        """Return the source of ``path`` with a shorter edge of at least ``side`` pixels.
+
+        Files smaller than that are returned at their own size. Safe to call
+        from any thread; concurrent calls for one file decode it once.
+        """
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                # not held by any window: decoded, but freed first
+                entry = self._entries[path] = _Source()
+            self._entries.move_to_end(path)
+        with entry.lock:
+            img = entry.image
+            if img is not None and (entry.full or entry.side >= side):
+                self.hits += 1
+                return img
+            img = decode_source(path, side)
+            self.decodes += 1
+            with self._lock:
+                if entry.image is not None:
+                    self._bytes -= _nbytes(entry.image)
+                entry.image = img
+                entry.side = min(img.size)
+                entry.full = entry.side < side
+                if self._entries.get(path) is entry:
+                    self._bytes += _nbytes(img)
+                    self._evict(keep=path)
+            return img
+
+    def loader(self, path: str, max_side: int):
+        """Return a window loader: ``load(card_side)`` giving a source for ``path``.
+
+        Sources are decoded for ``max_side`` (the largest card the window can
+        show) at once, so resizing the window never decodes a file again.
+        """
+        return lambda side: self.get(path, max(side, max_side))
+
+    def _evict(self, keep: str) -> None:
+        if self._bytes <= self.max_bytes:
+            return
+        # unreferenced sources first, then the least recently used
+        for referenced in (False, True):
+            for path, entry in list(self._entries.items()):
+                if self._bytes <= self.max_bytes:
+                    return
+                if path == keep or entry.image is None or (entry.refs > 0) != referenced:
+                    continue
+                self._bytes -= _nbytes(entry.image)
+                entry.image = None
+                entry.side = 0
+                self.evictions += 1
+                if entry.refs <= 0:
+                    del self._entries[path]
+
+    def stats(self) -> Dict[str, int]:
+        """Return counters and the current footprint."""
+        with self._lock:
+            return {
+                "sources": len(self._entries),
+                "decoded": sum(1 for e in self._entries.values() if e.image is not None),
+                "referenced": sum(1 for e in self._entries.values() if e.refs > 0),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "decodes": self.decodes,
+                "hits": self.hits,
+                "evictions": self.evictions,
+            }
+
+    def report(self) -> str:
+        """One line describing the footprint, for logs and the profiler."""
+        s = self.stats()
+        return (f"fuentes: {s['decoded']}/{s['sources']} decodificadas, "
+                f"{s['bytes'] / 1048576:.1f} de {s['max_bytes'] / 1048576:.0f} MiB, "
+                f"{s['decodes']} decodificaciones, {s['evictions']} descartes")
+
+
+# shared by every GameWindow in the process
+SOURCES = SourceStore()
+
+
+def source_stats() -> Dict[str, int]:
+    """Return the counters of the process-wide source store."""
+    return SOURCES.stats()
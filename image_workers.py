@@ -0,0 +1,100 @@
+"""
+image_workers.py
+
+Background decoding and resampling of card images.
+
+Tk widgets and PhotoImages may only be touched from the Tk thread, so the
+workers only produce resized PIL images. Each job names an outbox queue that
+the owning window drains from an ``after`` callback.
+"""
+from __future__ import annotations
+
+import itertools
+import os
+import queue
+import threading
+from typing import Any, Callable, List
+
+DEFAULT_WORKERS = max(1, min(4, os.cpu_count() or 1))
+
+# job priorities, lower runs first
+PRIORITY_URGENT = 0   # a face the player just turned over
+PRIORITY_BACK = 1     # needed by every cell
+PRIORITY_FACE = 5
+
+
+class RenderJob:
+    """A unit of work that runs at most once, however often it is queued.
+
+    Queueing an already queued job again with a lower priority is how a
+    window asks for a card sooner; whichever copy is picked first does the
+    work and the other one is skipped.
+
+    Args:
+        tag: Returned with the result so the window knows what it got.
+        fn (callable): The work; its return value is delivered.
+    """
+
+    __slots__ = ("tag", "fn", "cancelled", "_claim")
+
+    def __init__(self, tag: Any, fn: Callable[[], Any]):
+        self.tag = tag
+        self.fn = fn
+        self.cancelled = False
+        self._claim = threading.Lock()
+
+    def run(self) -> Any:
+        """Do the work, or return None if cancelled or already done."""
+        if self.cancelled or not self._claim.acquire(blocking=False):
+            return None
+        return self.fn()
+
+
+class DecodePool:
+    """Daemon threads running prioritized RenderJobs.
+
+    Threads start on first use so importing the module stays free.
+
+    Args:
+        workers (int): Number of threads.
+    """
+
+    def __init__(self, workers: int = DEFAULT_WORKERS):
+        self.workers = workers
+        self._jobs: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._threads: List[threading.Thread] = []
+        self._start_lock = threading.Lock()
+
+    def submit(self, job: RenderJob, outbox: "queue.SimpleQueue", priority: int = PRIORITY_FACE) -> None:
+        """Queue ``job``; ``(job.tag, result)`` is put on ``outbox`` when done.
+
+        A job that raises delivers the exception as its result.
+        """
+        self._ensure_started()
+        self._jobs.put((priority, next(self._seq), job, outbox))
+
+    def _ensure_started(self) -> None:
+        if self._threads:
+            return
+        with self._start_lock:
+            if self._threads:
+                return
+            for n in range(self.workers):
+                t = threading.Thread(target=self._run, name=f"memorama-decode-{n}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def _run(self) -> None:
+        while True:
+            _priority, _seq, job, outbox = self._jobs.get()
+            try:
+                result = job.run()
+            except Exception as exc:  # handed to the Tk thread, which decides
+                result = exc
+            if result is not None:
+                outbox.put((job.tag, result))
+
+
+# shared by every GameWindow in the process
+DECODE_POOL = DecodePool()
@@ -1,4 +1,26 @@
+import time
+_started = time.perf_counter()
+
+import argparse
+import sys
+
+from startup import StartupTimer, DEFAULT_BUDGET_MS
+from profiling import enable_from_env, DEFAULT_PROFILE_FILE
+
+timer = StartupTimer(_started)
 from menu import launch_menu
+timer.mark("import menu")
 
 if __name__ == "__main__":
-	launch_menu()
\ No newline at end of file
+	parser = argparse.ArgumentParser(description="Memorama cognitivo")
+	parser.add_argument("--startup-report", action="store_true", help="muestra los tiempos de arranque")
+	parser.add_argument("--startup-check", action="store_true",
+	                    help="cierra el menú tras pintarlo y sale con error si se excede el presupuesto")
+	parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="presupuesto del primer pintado")
+	parser.add_argument("--profile", nargs="?", const=DEFAULT_PROFILE_FILE, default=None, metavar="ARCHIVO",
+	                    help="mide latencias y bloqueos de la interfaz y los guarda al salir")
+	args = parser.parse_args()
+	enable_from_env(args.profile)
+	ok = launch_menu(timer, report=args.startup_report, startup_check=args.startup_check, budget_ms=args.budget_ms)
+	if args.startup_check and not ok:
+		sys.exit(1)
@@ -1,15 +1,31 @@
 from tkinter import *
 from tkinter import ttk, simpledialog
-from PIL import Image, ImageTk
 from tkinter import font
+import sys
+import threading
 
-from ventana import GameWindow
-from scores import read_scores
+from startup import StartupTimer, DEFAULT_BUDGET_MS
+
+# PIL, the game window and the score store are imported on first use so the
+# menu paints before they load (see launch_menu)
+
+
+# rows fetched from the score store per scroll step
+SCORES_PAGE_SIZE = 100
+# delay before a search is run while the user is typing
+SEARCH_DELAY_MS = 250
 
 
 class ScoresWindow(Toplevel):
+    """Leaderboard that pages rows in from the score store as the user scrolls."""
+
+    # (heading, column of scores.query_scores)
+    COLUMNS = (("Jugador", "name"), ("Puntaje", "score"), ("Dificultad", "difficulty"))
+
     def __init__(self, master):
+        from scores import query_scores, DIFFICULTIES
         super().__init__(master)
+        self._query = query_scores
         self.title("Puntajes máximos")
         self.geometry("500x400")
         self.configure(bg="#0f172a")
@@ -17,37 +33,132 @@ class ScoresWindow(Toplevel):
         title = Label(self, text="Puntajes máximos", fg="#e2e8f0", bg="#0f172a", font=("Lato", 18, "bold"))
         title.pack(pady=12)
 
-        cols = ("Jugador", "Puntaje", "Dificultad")
-        tree = ttk.Treeview(self, columns=cols, show="headings", height=12)
-        for c in cols:
-            tree.heading(c, text=c)
-            width = 160 if c == "Dificultad" else 160
-            tree.column(c, anchor=CENTER, width=width)
-        tree.pack(expand=True, fill=BOTH, padx=12, pady=12)
+        # filters: name prefix and difficulty
+        filters = Frame(self, bg="#0f172a")
+        filters.pack(fill=X, padx=12)
+        Label(filters, text="Buscar:", fg="#e2e8f0", bg="#0f172a").pack(side=LEFT)
+        self.search_var = StringVar()
+        ttk.Entry(filters, textvariable=self.search_var, width=18).pack(side=LEFT, padx=(4, 12))
+        Label(filters, text="Dificultad:", fg="#e2e8f0", bg="#0f172a").pack(side=LEFT)
+        self.diff_var = StringVar(value="todas")
+        diff_box = ttk.Combobox(filters, textvariable=self.diff_var, values=("todas",) + DIFFICULTIES,
+                                state="readonly", width=10)
+        diff_box.pack(side=LEFT, padx=4)
+        diff_box.bind("<<ComboboxSelected>>", lambda _e: self._reload())
+        self.search_var.trace_add("write", lambda *_a: self._schedule_reload())
+
+        body = Frame(self, bg="#0f172a")
+        body.pack(expand=True, fill=BOTH, padx=12, pady=12)
+        cols = tuple(heading for heading, _key in self.COLUMNS)
+        self.tree = ttk.Treeview(body, columns=cols, show="headings", height=12)
+        for heading, key in self.COLUMNS:
+            self.tree.heading(heading, text=heading, command=lambda k=key: self._sort_by(k))
+            self.tree.column(heading, anchor=CENTER, width=160)
+        self.scrollbar = ttk.Scrollbar(body, orient=VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self._on_scroll)
+        self.scrollbar.pack(side=RIGHT, fill=Y)
+        self.tree.pack(side=LEFT, expand=True, fill=BOTH)
+
+        self._order_by = "score"
+        self._descending = True
+        self._loaded = 0
+        self._exhausted = False
+        self._reload_job = None
+        self._reload()
+
+    def _filters(self):
+        diff = self.diff_var.get()
+        return (None if diff == "todas" else diff), self.search_var.get().strip()
+
+    def _fetch_page(self):
+        if self._exhausted:
+            return
+        difficulty, prefix = self._filters()
+        rows = self._query(difficulty, prefix, self._order_by, self._descending,
+                            offset=self._loaded, limit=SCORES_PAGE_SIZE)
+        for entry in rows:
+            self.tree.insert("", END, values=(entry["name"], entry["score"], entry["difficulty"]))
+        self._loaded += len(rows)
+        self._exhausted = len(rows) < SCORES_PAGE_SIZE
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        # load the next page before the user reaches the end
+        if float(last) > 0.9:
+            self._fetch_page()
+
+    def _reload(self):
+        self._reload_job = None
+        self.tree.delete(*self.tree.get_children())
+        self._loaded = 0
+        self._exhausted = False
+        self._fetch_page()
+        self._update_headings()
+
+    def _schedule_reload(self):
+        if self._reload_job is not None:
+            self.after_cancel(self._reload_job)
+        self._reload_job = self.after(SEARCH_DELAY_MS, self._reload)
+
+    def _sort_by(self, key: str):
+        if key == self._order_by:
+            self._descending = not self._descending
+        else:
+            self._order_by = key
+            self._descending = key == "score"
+        self._reload()
+
+    def _update_headings(self):
+        for heading, key in self.COLUMNS:
+            arrow = (" ▼" if self._descending else " ▲") if key == self._order_by else ""
+            self.tree.heading(heading, text=heading + arrow)
+
+
+def _warm_up():
+    # runs on a worker thread once the menu is visible, so the first game
+    # does not pay for these imports or for opening the audio device
+    try:
+        import ventana  # noqa: F401  (PIL, image cache, engine, scores)
+        from audio import AUDIO
+        AUDIO.start()
+    except Exception:
+        pass
+
 
-        # populate
-        scores = read_scores()
-        for entry in scores:
-            tree.insert("", END, values=(entry.get("name"), entry.get("score"), entry.get("difficulty")))
+def launch_menu(timer: StartupTimer | None = None, report: bool = False,
+                startup_check: bool = False, budget_ms: float = DEFAULT_BUDGET_MS) -> bool:
+    """Show the main menu and run the Tk main loop.
 
+    Args:
+        timer (StartupTimer, optional): Milestones started by main.py.
+        report (bool): Print the startup timings once the menu is painted.
+        startup_check (bool): Close the menu right after its first paint.
+        budget_ms (float): Cold-start budget for the first paint.
 
-def launch_menu():
+    Returns:
+        bool: True if the first paint met the budget.
+    """
+    timer = timer or StartupTimer()
     app = Tk()
     app.title('Menu Memorama')
     w, h = 800, 800
     app.geometry(f"{w}x{h}")
+    timer.mark("Tk root")
 
     frame = Frame(app, bg="#0f172a")
 
-    # fondo opcional
-    try:
-        image = Image.open('./photos/nubes.jpg').resize((w, h))
-        bg_image = ImageTk.PhotoImage(image)
-        bg_label = Label(frame, image=bg_image)
-        bg_label.image = bg_image
-        bg_label.place(x=0, y=0, relwidth=1, relheight=1)
-    except Exception:
-        pass
+    def load_background():
+        # fondo opcional
+        try:
+            from PIL import Image, ImageTk
+            image = Image.open('./photos/nubes.jpg').resize((w, h))
+            bg_image = ImageTk.PhotoImage(image)
+            bg_label = Label(frame, image=bg_image)
+            bg_label.image = bg_image
+            bg_label.place(x=0, y=0, relwidth=1, relheight=1)
+            bg_label.lower()
+        except Exception:
+            pass
 
     for i in range(3):
         frame.columnconfigure(i, weight=1)
@@ -68,6 +179,8 @@ def launch_menu():
     app.player_name = None
     # difficulty selection
     diff_var = StringVar(value="dificil")  # default 6x6
+    # hints offered by the game itself after repeated memory lapses
+    assist_var = BooleanVar(value=False)
 
     def _grid_for_diff(d: str) -> int:
         d = (d or "").lower()
@@ -78,7 +191,8 @@ def launch_menu():
             name = simpledialog.askstring("Jugador", "Ingresa tu nombre para guardar tu puntaje:", parent=app)
             app.player_name = (name or "Invitado").strip() or "Invitado"
         gs = _grid_for_diff(diff_var.get())
-        GameWindow(app, grid_size=gs, player_name=app.player_name)
+        from ventana import GameWindow
+        GameWindow(app, grid_size=gs, player_name=app.player_name, assist=assist_var.get())
 
     def open_scores():
         ScoresWindow(app)
@@ -88,10 +202,11 @@ def launch_menu():
     diff_frame.grid(column=1, row=1, sticky='nswe')
     Label(diff_frame, text="Dificultad:", bg="#0f172a", fg="#e2e8f0", font=("Lato", 12, "bold")).pack(pady=(0,6))
     rb1 = ttk.Radiobutton(diff_frame, text="Fácil (4x4)", value="facil", variable=diff_var)
-    rb2 = ttk.Radiobutton(diff_frame, text="Medio (5x5)", value="medio", variable=diff_var)
+    rb2 = ttk.Radiobutton(diff_frame, text="Medio (5x6)", value="medio", variable=diff_var)
     rb3 = ttk.Radiobutton(diff_frame, text="Difícil (6x6)", value="dificil", variable=diff_var)
     for rb in (rb1, rb2, rb3):
         rb.pack(anchor=CENTER, pady=2)
+    ttk.Checkbutton(diff_frame, text="Ayuda automática", variable=assist_var).pack(anchor=CENTER, pady=(8, 2))
 
     empezar = Button(frame, text="Empezar", command=start_game, bg="#0f172a", fg="white", activebackground="#16a34a")
     empezar.grid(column=1, row=2, ipady=bipady, ipadx=bipadx, sticky='nswe', pady=20)
@@ -105,8 +220,27 @@ def launch_menu():
     fuente = font.Font(family='Lato', size=12)
     for b in (empezar, puntajes, salir):
         b.config(font=fuente)
-
+    timer.mark("widgets")
+
+    def on_first_paint():
+        timer.mark("first paint")
+        if report or startup_check:
+            print(timer.report(budget_ms), file=sys.stderr)
+        if startup_check:
+            app.destroy()
+            return
+        app.after_idle(load_background)
+        threading.Thread(target=_warm_up, name="memorama-warmup", daemon=True).start()
+
+    def on_map(event):
+        if event.widget is app:
+            app.unbind("<Map>")
+            # runs after the redraws queued by mapping the window
+            app.after_idle(on_first_paint)
+
+    app.bind("<Map>", on_map)
     app.mainloop()
+    return not timer.over_budget(budget_ms)
 
 
 if __name__ == "__main__":
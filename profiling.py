@@ -0,0 +1,357 @@
+"""
+profiling.py
+
+Optional instrumentation for reports of a game that "freezes".
+
+When enabled, the slow paths of GameWindow and ``write_score`` are wrapped
+to record their wall time in latency histograms, and a watchdog thread
+notices when the Tk event loop stops answering for longer than a threshold,
+noting which callback was running. Nothing is patched until ``enable`` is
+called, so a normal run pays nothing.
+
+Histograms are written as tab-separated text on exit and summarized in a
+small overlay next to the status line of every game window.
+
+Enable it with ``MEMORAMA_PROFILE=profile.tsv python main.py`` or
+``python main.py --profile``.
+"""
+from __future__ import annotations
+
+import atexit
+import bisect
+import functools
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+PROFILE_ENV = "MEMORAMA_PROFILE"
+DEFAULT_PROFILE_FILE = "profile.tsv"
+# the event loop is stalled after this long without a heartbeat
+DEFAULT_STALL_MS = 200.0
+HEARTBEAT_MS = 50
+OVERLAY_REFRESH_MS = 1000
+# upper bucket edges in ms: 1/16 ms doubling up to ~8 s
+BUCKET_EDGES = tuple(2.0 ** k / 16 for k in range(18))
+
+_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+class LatencyHistogram:
+    """Log2-bucketed latencies of one operation, in milliseconds."""
+
+    __slots__ = ("name", "counts", "count", "total", "max")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.counts = [0] * (len(BUCKET_EDGES) + 1)  # last bucket: above every edge
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, ms: float) -> None:
+        self.counts[bisect.bisect_left(BUCKET_EDGES, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, q: float) -> float:
+        """Return an upper bound of the ``q`` quantile (0..1)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for edge, n in zip(BUCKET_EDGES, self.counts):
+            seen += n
+            if seen >= rank:
+                return min(edge, self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def buckets(self) -> List[Tuple[float, int]]:
+        """Return ``(upper edge, count)`` for the non-empty buckets."""
+        edges = BUCKET_EDGES + (float("inf"),)
+        return [(edge, n) for edge, n in zip(edges, self.counts) if n]
+
+
+def _targets() -> List[Tuple[Any, str, str]]:
+    # (owner, attribute, histogram name); imported here so that merely
+    # importing this module stays cheap
+    import scores
+    import ventana
+    GameWindow = ventana.GameWindow
+    return [
+        (GameWindow, "_load_images", "_load_images"),
+        (GameWindow, "_redraw_images", "_redraw_images"),
+        (GameWindow, "on_card_click", "on_card_click"),
+        (GameWindow, "_flip_back", "_flip_back"),
+        # called on the score_queue thread; timed, but never a stall
+        (scores, "write_score", "write_score"),
+    ]
+
+
+class Profiler:
+    """Latency histograms plus a stall watchdog for the Tk thread.
+
+    Args:
+        stall_ms (float): Event-loop silence that counts as a stall.
+    """
+
+    def __init__(self, stall_ms: float = DEFAULT_STALL_MS):
+        self.stall_ms = stall_ms
+        self.enabled = False
+        self.out_path: Optional[str] = None
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        # (seconds since enable, duration ms, callback)
+        self.stalls: List[Tuple[float, float, str]] = []
+        self._patched: List[Tuple[Any, str, Any]] = []
+        self._running: List[str] = []  # instrumented calls on the Tk thread
+        self._tk_ident: Optional[int] = None
+        self._t0 = 0.0
+        self._last_beat: Optional[float] = None
+        self._stall: Optional[Tuple[float, str]] = None
+        self._windows: Dict[Any, Tuple[Any, Any]] = {}  # window -> (heartbeat job, overlay)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+        self._atexit = False
+
+    def histogram(self, name: str) -> LatencyHistogram:
+        hist = self.histograms.get(name)
+        if hist is None:
+            hist = self.histograms[name] = LatencyHistogram(name)
+        return hist
+
+    # -- instrumentation -------------------------------------------------
+
+    def enable(self, out_path: Optional[str] = None, targets: Optional[List[Tuple[Any, str, str]]] = None) -> None:
+        """Wrap the instrumented functions and start the watchdog.
+
+        Must be called on the Tk thread. ``out_path`` receives the report when
+        the process exits.
+        """
+        if self.enabled:
+            return
+        self.enabled = True
+        self.out_path = out_path
+        self._tk_ident = threading.get_ident()
+        self._t0 = time.perf_counter()
+        default = targets is None
+        for owner, attr, name in _targets() if default else targets:
+            original = getattr(owner, attr)
+            setattr(owner, attr, self._timed(name, original))
+            self._patched.append((owner, attr, original))
+        if default:
+            self._hook_windows()
+            # measured by the audio thread itself
+            from audio import AUDIO
+            self.histograms["effect_latency"] = AUDIO.latency
+        self._stop.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="memorama-watchdog", daemon=True)
+        self._watchdog.start()
+        if out_path and not self._atexit:
+            atexit.register(self._dump_at_exit)
+            self._atexit = True
+
+    def disable(self) -> None:
+        """Restore the original functions and stop the watchdog."""
+        if not self.enabled:
+            return
+        self.enabled = False
+        for owner, attr, original in reversed(self._patched):
+            setattr(owner, attr, original)
+        self._patched.clear()
+        for window in list(self._windows):
+            self.detach(window)
+        self._stop.set()
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+
+    def _timed(self, name: str, fn: Callable) -> Callable:
+        hist = self.histogram(name)
+        running = self._running
+        tk_ident = self._tk_ident
+        perf = time.perf_counter
+        get_ident = threading.get_ident
+
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            on_tk = get_ident() == tk_ident
+            if on_tk:
+                running.append(name)
+            start = perf()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                hist.record((perf() - start) * 1000.0)
+                if on_tk:
+                    running.pop()
+
+        return timed
+
+    def _hook_windows(self) -> None:
+        # every new game window gets a heartbeat and the overlay
+        from ventana import GameWindow
+        init, destroy = GameWindow.__init__, GameWindow.destroy
+        profiler = self
+
+        @functools.wraps(init)
+        def __init__(window, *args, **kwargs):
+            init(window, *args, **kwargs)
+            profiler.attach(window)
+
+        @functools.wraps(destroy)
+        def destroy_(window):
+            profiler.detach(window)
+            destroy(window)
+
+        GameWindow.__init__, GameWindow.destroy = __init__, destroy_
+        self._patched += [(GameWindow, "__init__", init), (GameWindow, "destroy", destroy)]
+
+    # -- stall watchdog --------------------------------------------------
+
+    def beat(self) -> None:
+        """Heartbeat from the Tk thread; also closes a stall in progress."""
+        now = time.perf_counter()
+        with self._lock:
+            stall, self._stall = self._stall, None
+            self._last_beat = now
+            if stall is not None:
+                started, callback = stall
+                ms = (now - started) * 1000.0
+                self.stalls.append((started - self._t0, ms, callback))
+                self.histogram("stall").record(ms)
+
+    def _watch(self) -> None:
+        period = self.stall_ms / 4000.0
+        while not self._stop.wait(period):
+            with self._lock:
+                last = self._last_beat
+                if last is None or self._stall is not None:
+                    continue
+                if (time.perf_counter() - last) * 1000.0 > self.stall_ms:
+                    self._stall = (last, self._running_callback())
+
+    def _running_callback(self) -> str:
+        """Describe what the Tk thread is doing right now."""
+        parts = []
+        frame = sys._current_frames().get(self._tk_ident)
+        while frame is not None and len(parts) < 3:
+            code = frame.f_code
+            path = code.co_filename
+            if path.startswith(_ROOT) and os.path.basename(path) != "profiling.py":
+                parts.append(f"{os.path.basename(path)}:{code.co_name}")
+            frame = frame.f_back
+        if self._running:
+            parts.append("en " + self._running[-1])
+        return " < ".join(parts) or "desconocido"
+
+    # -- windows and overlay ---------------------------------------------
+
+    def attach(self, window) -> None:
+        """Start the heartbeat on ``window`` and add the overlay to its header."""
+        if window in self._windows:
+            return
+        overlay = None
+        header = getattr(window, "header", None)
+        if header is not None:
+            from tkinter import Label, LEFT
+            overlay = Label(header, fg="#94a3b8", bg="#0f172a", font=("Lato", 10))
+            overlay.pack(side=LEFT, padx=12)
+        self._windows[window] = (None, overlay)
+        self._tick(window)
+
+    def detach(self, window) -> None:
+        entry = self._windows.pop(window, None)
+        if entry is None:
+            return
+        job, _overlay = entry
+        if job is not None:
+            try:
+                window.after_cancel(job)
+            except Exception:
+                pass
+        if not self._windows:
+            with self._lock:
+                self._last_beat = None
+
+    def _tick(self, window, n: int = 0) -> None:
+        if window not in self._windows:
+            return
+        self.beat()
+        _job, overlay = self._windows[window]
+        if overlay is not None and n % (OVERLAY_REFRESH_MS // HEARTBEAT_MS) == 0:
+            overlay.config(text=self.overlay_text())
+        job = window.after(HEARTBEAT_MS, self._tick, window, n + 1)
+        self._windows[window] = (job, overlay)
+
+    def overlay_text(self) -> str:
+        parts = []
+        for name, label in (("on_card_click", "clic"), ("_redraw_images", "redibujo")):
+            hist = self.histograms.get(name)
+            if hist is not None and hist.count:
+                parts.append(f"{label} p95 {hist.percentile(0.95):.1f} ms")
+        parts.append(f"bloqueos {len(self.stalls)}")
+        return " · ".join(parts)
+
+    # -- export -----------------------------------------------------------
+
+    def report(self) -> str:
+        """Return histograms and stalls as tab-separated text."""
+        lines = ["metric\tcount\tmean_ms\tp50_ms\tp95_ms\tp99_ms\tmax_ms\tbuckets"]
+        for name in sorted(self.histograms):
+            h = self.histograms[name]
+            buckets = " ".join(f"<={edge:g}:{n}" for edge, n in h.buckets())
+            lines.append(f"{name}\t{h.count}\t{h.mean:.3f}\t{h.percentile(0.5):.3f}\t"
+                         f"{h.percentile(0.95):.3f}\t{h.percentile(0.99):.3f}\t{h.max:.3f}\t{buckets}")
+        lines.append("")
+        lines.append("stall_at_s\tduration_ms\tcallback")
+        with self._lock:
+            stalls = list(self.stalls)
+        for at, ms, callback in stalls:
+            lines.append(f"{at:.3f}\t{ms:.1f}\t{callback}")
+        # memory held by decoded sources and rendered cards
+        from image_cache import cache_stats
+        from image_sources import source_stats
+        lines.append("")
+        lines.append("store\tentries\tbytes\tmax_bytes")
+        for name, stats in (("sources", source_stats()), ("renders", cache_stats())):
+            entries = stats.get("decoded", stats.get("entries"))
+            lines.append(f"{name}\t{entries}\t{stats['bytes']}\t{stats['max_bytes']}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: Optional[str] = None) -> str:
+        """Write the report to ``path`` (default: the file given to enable)."""
+        path = path or self.out_path or DEFAULT_PROFILE_FILE
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.report())
+        return path
+
+    def _dump_at_exit(self) -> None:
+        try:
+            self.dump()
+        except OSError:
+            pass
+
+
+def enable_from_env(path: Optional[str] = None) -> bool:
+    """Enable PROFILER if ``path`` or MEMORAMA_PROFILE asks for it.
+
+    ``MEMORAMA_PROFILE=1`` writes to ``profile.tsv``; any other value is the
+    output file.
+    """
+    path = path or os.environ.get(PROFILE_ENV)
+    if not path or path == "0":
+        return False
+    PROFILER.enable(DEFAULT_PROFILE_FILE if path == "1" else path)
+    return True
+
+
+# shared by every window of the process
+PROFILER = Profiler()
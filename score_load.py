@@ -0,0 +1,142 @@
+"""
+score_load.py
+
+Load generator for score_server.py.
+
+Simulates a lab of clients on localhost: every client opens one connection
+and sends a mix of score writes and leaderboard queries, as the game does at
+the end of each match. Reports throughput, latency percentiles per request
+type and how many writes each group commit carried.
+
+Without ``--address`` a server is started in-process on a temporary scores
+file, so the numbers are not mixed with real scores::
+
+    python score_load.py --clients 300 --requests 50
+    python score_load.py --address /path/scores.sock --write-ratio 0.5
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+from scores import DIFFICULTIES
+from score_server import ScoreServer, _fields, _line, parse_address
+
+
+async def _open(address: str) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    target = parse_address(address)
+    if isinstance(target, tuple):
+        return await asyncio.open_connection(*target)
+    return await asyncio.open_unix_connection(target)
+
+
+async def _call(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, *fields) -> List[str]:
+    writer.write(_line(*fields))
+    head = _fields(await reader.readline())
+    if head[0] == "R":
+        for _ in range(int(head[1])):
+            await reader.readline()
+    elif head[0] == "E":
+        raise RuntimeError(head[1])
+    return head
+
+
+async def _client(address: str, n: int, requests: int, write_ratio: float,
+                  latencies: Dict[str, List[float]], seed: int) -> None:
+    rng = random.Random(seed)
+    reader, writer = await _open(address)
+    name = f"carga{n:04d}"
+    try:
+        for _ in range(requests):
+            difficulty = rng.choice(DIFFICULTIES)
+            roll = rng.random()
+            start = time.perf_counter()
+            if roll < write_ratio:
+                kind = "escritura"
+                await _call(reader, writer, "W", name, rng.randrange(100, 1000), difficulty)
+            elif roll < write_ratio + (1 - write_ratio) / 2:
+                kind = "top 10"
+                await _call(reader, writer, "Q", difficulty, "", "score", 1, 0, 10)
+            else:
+                kind = "posición"
+                await _call(reader, writer, "K", name, difficulty)
+            latencies[kind].append((time.perf_counter() - start) * 1000)
+    finally:
+        writer.close()
+
+
+def _percentile(sorted_ms: List[float], q: float) -> float:
+    if not sorted_ms:
+        return 0.0
+    return sorted_ms[min(len(sorted_ms) - 1, int(q / 100 * len(sorted_ms)))]
+
+
+async def run(address: str, clients: int, requests: int, write_ratio: float, seed: int = 0) -> dict:
+    """Run the load against ``address``; returns the measured numbers."""
+    latencies: Dict[str, List[float]] = {"escritura": [], "top 10": [], "posición": []}
+    reader, writer = await _open(address)
+    before = [int(v) for v in (await _call(reader, writer, "S"))[1:3]]
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(address, n, requests, write_ratio, latencies, seed + n)
+                           for n in range(clients)))
+    elapsed = time.perf_counter() - start
+    after = [int(v) for v in (await _call(reader, writer, "S"))[1:3]]
+    writer.close()
+    writes, commits = after[0] - before[0], after[1] - before[1]
+    return {
+        "requests": sum(len(v) for v in latencies.values()),
+        "seconds": elapsed,
+        "latencies": {k: sorted(v) for k, v in latencies.items()},
+        "writes": writes,
+        "commits": commits,
+    }
+
+
+def _report(result: dict, clients: int) -> None:
+    total, elapsed = result["requests"], result["seconds"]
+    print(f"{clients} clientes, {total} peticiones en {elapsed:.2f}s ({total / max(elapsed, 1e-9):.0f}/s)")
+    for kind, ms in result["latencies"].items():
+        if ms:
+            print(f"  {kind:<10} n={len(ms):<7} p50={_percentile(ms, 50):7.2f} ms  "
+                  f"p95={_percentile(ms, 95):7.2f} ms  p99={_percentile(ms, 99):7.2f} ms")
+    if result["commits"]:
+        print(f"  {result['writes']} escrituras en {result['commits']} transacciones "
+              f"({result['writes'] / result['commits']:.1f} por transacción)")
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Genera carga contra el servidor de puntajes.")
+    parser.add_argument("--address", default=None,
+                        help="servidor a probar (por defecto se inicia uno con puntajes temporales)")
+    parser.add_argument("--clients", type=int, default=200, help="clientes simultáneos")
+    parser.add_argument("--requests", type=int, default=50, help="peticiones por cliente")
+    parser.add_argument("--write-ratio", type=float, default=0.2, help="fracción de peticiones que escriben")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    async def go():
+        if args.address:
+            return await run(args.address, args.clients, args.requests, args.write_ratio, args.seed)
+        with tempfile.TemporaryDirectory() as tmp:
+            address = os.path.join(tmp, "scores.sock") if hasattr(asyncio, "start_unix_server") else "127.0.0.1:0"
+            server = ScoreServer(os.path.join(tmp, "scores.json"))
+            await server.start(address)
+            if address.endswith(":0"):
+                host, port = server._server.sockets[0].getsockname()[:2]
+                address = f"{host}:{port}"
+            try:
+                return await run(address, args.clients, args.requests, args.write_ratio, args.seed)
+            finally:
+                await server.close()
+
+    _report(asyncio.run(go()), args.clients)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
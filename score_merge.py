@@ -0,0 +1,321 @@
+"""
+score_merge.py
+
+Merges score files collected from many machines into one.
+
+Every input may be a list-format ``scores.json`` (see ``scores._save_scores``)
+or the legacy ``{name: score}`` dict written by json.py. The result keeps the
+best score per (name, difficulty), as ``scores.write_score`` does, and is
+written once, in the list format, sorted by name and difficulty.
+
+Memory stays bounded however many files there are: inputs are parsed
+incrementally, one entry at a time, and whenever more than ``max_entries``
+distinct players are held the best scores so far are written out as a sorted
+run. The runs are merged at the end, in the same pass that writes the output.
+
+Example:
+    python score_merge.py laboratorio/*.json --output scores.json
+"""
+from __future__ import annotations
+
+import argparse
+import heapq
+import itertools
+import os
+import re
+import sys
+import tempfile
+from typing import IO, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from scores import _normalize_difficulty
+from score_server import _fields, _line
+
+# characters read from an input at a time
+CHUNK_SIZE = 1 << 16
+# distinct (name, difficulty) pairs held before spilling a sorted run
+MAX_ENTRIES = 200_000
+# runs merged at once; more are merged in several rounds
+MAX_FANIN = 64
+
+# (name, difficulty), score
+Entry = Tuple[Tuple[str, str], int]
+
+_STRING = r'"(?:[^"\\]|\\.)*"'
+_SCALAR = _STRING + r'|-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?|true|false|null'
+_MEMBER = rf'\s*{_STRING}\s*:\s*(?:{_SCALAR})\s*'
+# a score entry is one match: an object holding only scalars
+_FLAT_OBJECT = rf'\{{(?:{_MEMBER}(?:,{_MEMBER})*|\s*)\}}'
+_TOKEN = re.compile(rf'\s*(?:(?P<object>{_FLAT_OBJECT})|(?P<scalar>{_SCALAR})|(?P<punct>[{{}}\[\]:,]))')
+# before the list starts: a legacy {name: score} file must not be one token
+_FIRST_TOKEN = re.compile(rf'\s*(?:(?P<scalar>{_SCALAR})|(?P<punct>[{{}}\[\]:,]))')
+_PAIR = re.compile(rf'({_STRING})\s*:\s*({_SCALAR})')
+_JSON_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+_ESCAPE = re.compile(r"\\(u[0-9a-fA-F]{4}|.)")
+_NEEDS_ESCAPE = re.compile(r'["\\\x00-\x1f]')
+_LITERALS = {"true": True, "false": False, "null": None}
+
+
+class MergeResult(NamedTuple):
+    files: int
+    entries: int  # read from the inputs
+    written: int  # distinct (name, difficulty) pairs in the output
+    runs: int  # sorted runs spilled to disk
+
+
+def _unescape(s: str) -> str:
+    if "\\" not in s:
+        return s
+
+    def sub(m):
+        esc = m.group(1)
+        if esc[0] == "u":
+            return chr(int(esc[1:], 16))
+        return _JSON_ESCAPES.get(esc, esc)
+    # \\u escapes of astral characters come as surrogate pairs
+    return _ESCAPE.sub(sub, s).encode("utf-16", "surrogatepass").decode("utf-16")
+
+
+def _scalar(text: str):
+    if text[0] == '"':
+        return _unescape(text[1:-1])
+    if text in _LITERALS:
+        return _LITERALS[text]
+    return int(text) if text.lstrip("-").isdigit() else float(text)
+
+
+def _tokens(f: IO[str], chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[str, object]]:
+    """Yield the JSON tokens of a text file as (kind, value), reading it in chunks.
+
+    ``kind`` is the punctuation character itself, or "v" for a value: a
+    scalar or, inside a list, a whole object of scalars, which is how score
+    entries look, so most entries cost a single match.
+    """
+    buf, pos, offset, eof = "", 0, 0, False
+    token = _FIRST_TOKEN
+    while True:
+        m = token.match(buf, pos)
+        # a token at the end of the buffer may go on in the next chunk; a
+        # number too if the chunk ends in its "e+" or "." ("1e+" matches "1")
+        if m is None or (not eof and len(buf) - m.end() < (1 if m.lastgroup != "scalar" else 3)):
+            if eof:
+                if buf[pos:].strip():
+                    raise ValueError(f"JSON inválido en la posición {offset + pos}")
+                return
+            chunk = f.read(chunk_size)
+            offset += pos
+            buf, pos, eof = buf[pos:] + chunk, 0, not chunk
+            continue
+        pos = m.end()
+        kind = m.lastgroup
+        if kind == "object":
+            yield "v", {_unescape(k[1:-1]): _scalar(v) for k, v in _PAIR.findall(m.group(kind))}
+        elif kind == "scalar":
+            yield "v", _scalar(m.group(kind))
+        else:
+            yield m.group(kind), None
+            if m.group(kind) == "[":
+                token = _TOKEN
+
+
+def _next(tokens: Iterator[Tuple[str, object]]) -> Tuple[str, object]:
+    try:
+        return next(tokens)
+    except StopIteration:
+        raise ValueError("JSON incompleto") from None
+
+
+def _value(tokens: Iterator[Tuple[str, object]], token: Tuple[str, object]):
+    # one whole value starting at ``token``; used for single entries only
+    kind, value = token
+    if kind == "v":
+        return value
+    if kind == "[":
+        items = []
+        token = _next(tokens)
+        while token[0] != "]":
+            items.append(_value(tokens, token))
+            token = _next(tokens)
+            if token[0] == ",":
+                token = _next(tokens)
+        return items
+    if kind == "{":
+        obj = {}
+        token = _next(tokens)
+        while token[0] != "}":
+            key = token[1]
+            if token[0] != "v" or not isinstance(key, str) or _next(tokens)[0] != ":":
+                raise ValueError("objeto JSON inválido")
+            obj[key] = _value(tokens, _next(tokens))
+            token = _next(tokens)
+            if token[0] == ",":
+                token = _next(tokens)
+        return obj
+    raise ValueError(f"símbolo inesperado: {kind}")
+
+
+def _entry(name, score, difficulty) -> Optional[Entry]:
+    if name is None:
+        return None
+    try:
+        name, score = str(name), int(score)
+    except (TypeError, ValueError, OverflowError):  # 1e999 parses as inf
+        return None
+    if not name:
+        return None
+    return (name, _normalize_difficulty(str(difficulty or "dificil"))), score
+
+
+def iter_entries(f: IO[str], chunk_size: int = CHUNK_SIZE) -> Iterator[Entry]:
+    """Yield the entries of an open score file in either format, one at a time.
+
+    Entries ``_load_scores`` would drop (no name, no numeric score) are
+    skipped. Raises ValueError if the file is not valid JSON.
+    """
+    tokens = _tokens(f, chunk_size)
+    try:
+        start = next(tokens)
+    except StopIteration:
+        return  # empty file
+    kind = start[0]
+    if kind not in ("[", "{"):
+        _value(tokens, start)
+        return
+    close = "]" if kind == "[" else "}"
+    token = _next(tokens)
+    while token[0] != close:
+        if kind == "[":
+            item = _value(tokens, token)
+            entry = _entry(item.get("name"), item.get("score"), item.get("difficulty")) \
+                if isinstance(item, dict) else None
+        else:
+            # legacy {name: score}, always 'dificil'
+            if token[0] != "v" or _next(tokens)[0] != ":":
+                raise ValueError("objeto JSON inválido")
+            entry = _entry(token[1], _value(tokens, _next(tokens)), "dificil")
+        if entry is not None:
+            yield entry
+        token = _next(tokens)
+        if token[0] == ",":
+            token = _next(tokens)
+
+
+def _write_run(entries: Iterable[Entry], directory: str) -> str:
+    fd, path = tempfile.mkstemp(prefix="run_", suffix=".tsv", dir=directory)
+    with os.fdopen(fd, "wb") as f:
+        for (name, difficulty), score in entries:
+            f.write(_line(name, difficulty, score))
+    return path
+
+
+def _read_run(path: str) -> Iterator[Entry]:
+    with open(path, "rb") as f:
+        for raw in f:
+            name, difficulty, score = _fields(raw)
+            yield (name, difficulty), int(score)
+
+
+def _best(merged: Iterable[Entry]) -> Iterator[Entry]:
+    # sorted entries -> the maximum of every run of equal keys
+    for key, group in itertools.groupby(merged, key=lambda e: e[0]):
+        yield key, max(score for _key, score in group)
+
+
+def _merge_runs(runs: List[str], directory: str) -> List[str]:
+    # fewer, longer runs until they can all be open at once
+    while len(runs) > MAX_FANIN:
+        batch, runs = runs[:MAX_FANIN], runs[MAX_FANIN:]
+        merged = heapq.merge(*(_read_run(p) for p in batch), key=lambda e: e[0])
+        runs.append(_write_run(_best(merged), directory))
+        for path in batch:
+            os.remove(path)
+    return runs
+
+
+def _json_escape(m) -> str:
+    c = m.group()
+    return "\\" + c if c in '"\\' else f"\\u{ord(c):04x}"
+
+
+def _json_string(s: str) -> str:
+    return '"' + _NEEDS_ESCAPE.sub(_json_escape, s) + '"'
+
+
+def _write_output(entries: Iterable[Entry], path: str) -> int:
+    # same layout as scores._save_scores, written entry by entry and renamed
+    # over the target only once complete
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=".scores_", suffix=".tmp", dir=directory)
+    written = 0
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write("[")
+            for (name, difficulty), score in entries:
+                f.write(",\n  {\n" if written else "\n  {\n")
+                f.write(f'    "name": {_json_string(name)},\n    "score": {score},\n'
+                        f'    "difficulty": {_json_string(difficulty)}\n  }}')
+                written += 1
+            f.write("\n]" if written else "]")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    return written
+
+
+def merge_scores(paths: Iterable[str], output: str, max_entries: int = MAX_ENTRIES,
+                 chunk_size: int = CHUNK_SIZE) -> MergeResult:
+    """Merge score files into ``output``, keeping the best score per (name, difficulty).
+
+    ``output`` may be one of the inputs; it is replaced only after every
+    input has been read. Raises ValueError naming the first invalid input.
+    """
+    best = {}
+    files = entries = 0
+    runs: List[str] = []
+    with tempfile.TemporaryDirectory(prefix="memorama_merge_") as tmp:
+        for path in paths:
+            files += 1
+            with open(path, "r", encoding="utf-8") as f:
+                try:
+                    for key, score in iter_entries(f, chunk_size):
+                        entries += 1
+                        old = best.get(key)
+                        if old is None or score > old:
+                            best[key] = score
+                            if len(best) >= max_entries:
+                                runs.append(_write_run(sorted(best.items()), tmp))
+                                best.clear()
+                except ValueError as e:
+                    raise ValueError(f"{path}: {e}") from None
+        spilled = len(runs)
+        runs = _merge_runs(runs, tmp)
+        merged = heapq.merge(*(_read_run(p) for p in runs), sorted(best.items()), key=lambda e: e[0])
+        written = _write_output(_best(merged), output)
+    return MergeResult(files, entries, written, spilled)
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Combina archivos de puntajes conservando el mejor de cada jugador.")
+    parser.add_argument("files", nargs="+", help="archivos de puntajes (lista o diccionario antiguo)")
+    parser.add_argument("--output", "-o", required=True, help="archivo combinado (puede ser uno de los de entrada)")
+    parser.add_argument("--max-entries", type=int, default=MAX_ENTRIES,
+                        help="jugadores en memoria antes de ordenar en disco")
+    args = parser.parse_args(argv)
+    try:
+        result = merge_scores(args.files, args.output, max(1, args.max_entries))
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    print(f"{result.files} archivos, {result.entries} puntajes leídos, "
+          f"{result.written} guardados en {args.output}"
+          + (f" ({result.runs} tramos en disco)" if result.runs else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,110 @@
+"""
+score_queue.py
+
+Write-behind queue for finished games.
+
+A GameWindow hands its score to ``SCORE_WRITER`` and returns to the event
+loop at once; a background thread writes it with ``scores.write_score``,
+retrying with backoff when the store is busy or the disk is slow, and then
+looks up the player's standing for the win popup. Pending scores are flushed
+when a game window closes and again at interpreter exit.
+"""
+from __future__ import annotations
+
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import NamedTuple, Optional
+
+import scores
+from scores import RankInfo, SCORES_FILE
+
+# attempts after the first one, and the wait before the first retry (doubled each time)
+RETRIES = 4
+RETRY_BACKOFF = 0.1
+# longest wait for pending scores when the program exits
+EXIT_FLUSH_TIMEOUT = 5.0
+
+
+class SaveResult(NamedTuple):
+    saved: bool
+    standing: Optional[RankInfo]  # None if the ranking could not be read
+    error: Optional[str] = None
+
+
+class ScoreWriter:
+    """Persists scores on a background thread.
+
+    Args:
+        retries (int): Retries of a failed write before giving up.
+        backoff (float): Seconds before the first retry.
+    """
+
+    def __init__(self, retries: int = RETRIES, backoff: float = RETRY_BACKOFF):
+        self.retries = retries
+        self.backoff = backoff
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._idle = threading.Condition()
+        self._pending = 0
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="memorama-scores", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush, EXIT_FLUSH_TIMEOUT)
+
+    def submit(self, name: str, score: int, difficulty: str, path: str = SCORES_FILE) -> "Future[SaveResult]":
+        """Queue a score; the returned future resolves once it is on disk (or given up)."""
+        future: "Future[SaveResult]" = Future()
+        with self._idle:
+            self._pending += 1
+        self._start()
+        self._queue.put((name, score, difficulty, path, future))
+        return future
+
+    def pending(self) -> int:
+        with self._idle:
+            return self._pending
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued score was handled; return False on timeout."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def _save(self, name: str, score: int, difficulty: str, path: str) -> SaveResult:
+        delay = self.backoff
+        for attempt in range(self.retries + 1):
+            try:
+                scores.write_score(name, score, difficulty, path=path)
+                break
+            except Exception as exc:
+                if attempt == self.retries:
+                    return SaveResult(False, None, str(exc) or type(exc).__name__)
+                time.sleep(delay)
+                delay *= 2
+        try:
+            standing = scores.rank_for(name, difficulty, path=path)
+        except Exception:
+            standing = None  # the score is saved; only the ranking is missing
+        return SaveResult(True, standing)
+
+    def _run(self) -> None:
+        while True:
+            name, score, difficulty, path, future = self._queue.get()
+            try:
+                future.set_result(self._save(name, score, difficulty, path))
+            except Exception as exc:
+                future.set_result(SaveResult(False, None, str(exc)))
+            finally:
+                with self._idle:
+                    self._pending -= 1
+                    self._idle.notify_all()
+
+
+# shared by every GameWindow
+SCORE_WRITER = ScoreWriter()
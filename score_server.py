@@ -0,0 +1,497 @@
+"""
+score_server.py
+
+Optional score server for labs running many copies of the game.
+
+One asyncio process owns the scores database. It keeps the whole
+leaderboard in memory and answers queries from there, and it collects the
+writes of all clients into group commits: every write that arrives while a
+commit is being prepared goes into the same SQLite transaction. Writes made
+directly to the database by other processes (clients that fell back while
+the server was down) are noticed through ``PRAGMA data_version`` and
+reloaded.
+
+Clients use the ``server`` backend of scores.py (``ServerScoreStore``): one
+reused connection per process, and the SQLite file backend whenever the
+server cannot be reached.
+
+The protocol is one tab-separated request line per call, with ``\\t``,
+``\\n`` and ``\\`` escaped inside fields:
+
+    W name score difficulty                          -> OK
+    Q difficulty prefix order desc offset limit      -> R n, then n lines "name score difficulty"
+    C difficulty prefix                              -> N count
+    K name difficulty                                -> K best rank total percentile next_score next_rank | K -
+    S                                                -> S writes commits entries
+    errors                                           -> E message
+
+Example:
+    python score_server.py                       # Unix socket next to scores.json
+    MEMORAMA_SCORES_BACKEND=server python main.py
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import bisect
+import os
+import re
+import socket
+import sys
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import scores
+from scores import RankInfo, ScoreEntry, ScoreRanks, SCORES_FILE, SORT_COLUMNS
+
+SERVER_ENV = "MEMORAMA_SCORES_SERVER"
+DEFAULT_TCP_ADDRESS = "127.0.0.1:47615"
+# how long the committer waits for more writes to join a transaction
+GROUP_COMMIT_MS = 2.0
+# how often the server looks for writes made by other processes
+RELOAD_INTERVAL = 1.0
+CLIENT_TIMEOUT = 5.0
+# after a failed connection, clients use the file backend this long
+RETRY_INTERVAL = 5.0
+# a whole lab connecting at once must not overflow the accept queue
+BACKLOG = 1024
+
+_UNESCAPES = {"t": "\t", "n": "\n", "r": "\r"}
+_ESCAPED = re.compile(r"\\(.)")
+
+
+def _esc(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def _unesc(s: str) -> str:
+    if "\\" not in s:
+        return s
+    return _ESCAPED.sub(lambda m: _UNESCAPES.get(m.group(1), m.group(1)), s)
+
+
+def _line(*fields) -> bytes:
+    return ("\t".join(_esc(str(f)) for f in fields) + "\n").encode("utf-8")
+
+
+def _fields(raw: bytes) -> List[str]:
+    return [_unesc(f) for f in raw.decode("utf-8").rstrip("\n").split("\t")]
+
+
+def default_address(path: str = SCORES_FILE) -> str:
+    """Server address for a scores file: MEMORAMA_SCORES_SERVER or a socket next to it."""
+    address = os.environ.get(SERVER_ENV)
+    if address:
+        return address
+    if not hasattr(socket, "AF_UNIX"):
+        return DEFAULT_TCP_ADDRESS
+    return os.path.splitext(os.path.abspath(path))[0] + ".sock"
+
+
+def parse_address(address: str) -> Tuple[str, int] | str:
+    """Return ``(host, port)`` for ``host:port`` and the path for a Unix socket."""
+    if os.sep not in address and ":" in address:
+        host, _, port = address.rpartition(":")
+        return host or "127.0.0.1", int(port)
+    return address
+
+
+class Leaderboard:
+    """Best score per (name, difficulty) with presorted orders.
+
+    Score-descending lists (all difficulties and each one) and the name
+    order are kept sorted on every upsert; other orders are sorted on demand
+    and cached until the next change.
+    """
+
+    def __init__(self, entries: Iterable[ScoreEntry] = ()):
+        self.bests: Dict[Tuple[str, str], int] = {}
+        for it in entries:
+            key = (it["name"], it["difficulty"])
+            if self.bests.get(key, it["score"] - 1) < it["score"]:
+                self.bests[key] = it["score"]
+        self._by_score: Dict[Optional[str], List[Tuple[int, str, str]]] = {None: []}
+        for (name, difficulty), score in self.bests.items():
+            self._by_score[None].append((-score, name, difficulty))
+            self._by_score.setdefault(difficulty, []).append((-score, name, difficulty))
+        for lst in self._by_score.values():
+            lst.sort()
+        self._by_name = sorted(self.bests)
+        counts: Dict[str, Dict[int, int]] = {}
+        for (_name, difficulty), score in self.bests.items():
+            by_score = counts.setdefault(difficulty, {})
+            by_score[score] = by_score.get(score, 0) + 1
+        self._ranks = {d: ScoreRanks(c) for d, c in counts.items()}
+        self._views: Dict[Tuple[Optional[str], str, bool], List[Tuple[int, str, str]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.bests)
+
+    def upsert(self, name: str, score: int, difficulty: str) -> bool:
+        """Keep ``score`` if it beats the stored one; returns whether it did."""
+        key = (name, difficulty)
+        old = self.bests.get(key)
+        if old is not None and old >= score:
+            return False
+        lists = (self._by_score[None], self._by_score.setdefault(difficulty, []))
+        ranks = self._ranks.setdefault(difficulty, ScoreRanks({}))
+        if old is None:
+            bisect.insort(self._by_name, key)
+        else:
+            for lst in lists:
+                del lst[bisect.bisect_left(lst, (-old, name, difficulty))]
+            ranks.add(old, -1)
+        for lst in lists:
+            bisect.insort(lst, (-score, name, difficulty))
+        ranks.add(score)
+        self.bests[key] = score
+        self._views.clear()
+        return True
+
+    def _matching(self, difficulty: Optional[str], prefix: str, order_by: str,
+                  descending: bool) -> List[Tuple[int, str, str]]:
+        if order_by == "score" and descending:
+            rows = self._by_score.get(difficulty or None, [])
+        elif order_by == "name":
+            lo = bisect.bisect_left(self._by_name, (prefix,))
+            hi = bisect.bisect_left(self._by_name, (prefix + "\U0010ffff",)) if prefix else len(self._by_name)
+            names = self._by_name[lo:hi]
+            if descending:
+                names.reverse()
+            return [(-self.bests[k], k[0], k[1]) for k in names if not difficulty or k[1] == difficulty]
+        else:
+            view_key = (difficulty or None, order_by, descending)
+            rows = self._views.get(view_key)
+            if rows is None:
+                rows = list(self._by_score.get(difficulty or None, []))
+                if order_by == "score":
+                    rows.sort(key=lambda r: (-r[0], r[1]))
+                else:
+                    # difficulty order; score descending and name inside each
+                    rows.sort(key=lambda r: r[2], reverse=descending)
+                self._views[view_key] = rows
+        if prefix:
+            rows = [r for r in rows if r[1].startswith(prefix)]
+        return rows
+
+    def query(self, difficulty: Optional[str] = None, name_prefix: str = "", order_by: str = "score",
+              descending: bool = True, offset: int = 0, limit: int = 50) -> List[ScoreEntry]:
+        rows = self._matching(difficulty, name_prefix, order_by, descending)
+        return [{"name": n, "score": -neg, "difficulty": d} for neg, n, d in rows[offset:offset + limit]]
+
+    def count(self, difficulty: Optional[str] = None, name_prefix: str = "") -> int:
+        if not name_prefix:
+            return len(self._by_score.get(difficulty or None, []))
+        return len(self._matching(difficulty, name_prefix, "name", False))
+
+    def rank(self, name: str, difficulty: str) -> Optional[RankInfo]:
+        best = self.bests.get((name, difficulty))
+        if best is None:
+            return None
+        return self._ranks[difficulty].info(best)
+
+
+class ScoreServer:
+    """Asyncio front of one SQLite score store.
+
+    Args:
+        path (str): Scores file; the database next to it is used.
+        group_ms (float): Extra wait for writes to join a group commit.
+    """
+
+    def __init__(self, path: str = SCORES_FILE, group_ms: float = GROUP_COMMIT_MS):
+        self.path = path
+        self.group_ms = group_ms
+        self.store = scores._open_sqlite(path)
+        self.board = Leaderboard()
+        self.writes = 0
+        self.commits = 0
+        self._pending: List[Tuple[str, int, str, asyncio.Future]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        # held by a reload from its snapshot to the swap, and by a commit
+        # from the write to the board update, so no commit lands in a board
+        # that is about to be replaced
+        self._board_lock: Optional[asyncio.Lock] = None
+        self._version = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+    async def _reload(self) -> None:
+        async with self._board_lock:
+            self._version = await self._run(self.store.data_version)
+            self.board = Leaderboard(await self._run(self.store.all))
+
+    async def start(self, address: str) -> None:
+        """Load the leaderboard and start listening on ``address``."""
+        self._wakeup = asyncio.Event()
+        self._board_lock = asyncio.Lock()
+        await self._reload()
+        target = parse_address(address)
+        if isinstance(target, tuple):
+            self._server = await asyncio.start_server(self._serve, *target, backlog=BACKLOG)
+        else:
+            if os.path.exists(target):
+                try:
+                    with socket.socket(socket.AF_UNIX) as probe:
+                        probe.connect(target)
+                except OSError:
+                    os.remove(target)  # left behind by a server that died
+                else:
+                    raise RuntimeError(f"ya hay un servidor de puntajes en {target}")
+            self._server = await asyncio.start_unix_server(self._serve, target, backlog=BACKLOG)
+        self._tasks = [asyncio.ensure_future(self._committer()), asyncio.ensure_future(self._watch())]
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self._commit()  # whatever is still queued
+        self.store.close()
+
+    async def _committer(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            if self.group_ms:
+                await asyncio.sleep(self.group_ms / 1000.0)
+            await self._commit()
+
+    async def _commit(self) -> None:
+        batch, self._pending = self._pending, []
+        self._wakeup.clear()
+        if not batch:
+            return
+        rows = [(name, score, difficulty) for name, score, difficulty, _fut in batch]
+        async with self._board_lock:
+            try:
+                await self._run(self.store.upsert_many, rows)
+            except Exception as exc:
+                for *_row, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(exc)
+                return
+            self.commits += 1
+            self.writes += len(batch)
+            for name, score, difficulty, _fut in batch:
+                self.board.upsert(name, score, difficulty)
+        for *_row, fut in batch:
+            if not fut.done():
+                fut.set_result(None)
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(RELOAD_INTERVAL)
+            if await self._run(self.store.data_version) != self._version:
+                await self._reload()
+
+    async def write(self, name: str, score: int, difficulty: str) -> None:
+        """Queue a write and wait until its group commit is durable."""
+        fut = asyncio.get_running_loop().create_future()
+        self._pending.append((name, score, difficulty, fut))
+        self._wakeup.set()
+        await fut
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    break
+                try:
+                    reply = await self._dispatch(_fields(raw))
+                except Exception as exc:
+                    reply = _line("E", exc)
+                writer.write(reply)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, f: List[str]) -> bytes:
+        op = f[0]
+        board = self.board
+        if op == "W":
+            name, score, difficulty = f[1], int(f[2]), scores._normalize_difficulty(f[3])
+            if name:
+                await self.write(name, score, difficulty)
+            return b"OK\n"
+        if op == "Q":
+            difficulty, prefix, order_by = f[1] or None, f[2], f[3]
+            if order_by not in SORT_COLUMNS:
+                raise ValueError(f"columna de orden desconocida: {order_by}")
+            rows = board.query(difficulty, prefix, order_by, f[4] == "1", max(0, int(f[5])), max(0, int(f[6])))
+            return _line("R", len(rows)) + b"".join(_line(r["name"], r["score"], r["difficulty"]) for r in rows)
+        if op == "C":
+            return _line("N", board.count(f[1] or None, f[2]))
+        if op == "K":
+            info = board.rank(f[1], scores._normalize_difficulty(f[2]))
+            if info is None:
+                return b"K\t-\n"
+            return _line("K", info.best, info.rank, info.total, info.percentile,
+                         "" if info.next_score is None else info.next_score,
+                         "" if info.next_rank is None else info.next_rank)
+        if op == "S":
+            return _line("S", self.writes, self.commits, len(board))
+        raise ValueError(f"petición desconocida: {op}")
+
+
+class ServerScoreStore:
+    """Client of a ScoreServer, used as the ``server`` backend of scores.py.
+
+    One connection is opened on first use and reused by every call of the
+    process. When the server cannot be reached, calls go to the SQLite file
+    backend instead, and the server is not tried again for RETRY_INTERVAL
+    seconds.
+
+    Args:
+        path (str): Scores file, used by the fallback backend.
+        address (str, optional): Server address; see ``default_address``.
+    """
+
+    def __init__(self, path: str = SCORES_FILE, address: Optional[str] = None):
+        self.path = path
+        self.address = address or default_address(path)
+        self._sock: Optional[socket.socket] = None
+        self._file = None
+        self._lock = threading.Lock()
+        self._down_until = 0.0
+
+    def _connect(self) -> None:
+        target = parse_address(self.address)
+        if isinstance(target, tuple):
+            sock = socket.create_connection(target, timeout=CLIENT_TIMEOUT)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        else:
+            sock = socket.socket(socket.AF_UNIX)
+            sock.settimeout(CLIENT_TIMEOUT)
+            try:
+                sock.connect(target)
+            except OSError:
+                sock.close()
+                raise
+        self._sock = sock
+        self._file = sock.makefile("rb")
+
+    def _disconnect(self) -> None:
+        for closable in (self._file, self._sock):
+            if closable is not None:
+                try:
+                    closable.close()
+                except OSError:
+                    pass
+        self._sock = self._file = None
+
+    def _roundtrip(self, request: bytes) -> List[List[str]]:
+        if self._sock is None:
+            self._connect()
+        self._sock.sendall(request)
+        head = self._file.readline()
+        if not head:
+            raise ConnectionError("el servidor cerró la conexión")
+        first = _fields(head)
+        lines = [first]
+        if first[0] == "R":
+            for _ in range(int(first[1])):
+                lines.append(_fields(self._file.readline()))
+        return lines
+
+    def _request(self, *fields) -> Optional[List[List[str]]]:
+        """Send one request; None means the server is unreachable."""
+        with self._lock:
+            if time.monotonic() < self._down_until:
+                return None
+            request = _line(*fields)
+            for attempt in (1, 2):
+                try:
+                    lines = self._roundtrip(request)
+                    break
+                except OSError:
+                    # a restarted server drops reused connections: retry once
+                    self._disconnect()
+                    if attempt == 2:
+                        self._down_until = time.monotonic() + RETRY_INTERVAL
+                        return None
+        if lines[0][0] == "E":
+            raise ValueError(lines[0][1])
+        return lines
+
+    def _fallback(self):
+        return scores.get_store(self.path, "sqlite")
+
+    def upsert(self, name: str, score: int, difficulty: str) -> None:
+        if self._request("W", name, score, difficulty) is None:
+            self._fallback().upsert(name, score, difficulty)
+
+    def all(self) -> List[ScoreEntry]:
+        count = self.count()
+        return self.query(limit=count)
+
+    def query(self, difficulty: str | None = None, name_prefix: str = "", order_by: str = "score",
+              descending: bool = True, offset: int = 0, limit: int = 50) -> List[ScoreEntry]:
+        lines = self._request("Q", difficulty or "", name_prefix, order_by, int(descending), offset, limit)
+        if lines is None:
+            return self._fallback().query(difficulty, name_prefix, order_by, descending, offset, limit)
+        return [{"name": n, "score": int(sc), "difficulty": d} for n, sc, d in lines[1:]]
+
+    def count(self, difficulty: str | None = None, name_prefix: str = "") -> int:
+        lines = self._request("C", difficulty or "", name_prefix)
+        if lines is None:
+            return self._fallback().count(difficulty, name_prefix)
+        return int(lines[0][1])
+
+    def rank(self, name: str, difficulty: str) -> RankInfo | None:
+        lines = self._request("K", name, difficulty)
+        if lines is None:
+            return self._fallback().rank(name, difficulty)
+        f = lines[0]
+        if f[1] == "-":
+            return None
+        return RankInfo(int(f[1]), int(f[2]), int(f[3]), float(f[4]),
+                        int(f[5]) if f[5] else None, int(f[6]) if f[6] else None)
+
+    def stats(self) -> Optional[Tuple[int, int, int]]:
+        """Return the server's (writes, commits, entries), or None if it is down."""
+        lines = self._request("S")
+        return None if lines is None else tuple(int(v) for v in lines[0][1:4])
+
+    def close(self) -> None:
+        with self._lock:
+            self._disconnect()
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Servidor local de puntajes del memorama.")
+    parser.add_argument("--scores", default=SCORES_FILE, help="archivo de puntajes (la base SQLite va al lado)")
+    parser.add_argument("--address", default=None,
+                        help="socket Unix o host:puerto (por defecto MEMORAMA_SCORES_SERVER o <puntajes>.sock)")
+    parser.add_argument("--group-ms", type=float, default=GROUP_COMMIT_MS,
+                        help="espera para juntar escrituras en una transacción")
+    args = parser.parse_args(argv)
+    address = args.address or default_address(args.scores)
+
+    async def serve():
+        server = ScoreServer(args.scores, args.group_ms)
+        await server.start(address)
+        print(f"Servidor de puntajes en {address} ({len(server.board)} puntajes)", flush=True)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await server.close()
+            print(f"{server.writes} escrituras en {server.commits} transacciones")
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
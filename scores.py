@@ -2,15 +2,43 @@
 scores.py
 
 Simple utilities to persist and retrieve high scores for the memorama game.
+
+Scores are kept by a pluggable store. The default one is an indexed SQLite
+database next to ``scores.json`` that imports the JSON file (both the list
+format and the legacy ``{name: score}`` dict written by json.py) whenever it
+changes. Set ``MEMORAMA_SCORES_BACKEND=json`` to keep using the JSON file
+directly, or ``server`` to go through a running score_server.py.
+
+Which file a ``path`` ends up in depends on the backend:
+
+- ``sqlite``: ``sqlite_path(path)``, e.g. ``scores.sqlite3`` for
+  ``scores.json``; the JSON file is only read, never written.
+- ``json``: ``path`` itself.
+- ``server``: none locally; the server writes its own store.
+
+Stores are opened once per (backend, file) and shared; ``close_stores``
+closes them, and runs on its own at interpreter exit.
 """
 from __future__ import annotations
 
-from typing import Dict, List, TypedDict, Any
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, TypedDict, Any
+import atexit
+import bisect
 import sys
 import ast
 import os
+import sqlite3
+import tempfile
+import threading
 
 SCORES_FILE = "scores.json"
+SCORES_BACKEND = os.environ.get("MEMORAMA_SCORES_BACKEND", "sqlite")
+DIFFICULTIES = ("facil", "medio", "dificil")
+# seconds a writer waits for another process holding the store
+LOCK_TIMEOUT = 10.0
+# columns the leaderboard can be ordered by
+SORT_COLUMNS = ("score", "name", "difficulty")
 
 
 class ScoreEntry(TypedDict):
@@ -18,6 +46,20 @@ class ScoreEntry(TypedDict):
     score: int
     difficulty: str  # 'facil' | 'medio' | 'dificil'
 
+
+class RankInfo(NamedTuple):
+    """Where a player's best score stands within one difficulty."""
+    best: int
+    rank: int  # 1 + entries with a strictly higher score
+    total: int
+    percentile: float  # share of entries at or below ``best``, 0..100
+    next_score: Optional[int]  # lowest score above ``best``; None when first
+    next_rank: Optional[int]  # rank reached by tying ``next_score``
+
+    @property
+    def gap(self) -> Optional[int]:
+        return None if self.next_score is None else self.next_score - self.best
+
 # Try to import stdlib json; if shadowed by local json.py, fall back to a tiny parser
 try:
     import json as _json  # type: ignore
@@ -73,58 +115,541 @@ def _load_scores(path: str = SCORES_FILE) -> List[ScoreEntry]:
 
 
 def _save_scores(data: List[ScoreEntry], path: str = SCORES_FILE) -> None:
-    with open(path, "w", encoding="utf-8") as f:
-        if _json:
-            _json.dump(data, f, indent=2, ensure_ascii=False)
-        else:
-            # minimal JSON-like writer (sufficient for our simple list of dicts)
-            def _esc(s: str) -> str:
-                return s.replace('"', '\\"')
-            items = []
-            for it in data:
-                items.append(
-                    "  {\n" +
-                    f"    \"name\": \"{_esc(it['name'])}\",\n" +
-                    f"    \"score\": {int(it['score'])},\n" +
-                    f"    \"difficulty\": \"{_esc(it['difficulty'])}\"\n" +
-                    "  }"
-                )
-            f.write("[\n" + ",\n".join(items) + "\n]")
+    # write to a temp file in the same directory and rename it over the old
+    # one, so readers never see a half-written file
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=".scores_", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            _write_scores(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
 
 
-def write_score(name: str, score: int, difficulty: str = "dificil", path: str = SCORES_FILE) -> None:
-    """Write a score for a player.
+def _write_scores(data: List[ScoreEntry], f) -> None:
+    if _json:
+        _json.dump(data, f, indent=2, ensure_ascii=False)
+    else:
+        # minimal JSON-like writer (sufficient for our simple list of dicts)
+        def _esc(s: str) -> str:
+            return s.replace('"', '\\"')
+        items = []
+        for it in data:
+            items.append(
+                "  {\n" +
+                f"    \"name\": \"{_esc(it['name'])}\",\n" +
+                f"    \"score\": {int(it['score'])},\n" +
+                f"    \"difficulty\": \"{_esc(it['difficulty'])}\"\n" +
+                "  }"
+            )
+        f.write("[\n" + ",\n".join(items) + "\n]")
 
-    - Keep the highest per (player, difficulty).
-    - File is created if missing.
-    """
-    if not name:
-        return
+
+def _normalize_difficulty(difficulty: str) -> str:
     difficulty = (difficulty or "dificil").strip().lower()
-    if difficulty not in {"facil", "medio", "dificil"}:
+    if difficulty not in DIFFICULTIES:
         # normalize common inputs
         if difficulty in {"easy", "e", "4x4"}:
             difficulty = "facil"
-        elif difficulty in {"medium", "m", "5x5"}:
+        elif difficulty in {"medium", "m", "5x5", "5x6"}:
             difficulty = "medio"
         elif difficulty in {"hard", "h", "6x6"}:
             difficulty = "dificil"
         else:
             difficulty = "dificil"
+    return difficulty
 
-    data = _load_scores(path)
-    # find existing entry for same (name, difficulty)
-    found_idx = None
-    for i, it in enumerate(data):
-        if it["name"] == name and it["difficulty"] == difficulty:
-            found_idx = i
-            break
-    if found_idx is None:
-        data.append({"name": name, "score": int(score), "difficulty": difficulty})
-    else:
-        if int(score) > int(data[found_idx]["score"]):
-            data[found_idx]["score"] = int(score)
-    _save_scores(data, path)
+
+@contextmanager
+def _file_lock(path: str) -> Iterator[None]:
+    """Hold an exclusive cross-process lock on ``path`` (created if missing)."""
+    with open(path, "a+b") as f:
+        if sys.platform == "win32":
+            import msvcrt
+            import time
+            deadline = time.monotonic() + LOCK_TIMEOUT
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    if time.monotonic() > deadline:
+                        raise
+                    time.sleep(0.05)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class ScoreRanks:
+    """Order statistics of the scores of one difficulty.
+
+    Counts per distinct score live in a Fenwick tree, so ranks, percentiles
+    and the next score up cost O(log d) for d distinct scores (at most ~1000
+    with the engine's scoring), however many entries are stored.
+
+    Args:
+        counts (dict): Number of entries per score.
+    """
+
+    def __init__(self, counts: Dict[int, int]):
+        self._build({sc: n for sc, n in counts.items() if n > 0})
+
+    def _build(self, counts: Dict[int, int]) -> None:
+        self.values = sorted(counts)
+        self.total = sum(counts.values())
+        tree = [0] * (len(self.values) + 1)
+        for i, sc in enumerate(self.values, 1):
+            tree[i] += counts[sc]
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _counts(self) -> Dict[int, int]:
+        return {sc: self._prefix(i + 1) - self._prefix(i) for i, sc in enumerate(self.values)}
+
+    def _prefix(self, i: int) -> int:
+        # entries among the i lowest distinct scores
+        total = 0
+        tree = self._tree
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def add(self, score: int, delta: int = 1) -> None:
+        """Add (or with a negative ``delta``, remove) entries with ``score``."""
+        i = bisect.bisect_left(self.values, score)
+        if i == len(self.values) or self.values[i] != score:
+            # a new distinct score: rebuild, O(d)
+            counts = self._counts()
+            counts[score] = counts.get(score, 0) + delta
+            self._build({sc: n for sc, n in counts.items() if n > 0})
+            return
+        self.total += delta
+        i += 1
+        tree = self._tree
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def count_above(self, score: int) -> int:
+        return self.total - self._prefix(bisect.bisect_right(self.values, score))
+
+    def next_above(self, score: int) -> Optional[int]:
+        """Return the lowest stored score above ``score``, if any."""
+        target = self._prefix(bisect.bisect_right(self.values, score)) + 1
+        if target > self.total:
+            return None
+        # Fenwick descent: smallest position whose prefix reaches target
+        pos = 0
+        step = 1 << (len(self._tree) - 1).bit_length()
+        tree = self._tree
+        while step:
+            nxt = pos + step
+            if nxt < len(tree) and tree[nxt] < target:
+                pos = nxt
+                target -= tree[nxt]
+            step >>= 1
+        return self.values[pos]
+
+    def info(self, best: int) -> RankInfo:
+        above = self.count_above(best)
+        total = max(self.total, 1)
+        nxt = self.next_above(best)
+        return RankInfo(best, above + 1, self.total, 100.0 * (total - above) / total,
+                        nxt, None if nxt is None else self.count_above(nxt) + 1)
+
+
+class JsonScoreStore:
+    """Scores kept in the JSON file itself.
+
+    Every write rewrites the whole file, but under a cross-process lock file
+    and with an atomic rename, so concurrent writers no longer lose updates.
+    """
+
+    def __init__(self, path: str = SCORES_FILE):
+        self.path = path
+        self._lock_path = path + ".lock"
+        # (file signature, ranks by difficulty, best by (name, difficulty))
+        self._rank_cache: Tuple[Any, Dict[str, ScoreRanks], Dict[Tuple[str, str], int]] | None = None
+
+    def upsert(self, name: str, score: int, difficulty: str) -> None:
+        self.upsert_many([(name, score, difficulty)])
+
+    def upsert_many(self, rows: List[Tuple[str, int, str]]) -> None:
+        """Apply several ``(name, score, difficulty)`` upserts with one rewrite."""
+        with _file_lock(self._lock_path):
+            data = _load_scores(self.path)
+            by_key = {(it["name"], it["difficulty"]): it for it in data}
+            for name, score, difficulty in rows:
+                it = by_key.get((name, difficulty))
+                if it is None:
+                    it = by_key[(name, difficulty)] = {"name": name, "score": score, "difficulty": difficulty}
+                    data.append(it)
+                elif score > it["score"]:
+                    it["score"] = score
+            _save_scores(data, self.path)
+            self._index(data)
+
+    def _signature(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _index(self, data: List[ScoreEntry]):
+        # the whole file was just read anyway; index it for rank()
+        counts: Dict[str, Dict[int, int]] = {}
+        bests: Dict[Tuple[str, str], int] = {}
+        for it in data:
+            key = (it["name"], _normalize_difficulty(it["difficulty"]))
+            score, old = it["score"], bests.get(key)
+            if old is not None and old >= score:
+                continue
+            by_score = counts.setdefault(key[1], {})
+            if old is not None:
+                by_score[old] -= 1
+            bests[key] = score
+            by_score[score] = by_score.get(score, 0) + 1
+        self._rank_cache = (self._signature(), {d: ScoreRanks(c) for d, c in counts.items()}, bests)
+        return self._rank_cache
+
+    def rank(self, name: str, difficulty: str) -> RankInfo | None:
+        cache = self._rank_cache
+        if cache is None or cache[0] != self._signature():
+            cache = self._index(_load_scores(self.path))
+        _sig, ranks, bests = cache
+        best = bests.get((name, difficulty))
+        if best is None:
+            return None
+        return ranks[difficulty].info(best)
+
+    def all(self) -> List[ScoreEntry]:
+        data = _load_scores(self.path)
+        data.sort(key=lambda it: (-it["score"], it["name"]))
+        return data
+
+    def _filtered(self, difficulty: str | None, name_prefix: str) -> List[ScoreEntry]:
+        return [it for it in _load_scores(self.path)
+                if (not difficulty or it["difficulty"] == difficulty) and it["name"].startswith(name_prefix)]
+
+    def query(self, difficulty: str | None = None, name_prefix: str = "", order_by: str = "score",
+              descending: bool = True, offset: int = 0, limit: int = 50) -> List[ScoreEntry]:
+        # no index here: filter and sort the whole file
+        data = self._filtered(difficulty, name_prefix)
+        data.sort(key=lambda it: it["name"])
+        data.sort(key=lambda it: it[order_by], reverse=descending)
+        return data[offset:offset + limit]
+
+    def count(self, difficulty: str | None = None, name_prefix: str = "") -> int:
+        return len(self._filtered(difficulty, name_prefix))
+
+
+class SqliteScoreStore:
+    """Scores kept in an SQLite table keyed by (name, difficulty).
+
+    Upserts go through the primary-key B-tree (O(log n)) inside an immediate
+    transaction, which SQLite serializes across processes. A legacy JSON file
+    is imported on first use and again whenever it changes on disk.
+
+    Triggers keep the number of entries per (difficulty, score) in
+    ``score_counts``, so rank() loads a few hundred rows instead of scanning
+    the scores; the loaded ScoreRanks are kept until another connection
+    commits (``PRAGMA data_version``).
+
+    Args:
+        path (str): Database file.
+        legacy_path (str, optional): JSON scores file to migrate from.
+    """
+
+    def __init__(self, path: str, legacy_path: str | None = None):
+        self.path = path
+        self.legacy_path = legacy_path
+        self._legacy_sig = None  # signature of the last imported legacy file
+        self._ranks: Dict[str, ScoreRanks] = {}
+        self._data_version = None
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=LOCK_TIMEOUT, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS scores (
+                name TEXT NOT NULL,
+                difficulty TEXT NOT NULL,
+                score INTEGER NOT NULL,
+                PRIMARY KEY (name, difficulty)
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            -- presorted orders for the leaderboard; name order uses the primary key
+            CREATE INDEX IF NOT EXISTS scores_by_score ON scores (score DESC, name);
+            CREATE INDEX IF NOT EXISTS scores_by_difficulty ON scores (difficulty, score DESC, name);
+            -- entries per score, for ranks and percentiles
+            CREATE TABLE IF NOT EXISTS score_counts (
+                difficulty TEXT NOT NULL,
+                score INTEGER NOT NULL,
+                n INTEGER NOT NULL,
+                PRIMARY KEY (difficulty, score)
+            ) WITHOUT ROWID;
+            CREATE TRIGGER IF NOT EXISTS score_counts_insert AFTER INSERT ON scores BEGIN
+                INSERT INTO score_counts (difficulty, score, n) VALUES (NEW.difficulty, NEW.score, 1)
+                ON CONFLICT (difficulty, score) DO UPDATE SET n = n + 1;
+            END;
+            CREATE TRIGGER IF NOT EXISTS score_counts_update AFTER UPDATE OF score, difficulty ON scores BEGIN
+                UPDATE score_counts SET n = n - 1 WHERE difficulty = OLD.difficulty AND score = OLD.score;
+                INSERT INTO score_counts (difficulty, score, n) VALUES (NEW.difficulty, NEW.score, 1)
+                ON CONFLICT (difficulty, score) DO UPDATE SET n = n + 1;
+            END;
+            CREATE TRIGGER IF NOT EXISTS score_counts_delete AFTER DELETE ON scores BEGIN
+                UPDATE score_counts SET n = n - 1 WHERE difficulty = OLD.difficulty AND score = OLD.score;
+            END;
+            """
+        )
+        self._backfill_counts()
+
+    def _backfill_counts(self) -> None:
+        # databases created before score_counts existed are counted once
+        with self._transaction() as conn:
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'score_counts'").fetchone():
+                return
+            conn.execute("DELETE FROM score_counts")
+            conn.execute("INSERT INTO score_counts (difficulty, score, n) "
+                         "SELECT difficulty, score, COUNT(*) FROM scores GROUP BY difficulty, score")
+            conn.execute("INSERT INTO meta (key, value) VALUES ('score_counts', '1')")
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _legacy_signature(self) -> str | None:
+        if not self.legacy_path:
+            return None
+        try:
+            st = os.stat(self.legacy_path)
+        except OSError:
+            return None
+        return f"{st.st_mtime_ns}:{st.st_size}"
+
+    def _sync_legacy(self) -> None:
+        sig = self._legacy_signature()
+        if sig is None or sig == self._legacy_sig:
+            return
+        with self._transaction() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'legacy_sig'").fetchone()
+            self._legacy_sig = sig
+            if row and row[0] == sig:
+                return
+            rows = [(it["name"], _normalize_difficulty(it["difficulty"]), int(it["score"]))
+                    for it in _load_scores(self.legacy_path)]
+            self._upsert_many(conn, rows)
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('legacy_sig', ?)", (sig,))
+            self._ranks.clear()
+
+    @staticmethod
+    def _upsert_many(conn: sqlite3.Connection, rows: List[Tuple[str, str, int]]) -> None:
+        conn.executemany(
+            "INSERT INTO scores (name, difficulty, score) VALUES (?, ?, ?) "
+            "ON CONFLICT (name, difficulty) DO UPDATE SET score = excluded.score "
+            "WHERE excluded.score > scores.score",
+            rows,
+        )
+
+    def upsert(self, name: str, score: int, difficulty: str) -> None:
+        self.upsert_many([(name, score, difficulty)])
+
+    def upsert_many(self, rows: List[Tuple[str, int, str]]) -> None:
+        """Apply several ``(name, score, difficulty)`` upserts in one transaction."""
+        self._sync_legacy()
+        try:
+            with self._transaction() as conn:
+                for name, score, difficulty in rows:
+                    row = conn.execute("SELECT score FROM scores WHERE name = ? AND difficulty = ?",
+                                       (name, difficulty)).fetchone()
+                    self._upsert_many(conn, [(name, difficulty, score)])
+                    # our own commits do not change data_version: update loaded ranks
+                    ranks = self._ranks.get(difficulty)
+                    if ranks is not None and (row is None or score > row[0]):
+                        if row is not None:
+                            ranks.add(row[0], -1)
+                        ranks.add(score)
+        except BaseException:
+            self._ranks.clear()
+            raise
+
+    def data_version(self) -> int:
+        """Changes whenever another connection commits to the database."""
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def rank(self, name: str, difficulty: str) -> RankInfo | None:
+        self._sync_legacy()
+        with self._lock:
+            conn = self._conn
+            row = conn.execute("SELECT score FROM scores WHERE name = ? AND difficulty = ?",
+                               (name, difficulty)).fetchone()
+            if row is None:
+                return None
+            version = conn.execute("PRAGMA data_version").fetchone()[0]
+            if version != self._data_version:
+                # another connection wrote since the ranks were loaded
+                self._ranks.clear()
+                self._data_version = version
+            ranks = self._ranks.get(difficulty)
+            if ranks is None:
+                counts = conn.execute("SELECT score, n FROM score_counts WHERE difficulty = ? AND n > 0",
+                                      (difficulty,)).fetchall()
+                ranks = self._ranks[difficulty] = ScoreRanks(dict(counts))
+            return ranks.info(row[0])
+
+    def all(self) -> List[ScoreEntry]:
+        self._sync_legacy()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, score, difficulty FROM scores ORDER BY score DESC, name"
+            ).fetchall()
+        return [{"name": n, "score": sc, "difficulty": d} for n, sc, d in rows]
+
+    @staticmethod
+    def _where(difficulty: str | None, name_prefix: str) -> Tuple[str, List[Any]]:
+        clauses: List[str] = []
+        params: List[Any] = []
+        if difficulty:
+            clauses.append("difficulty = ?")
+            params.append(difficulty)
+        if name_prefix:
+            # a range instead of LIKE so the primary-key index is used
+            clauses.append("name >= ? AND name < ?")
+            params += [name_prefix, name_prefix + "\U0010ffff"]
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, difficulty: str | None = None, name_prefix: str = "", order_by: str = "score",
+              descending: bool = True, offset: int = 0, limit: int = 50) -> List[ScoreEntry]:
+        self._sync_legacy()
+        where, params = self._where(difficulty, name_prefix)
+        direction = "DESC" if descending else "ASC"
+        if order_by == "score":
+            order = f"score {direction}, name"
+        elif order_by == "name":
+            order = f"name {direction}, difficulty {direction}"
+        else:
+            order = f"difficulty {direction}, score DESC, name"
+        sql = f"SELECT name, score, difficulty FROM scores{where} ORDER BY {order} LIMIT ? OFFSET ?"
+        with self._lock:
+            rows = self._conn.execute(sql, params + [int(limit), int(offset)]).fetchall()
+        return [{"name": n, "score": sc, "difficulty": d} for n, sc, d in rows]
+
+    def count(self, difficulty: str | None = None, name_prefix: str = "") -> int:
+        self._sync_legacy()
+        where, params = self._where(difficulty, name_prefix)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM scores{where}", params).fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def sqlite_path(path: str) -> str:
+    """Return the database used for a scores file (``scores.json`` -> ``scores.sqlite3``)."""
+    if path.endswith((".sqlite3", ".sqlite", ".db")):
+        return path
+    return os.path.splitext(path)[0] + ".sqlite3"
+
+
+def _open_sqlite(path: str) -> SqliteScoreStore:
+    db = sqlite_path(path)
+    return SqliteScoreStore(db, legacy_path=None if db == path else path)
+
+
+def _open_server(path: str):
+    from score_server import ServerScoreStore
+    return ServerScoreStore(path)
+
+
+# backend name -> factory(path)
+BACKENDS: Dict[str, Any] = {
+    "sqlite": _open_sqlite,
+    "json": JsonScoreStore,
+    "server": _open_server,
+}
+
+_stores: Dict[Tuple[str, str], Any] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path: str = SCORES_FILE, backend: str | None = None):
+    """Return the (shared) store for a scores file.
+
+    Args:
+        path (str): Scores file; ``.sqlite3``/``.db`` paths are opened directly.
+        backend (str, optional): Key of ``BACKENDS``; defaults to ``SCORES_BACKEND``.
+    """
+    backend = backend or SCORES_BACKEND
+    if backend not in BACKENDS:
+        backend = "sqlite"
+    key = (backend, os.path.abspath(path))
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = BACKENDS[backend](path)
+            _stores[key] = store
+        return store
+
+
+def close_stores() -> None:
+    """Close every open store (they are reopened on next use)."""
+    with _stores_lock:
+        for store in _stores.values():
+            close = getattr(store, "close", None)
+            if close:
+                close()
+        _stores.clear()
+
+
+# atexit runs in reverse order, so the score_queue flush registered on its
+# first use still writes before the stores are closed
+atexit.register(close_stores)
+
+
+def write_score(name: str, score: int, difficulty: str = "dificil", path: str = SCORES_FILE) -> None:
+    """Write a score for a player.
+
+    - Keep the highest per (player, difficulty).
+    - The file the backend writes is created if missing: ``sqlite_path(path)``
+      for sqlite, ``path`` for json (see the module docstring).
+    """
+    if not name:
+        return
+    get_store(path).upsert(name, int(score), _normalize_difficulty(difficulty))
 
 
 def read_scores(path: str = SCORES_FILE) -> List[ScoreEntry]:
@@ -132,6 +657,50 @@ def read_scores(path: str = SCORES_FILE) -> List[ScoreEntry]:
 
     Each entry has: {"name": str, "score": int, "difficulty": str}
     """
-    data = _load_scores(path)
-    data.sort(key=lambda it: it.get("score", 0), reverse=True)
-    return data
+    return get_store(path).all()
+
+
+def query_scores(difficulty: str | None = None, name_prefix: str = "", order_by: str = "score",
+                 descending: bool = True, offset: int = 0, limit: int = 50,
+                 path: str = SCORES_FILE) -> List[ScoreEntry]:
+    """Return one page of the leaderboard.
+
+    Args:
+        difficulty (str, optional): Only this difficulty; all when empty.
+        name_prefix (str): Only players whose name starts with it.
+        order_by (str): One of ``SORT_COLUMNS``.
+        descending (bool): Sort direction.
+        offset (int): Rows to skip.
+        limit (int): Maximum rows returned.
+
+    Returns:
+        list: Score entries of the requested page.
+    """
+    if order_by not in SORT_COLUMNS:
+        raise ValueError(f"columna de orden desconocida: {order_by}")
+    if difficulty:
+        difficulty = _normalize_difficulty(difficulty)
+    return get_store(path).query(difficulty, name_prefix, order_by, descending, max(0, offset), max(0, limit))
+
+
+def count_scores(difficulty: str | None = None, name_prefix: str = "", path: str = SCORES_FILE) -> int:
+    """Return how many entries match the same filters as query_scores."""
+    if difficulty:
+        difficulty = _normalize_difficulty(difficulty)
+    return get_store(path).count(difficulty, name_prefix)
+
+
+def top_scores(difficulty: str, n: int = 10, path: str = SCORES_FILE) -> List[ScoreEntry]:
+    """Return the best ``n`` entries of a difficulty."""
+    return query_scores(difficulty, limit=n, path=path)
+
+
+def rank_for(name: str, difficulty: str = "dificil", path: str = SCORES_FILE) -> RankInfo | None:
+    """Return rank, percentile and personal best of a player in a difficulty.
+
+    Returns:
+        RankInfo or None: None if the player has no score there yet.
+    """
+    if not name:
+        return None
+    return get_store(path).rank(name, _normalize_difficulty(difficulty))
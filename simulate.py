@@ -0,0 +1,248 @@
+"""
+simulate.py
+
+Monte Carlo simulator used to tune the scoring constants in engine.py.
+
+Plays many games per board size and player model across a multiprocessing
+pool and streams attempt/score histograms to a CSV file as chunks finish.
+
+Example:
+    python simulate.py --games 200000 --grids 4,5,6,8 --models random,perfect,decay --forget 0.2
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import multiprocessing
+import os
+import random
+import time
+from collections import Counter
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from boards import BoardGenerator
+from engine import MemoryEngine, board_shape, score_for, MISMATCH
+
+MODELS = ("random", "perfect", "decay")
+DEFAULT_GRIDS = "4,5,6,8,10"
+CSV_HEADER = ("rows", "cols", "model", "forget", "attempts", "score", "games")
+
+# (rows, cols, model, forget, games, seed)
+Task = Tuple[int, int, str, float, int, int]
+
+
+def play_random(eng: MemoryEngine, rng: random.Random, forget: float = 1.0) -> int:
+    """Player without memory: every attempt flips two random unmatched cards.
+
+    Returns:
+        int: Attempts needed to finish the board.
+    """
+    click = eng.click
+    resolve = eng.resolve
+    unmatched = list(range(eng.size))
+    randrange = rng.randrange
+    while unmatched:
+        n = len(unmatched)
+        ia = randrange(n)
+        ib = randrange(n - 1)
+        if ib >= ia:
+            ib += 1
+        a, b = unmatched[ia], unmatched[ib]
+        click(a)
+        if click(b) == MISMATCH:
+            resolve()
+            continue
+        # swap-remove both matched cells, the higher position first
+        for pos in sorted((ia, ib), reverse=True):
+            unmatched[pos] = unmatched[-1]
+            unmatched.pop()
+    return eng.attempts
+
+
+def play_memory(eng: MemoryEngine, rng: random.Random, forget: float = 0.0) -> int:
+    """Player that remembers flipped cards, each forgotten with ``forget`` per attempt.
+
+    With ``forget == 0`` this is a perfect-memory player: it never flips a
+    card it has already seen unless it knows where its partner is.
+
+    Returns:
+        int: Attempts needed to finish the board.
+    """
+    values = eng.values
+    click = eng.click
+    resolve = eng.resolve
+    rand = rng.random
+    randrange = rng.randrange
+
+    # cells never seen (or forgotten); removal swaps with the last entry
+    unknown = list(range(eng.size))
+    seen: Dict[int, int] = {}           # pair id -> remembered cell
+    known_pairs: List[Tuple[int, int]] = []
+
+    def take_unknown() -> int:
+        i = randrange(len(unknown))
+        cell = unknown[i]
+        unknown[i] = unknown[-1]
+        unknown.pop()
+        return cell
+
+    while not eng.done:
+        if known_pairs:
+            a, b = known_pairs.pop()
+            click(a)
+            click(b)
+        else:
+            a = take_unknown()
+            pid = values[a]
+            click(a)
+            partner = seen.pop(pid, None)
+            if partner is not None:
+                click(partner)
+            else:
+                b = take_unknown()
+                if click(b) == MISMATCH:
+                    resolve()
+                    seen[pid] = a
+                    pid_b = values[b]
+                    other = seen.pop(pid_b, None)
+                    if other is not None:
+                        known_pairs.append((other, b))
+                    else:
+                        seen[pid_b] = b
+        if forget > 0.0 and seen:
+            for pid in [p for p in seen if rand() < forget]:
+                unknown.append(seen.pop(pid))
+    return eng.attempts
+
+
+PLAYERS: Dict[str, Callable[[MemoryEngine, random.Random, float], int]] = {
+    "random": play_random,
+    "perfect": lambda eng, rng, _forget: play_memory(eng, rng, 0.0),
+    "decay": play_memory,
+}
+
+
+def run_chunk(task: Task) -> Tuple[Task, Counter]:
+    """Play one chunk of games and return the attempts histogram."""
+    rows, cols, model, forget, games, seed = task
+    rng = random.Random(seed)
+    eng = MemoryEngine(rows, cols, rng=rng)
+    play = PLAYERS[model]
+    hist: Counter = Counter()
+    # boards come in NumPy batches; the player's choices use rng
+    for board in BoardGenerator(rows, cols, seed).take(games):
+        eng.reset(board, check=False)
+        hist[play(eng, rng, forget)] += 1
+    return task, hist
+
+
+def make_tasks(grids: List[Tuple[int, int]], models: List[str], forget: float,
+               games: int, chunk: int, seed: int) -> Iterator[Task]:
+    """Split the requested games into independently seeded chunks."""
+    # forgetting only applies to the decay model; record what the others imply
+    implied = {"random": 1.0, "perfect": 0.0}
+    n = 0
+    for rows, cols in grids:
+        for model in models:
+            frg = implied.get(model, forget)
+            left = games
+            while left > 0:
+                size = min(chunk, left)
+                left -= size
+                yield rows, cols, model, frg, size, seed + n
+                n += 1
+
+
+def parse_grids(spec: str) -> List[Tuple[int, int]]:
+    """Parse "4,5,6" or "4x4,5x6" into (rows, cols) pairs; odd squares are padded like the menu."""
+    grids = []
+    for part in spec.split(","):
+        part = part.strip().lower()
+        if not part:
+            continue
+        if "x" in part:
+            r, c = part.split("x", 1)
+            grids.append((int(r), int(c)))
+        else:
+            grids.append(board_shape(int(part)))
+    return grids
+
+
+def percentile(hist: Counter, q: float) -> int:
+    total = sum(hist.values())
+    target = q * total
+    acc = 0
+    for value in sorted(hist):
+        acc += hist[value]
+        if acc >= target:
+            return value
+    return 0
+
+
+def summarize(results: Dict[Tuple[int, int, str], Counter]) -> str:
+    lines = [f"{'tablero':>8} {'modelo':>8} {'partidas':>10} {'intentos':>9} {'p10':>5} {'p50':>5} {'p90':>5} {'puntaje':>8}"]
+    for (rows, cols, model), hist in sorted(results.items()):
+        games = sum(hist.values())
+        pairs = rows * cols // 2
+        mean_attempts = sum(a * n for a, n in hist.items()) / games
+        mean_score = sum(score_for(a, pairs) * n for a, n in hist.items()) / games
+        lines.append(
+            f"{rows}x{cols:<6} {model:>8} {games:>10} {mean_attempts:>9.2f} "
+            f"{percentile(hist, 0.1):>5} {percentile(hist, 0.5):>5} {percentile(hist, 0.9):>5} {mean_score:>8.1f}"
+        )
+    return "\n".join(lines)
+
+
+def simulate(grids: List[Tuple[int, int]], models: List[str], games: int, out_path: str,
+             forget: float = 0.2, workers: int | None = None, chunk: int = 2000,
+             seed: int = 0) -> Dict[Tuple[int, int, str], Counter]:
+    """Run the simulation, appending each finished chunk to ``out_path``.
+
+    Returns:
+        dict: Attempts histogram per (rows, cols, model).
+    """
+    tasks = make_tasks(grids, models, forget, games, chunk, seed)
+    results: Dict[Tuple[int, int, str], Counter] = {}
+    new_file = not os.path.exists(out_path) or os.path.getsize(out_path) == 0
+    with open(out_path, "a", newline="", encoding="utf-8") as f, \
+            multiprocessing.Pool(workers) as pool:
+        writer = csv.writer(f)
+        if new_file:
+            writer.writerow(CSV_HEADER)
+        for (rows, cols, model, frg, _games, _seed), hist in pool.imap_unordered(run_chunk, tasks):
+            pairs = rows * cols // 2
+            for attempts, n in sorted(hist.items()):
+                writer.writerow((rows, cols, model, frg, attempts, score_for(attempts, pairs), n))
+            f.flush()
+            results.setdefault((rows, cols, model), Counter()).update(hist)
+    return results
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Simula partidas de memorama para calibrar el puntaje.")
+    parser.add_argument("--games", type=int, default=100000, help="partidas por tablero y modelo")
+    parser.add_argument("--grids", default=DEFAULT_GRIDS, help="tamaños, p. ej. 4,5,6 o 5x6,8x8")
+    parser.add_argument("--models", default=",".join(MODELS), help="modelos de jugador: " + ", ".join(MODELS))
+    parser.add_argument("--forget", type=float, default=0.2, help="probabilidad de olvido por intento (modelo decay)")
+    parser.add_argument("--workers", type=int, default=None, help="procesos (por defecto, todos los núcleos)")
+    parser.add_argument("--chunk", type=int, default=2000, help="partidas por tarea")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="simulation.csv", help="CSV donde se agregan los histogramas")
+    args = parser.parse_args(argv)
+
+    models = [m.strip() for m in args.models.split(",") if m.strip()]
+    unknown = [m for m in models if m not in PLAYERS]
+    if unknown:
+        parser.error(f"modelo desconocido: {', '.join(unknown)}")
+
+    start = time.perf_counter()
+    results = simulate(parse_grids(args.grids), models, args.games, args.out,
+                       forget=args.forget, workers=args.workers, chunk=args.chunk, seed=args.seed)
+    elapsed = time.perf_counter() - start
+    total = sum(sum(h.values()) for h in results.values())
+    print(summarize(results))
+    print(f"{total} partidas en {elapsed:.1f}s ({total / max(elapsed, 1e-9):.0f}/s) -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+startup.py
+
+Cold-start timings of the application: module imports, menu window
+creation and first paint, checked against a time budget.
+"""
+from __future__ import annotations
+
+import time
+from typing import List, Optional, Tuple
+
+# the menu should be on screen within this many milliseconds
+DEFAULT_BUDGET_MS = 800.0
+
+
+class StartupTimer:
+    """Collects named milestones relative to process start.
+
+    Args:
+        t0 (float, optional): ``time.perf_counter()`` taken as early as
+            possible in main.py; defaults to now.
+    """
+
+    def __init__(self, t0: Optional[float] = None):
+        self.t0 = time.perf_counter() if t0 is None else t0
+        self.marks: List[Tuple[str, float]] = []
+
+    def mark(self, name: str) -> float:
+        """Record a milestone and return its time in milliseconds."""
+        ms = (time.perf_counter() - self.t0) * 1000.0
+        self.marks.append((name, ms))
+        return ms
+
+    def get(self, name: str) -> Optional[float]:
+        for mark, ms in self.marks:
+            if mark == name:
+                return ms
+        return None
+
+    def over_budget(self, budget_ms: float = DEFAULT_BUDGET_MS, milestone: str = "first paint") -> bool:
+        ms = self.get(milestone)
+        return ms is None or ms > budget_ms
+
+    def report(self, budget_ms: float = DEFAULT_BUDGET_MS, milestone: str = "first paint") -> str:
+        """Return the milestones as a small table with the budget verdict."""
+        lines = ["Arranque (ms desde el inicio del proceso):"]
+        prev = 0.0
+        for name, ms in self.marks:
+            lines.append(f"  {name:<20} {ms:8.1f}  (+{ms - prev:.1f})")
+            prev = ms
+        verdict = "EXCEDIDO" if self.over_budget(budget_ms, milestone) else "ok"
+        lines.append(f"  presupuesto {milestone}: {budget_ms:.0f} ms -> {verdict}")
+        return "\n".join(lines)
@@ -0,0 +1,71 @@
+import time
+import unittest
+from unittest import mock
+
+import audio
+from audio import AudioService, EFFECTS, synth_effect
+
+
+class TestAudioService(unittest.TestCase):
+    def test_missing_audio_is_silent(self):
+        service = AudioService()
+        with mock.patch.object(AudioService, "_init_mixer", side_effect=ImportError("no pygame")):
+            self.assertFalse(service.wait_ready(timeout=5))
+            # commands are accepted and dropped
+            service.play_music("music.mp3")
+            service.stop_music()
+
+    def test_commands_run_on_the_audio_thread(self):
+        service = AudioService()
+        fake = mock.MagicMock()
+
+        def init(self):
+            self._mixer = fake
+
+        with mock.patch.object(AudioService, "_init_mixer", init):
+            self.assertTrue(service.wait_ready(timeout=5))
+            service.play_music("music.mp3")
+            service.stop_music()
+            deadline = time.monotonic() + 5
+            while not fake.music.stop.called and time.monotonic() < deadline:
+                time.sleep(0.01)
+        fake.music.load.assert_called_with("music.mp3")
+        fake.music.play.assert_called_with(-1)
+        fake.music.stop.assert_called()
+
+    def test_effects_are_predecoded_and_play_within_a_frame(self):
+        service = AudioService()
+        fake = mock.MagicMock()
+        fake.get_init.return_value = (22050, -16, 2)
+
+        def init(self):
+            self._mixer = fake
+
+        with mock.patch.object(AudioService, "_init_mixer", init), \
+             mock.patch.object(audio, "EFFECTS_DIR", "/nonexistent"):
+            self.assertTrue(service.wait_ready(timeout=5))
+            # decoded once, at startup, in the mixer's format
+            self.assertEqual(fake.Sound.call_count, len(EFFECTS))
+            buffer = fake.Sound.call_args.kwargs["buffer"]
+            self.assertEqual(len(buffer) % 4, 0)  # 16-bit stereo frames
+            fake.set_reserved.assert_called_with(3)
+            for _ in range(20):
+                service.play_effect("flip")
+            service.play_effect("win")
+            deadline = time.monotonic() + 5
+            while service.latency.count < 21 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        self.assertEqual(service.latency.count, 21)
+        self.assertLess(service.latency.percentile(0.5), 1000 / 60)
+
+    def test_synthesized_effects_are_short_and_bounded(self):
+        for name in EFFECTS:
+            wave = synth_effect(name, 8000)
+            self.assertLess(len(wave), 8000)
+            self.assertLessEqual(float(abs(wave).max()), 1.0)
+        with self.assertRaises(ValueError):
+            synth_effect("trueno")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+import numpy as np
+
+from boards import BoardGenerator, adjacent_pairs, deal, generate_boards
+
+
+class TestBoards(unittest.TestCase):
+    def test_every_board_holds_each_pair_twice(self):
+        boards = generate_boards(500, 5, 6, rng=1)
+        self.assertEqual(boards.shape, (500, 30))
+        counts = np.apply_along_axis(np.bincount, 1, boards, minlength=15)
+        self.assertTrue((counts == 2).all())
+        # rows are shuffled independently
+        self.assertGreater(len({row.tobytes() for row in boards}), 490)
+
+    def test_seeded_stream_is_reproducible(self):
+        a = BoardGenerator(4, 4, seed=9)
+        b = BoardGenerator(4, 4, seed=9)
+        np.testing.assert_array_equal(a.boards(10), b.boards(10))
+        np.testing.assert_array_equal(a.boards(3), b.boards(3))
+        self.assertEqual(len(list(a.take(25, batch=10))), 25)
+        self.assertEqual(deal(4, 4, 123), deal(4, 4, 123))
+
+    def test_no_adjacent_pairs(self):
+        boards = generate_boards(2000, 6, 6, rng=4, no_adjacent=True)
+        self.assertFalse(adjacent_pairs(boards.reshape(-1, 6, 6)).any())
+        with self.assertRaises(ValueError):
+            generate_boards(1, 1, 2, no_adjacent=True)
+
+    def test_custom_constraint(self):
+        # keep pair 0 out of the first cell
+        boards = generate_boards(200, 3, 4, rng=5, constraints=[lambda g: g[:, 0, 0] == 0])
+        self.assertFalse((boards[:, 0] == 0).any())
+
+    def test_rejects_odd_boards(self):
+        with self.assertRaises(ValueError):
+            generate_boards(1, 3, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
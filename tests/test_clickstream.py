@@ -0,0 +1,83 @@
+import os
+import random
+import tempfile
+import unittest
+
+from clickstream import ClickRecorder, RESOLVE, read_games, replay
+from engine import MemoryEngine, MISMATCH
+
+
+def _play(recorder, rows, cols, seed, faces=0):
+    # a player that remembers nothing: random clicks until the board is done
+    eng = MemoryEngine(rows, cols, seed=seed, faces=faces)
+    recorder.start_game(rows, cols, seed, "Ana", "facil", "ImagenesPython", eng.faces)
+    rng = random.Random(seed)
+    while not eng.done:
+        i = rng.randrange(eng.size)
+        outcome = eng.click(i)
+        recorder.click(i, outcome)
+        if outcome == MISMATCH:
+            eng.resolve()
+            recorder.resolve()
+    return eng
+
+
+class TestClickStream(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".mrec")
+        os.close(fd)
+        os.remove(self.path)
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def test_round_trip_and_replay(self):
+        rec = ClickRecorder(self.path)
+        played = [_play(rec, 4, 4, 7), _play(rec, 5, 6, 2 ** 62 + 5), _play(rec, 6, 6, 9, faces=10)]
+        rec.close()
+        games = read_games(self.path)
+        self.assertEqual(len(games), 3)
+        self.assertEqual([g.faces for g in games], [0, 0, 10])
+        self.assertEqual((games[1].rows, games[1].cols, games[1].seed), (5, 6, 2 ** 62 + 5))
+        self.assertEqual((games[0].player, games[0].difficulty), ("Ana", "facil"))
+        for game, eng in zip(games, played):
+            result = replay(game)
+            self.assertEqual(result.divergences, 0)
+            self.assertTrue(result.won)
+            self.assertEqual(result.attempts, eng.attempts)
+        # a click takes a few bytes
+        clicks = sum(1 for g in games for e in g.events if e[0] != RESOLVE)
+        self.assertLess(os.path.getsize(self.path), 4 * clicks + 100)
+
+    def test_truncated_tail_is_dropped(self):
+        rec = ClickRecorder(self.path)
+        _play(rec, 4, 4, 3)
+        rec.close()
+        full = read_games(self.path)[0]
+        with open(self.path, "r+b") as f:
+            f.truncate(os.path.getsize(self.path) - 1)
+        cut = read_games(self.path)[0]
+        self.assertEqual(cut.events, full.events[:-1])
+
+    def test_clicks_before_a_game_are_not_written(self):
+        rec = ClickRecorder(self.path)
+        rec.click(3, MISMATCH)
+        rec.resolve()
+        self.assertFalse(os.path.exists(self.path))
+        _play(rec, 4, 4, 5)
+        rec.close()
+        (game,) = read_games(self.path)
+        self.assertEqual(replay(game).divergences, 0)
+
+    def test_replay_detects_changed_rules(self):
+        rec = ClickRecorder(self.path)
+        _play(rec, 4, 4, 11)
+        rec.close()
+        game = read_games(self.path)[0]
+        tampered = game._replace(seed=12)
+        self.assertGreater(replay(tampered).divergences, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
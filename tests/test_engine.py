@@ -0,0 +1,80 @@
+import random
+import unittest
+
+import engine
+from engine import MemoryEngine, board_shape
+
+
+class TestMemoryEngine(unittest.TestCase):
+    def test_rejects_odd_boards(self):
+        with self.assertRaises(ValueError):
+            MemoryEngine(5, 5)
+        with self.assertRaises(ValueError):
+            MemoryEngine(0, 4)
+
+    def test_board_shape_pads_odd_squares(self):
+        self.assertEqual(board_shape(4), (4, 4))
+        self.assertEqual(board_shape(5), (5, 6))
+        self.assertEqual(board_shape(6), (6, 6))
+
+    def test_rectangular_board_has_all_pairs(self):
+        eng = MemoryEngine(3, 8, rng=random.Random(1))
+        self.assertEqual(len(eng.values), 24)
+        self.assertEqual(sorted(eng.values), sorted(list(range(12)) * 2))
+
+    def test_rejects_unpaired_values(self):
+        with self.assertRaises(ValueError):
+            MemoryEngine(2, 2, values=[0, 0, 1, 2])
+        with self.assertRaises(ValueError):
+            MemoryEngine(2, 2, values=[0, 0, 1])
+
+    def test_match_flow(self):
+        eng = MemoryEngine(2, 2, values=[0, 1, 0, 1])
+        self.assertEqual(eng.click(0), engine.FIRST)
+        self.assertEqual(eng.click(0), engine.IGNORED)
+        self.assertEqual(eng.click(2), engine.MATCH)
+        self.assertTrue(eng.is_matched(0) and eng.is_matched(2))
+        self.assertEqual(eng.click(2), engine.IGNORED)
+        eng.click(1)
+        self.assertEqual(eng.click(3), engine.WIN)
+        self.assertTrue(eng.done)
+        self.assertEqual(eng.matched_indices(), [0, 1, 2, 3])
+        self.assertEqual(eng.score(), 1000)
+
+    def test_mismatch_locks_until_resolved(self):
+        eng = MemoryEngine(2, 2, values=[0, 1, 0, 1])
+        eng.click(0)
+        self.assertEqual(eng.click(1), engine.MISMATCH)
+        self.assertTrue(eng.locked)
+        self.assertTrue(eng.is_face_up(0) and eng.is_face_up(1))
+        self.assertEqual(eng.click(2), engine.IGNORED)
+        self.assertEqual(eng.resolve(), (0, 1))
+        self.assertFalse(eng.locked)
+        self.assertFalse(eng.is_face_up(0))
+        self.assertIsNone(eng.resolve())
+        self.assertEqual(eng.attempts, 1)
+
+    def test_out_of_range_ignored(self):
+        eng = MemoryEngine(2, 2)
+        self.assertEqual(eng.click(-1), engine.IGNORED)
+        self.assertEqual(eng.click(4), engine.IGNORED)
+
+    def test_fewer_faces_than_pairs_share_ids(self):
+        eng = MemoryEngine(6, 6, seed=3, faces=10)
+        counts = [list(eng.values).count(v) for v in range(10)]
+        self.assertEqual(sum(counts), 36)
+        self.assertTrue(all(c >= 2 and c % 2 == 0 for c in counts))
+        # any two cards with the same face match
+        cells = [i for i, v in enumerate(eng.values) if v == 0]
+        eng.click(cells[0])
+        self.assertEqual(eng.click(cells[-1]), engine.MATCH)
+        self.assertEqual(MemoryEngine(4, 4, seed=3, faces=8).faces, 0)
+
+    def test_score_penalizes_extra_attempts(self):
+        self.assertEqual(engine.score_for(8, 8), 1000)
+        self.assertEqual(engine.score_for(11, 8), 940)
+        self.assertEqual(engine.score_for(500, 8), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+import flip_anim
+from flip_anim import FlipAnimator, flip_frames
+
+
+class _Widget:
+    """Just enough of a Tk widget: after() jobs run when the test says so."""
+
+    def __init__(self):
+        self.jobs = {}
+        self._ids = 0
+
+    def after(self, _ms, fn):
+        self._ids += 1
+        self.jobs[self._ids] = fn
+        return self._ids
+
+    def after_cancel(self, job):
+        self.jobs.pop(job, None)
+
+    def run(self):
+        jobs, self.jobs = self.jobs, {}
+        for fn in jobs.values():
+            fn()
+
+
+class TestFlipFrames(unittest.TestCase):
+    def test_frames_keep_the_card_size_and_narrow(self):
+        card = Image.new("RGB", (40, 30), (255, 0, 0))
+        frames = flip_frames(card, "#000000", steps=4)
+        self.assertEqual(len(frames), 3)
+        widths = []
+        for f in frames:
+            self.assertEqual(f.size, (40, 30))
+            widths.append(sum(1 for x in range(40) if f.getpixel((x, 15)) == (255, 0, 0)))
+        self.assertEqual(widths, sorted(widths, reverse=True))
+        self.assertLess(widths[-1], 40 // 2)
+
+
+class TestFlipAnimator(unittest.TestCase):
+    def setUp(self):
+        self.widget = _Widget()
+        self.redrawn = []
+        self.anim = FlipAnimator(self.widget, self.redrawn.append, frame_ms=10)
+        self.now = 100.0
+        clock = mock.patch.object(flip_anim.time, "perf_counter", side_effect=lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    def _advance(self, ms):
+        self.now += ms / 1000.0
+        self.widget.run()
+
+    def test_plays_old_then_new_frames_from_one_tick(self):
+        self.anim.flip(1, ["a1", "a2"], ["b1", "b2"])
+        self.anim.flip(2, ["a1", "a2"], ["b1", "b2"])
+        self.assertEqual(len(self.widget.jobs), 1)
+        seen = [self.anim.frame(1)]
+        for _ in range(3):
+            self._advance(10)
+            seen.append(self.anim.frame(1))
+        self.assertEqual(seen, ["a1", "a2", "b2", "b1"])
+        self._advance(10)
+        self.assertIsNone(self.anim.frame(1))
+        self.assertEqual(self.anim.running, 0)
+        self.assertEqual(self.widget.jobs, {})
+        self.assertEqual(self.anim.dropped, 0)
+
+    def test_late_ticks_drop_frames(self):
+        self.anim.flip(0, ["a1", "a2", "a3"], ["b1", "b2", "b3"])
+        self._advance(35)
+        self.assertEqual(self.anim.frame(0), "b3")
+        self.assertEqual(self.anim.dropped, 2)
+        self._advance(100)
+        self.assertIsNone(self.anim.frame(0))
+        self.assertEqual(self.anim.dropped, 4)
+
+    def test_missing_frames_switch_at_once(self):
+        self.anim.flip(0, ["a1"], [None])
+        self.assertIsNone(self.anim.frame(0))
+        self.assertEqual(self.widget.jobs, {})
+
+    def test_stop_ends_everything(self):
+        self.anim.flip(0, ["a1"], ["b1"])
+        self.anim.stop()
+        self.assertIsNone(self.anim.frame(0))
+        self.assertEqual(self.widget.jobs, {})
+        self.assertEqual(self.redrawn[-1], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
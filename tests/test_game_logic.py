@@ -1,4 +1,5 @@
 import os
+import random
 import tempfile
 import unittest
 from unittest import mock
@@ -21,6 +22,10 @@ class TestGameWindow(unittest.TestCase):
         # temp directory for images
         self.tmpdir = tempfile.mkdtemp(prefix="memorama_imgs_")
         _make_temp_images(self.tmpdir, count=10)
+        # keep click recordings out of the working directory
+        env = mock.patch.dict(os.environ, {"MEMORAMA_RECORDINGS": self.tmpdir, "MEMORAMA_SUSPENDED": self.tmpdir})
+        env.start()
+        self.addCleanup(env.stop)
 
         # Tk root
         self.root = Tk()
@@ -42,6 +47,11 @@ class TestGameWindow(unittest.TestCase):
             os.rmdir(self.tmpdir)
         except Exception:
             pass
+        # the theme manifest is cached next to the directory
+        try:
+            os.remove(self.tmpdir + ".manifest")
+        except Exception:
+            pass
 
     def test_setup_board(self):
         # patch name prompt and disable music init
@@ -54,6 +64,14 @@ class TestGameWindow(unittest.TestCase):
             self.assertEqual(sorted(gw.card_values).count(0), 2)
             gw.destroy()
 
+    def test_odd_grid_gets_even_board(self):
+        with mock.patch.object(GameWindow, "_prompt_name", return_value="Tester"), \
+             mock.patch.object(GameWindow, "_init_music", return_value=None):
+            gw = GameWindow(self.root, grid_size=5, theme_dir=self.tmpdir, player_name="Tester")
+            self.assertEqual((gw.rows, gw.cols), (5, 6))
+            self.assertEqual(len(gw.buttons), len(gw.card_values))
+            gw.destroy()
+
     def test_scoring_logic(self):
         with mock.patch.object(GameWindow, "_prompt_name", return_value="Tester"), \
              mock.patch.object(GameWindow, "_init_music", return_value=None):
@@ -67,6 +85,17 @@ class TestGameWindow(unittest.TestCase):
             self.assertLess(s2, 1000)
             gw.destroy()
 
+    def test_small_theme_repeats_faces_as_one_pair_id(self):
+        with mock.patch.object(GameWindow, "_prompt_name", return_value="Tester"), \
+             mock.patch.object(GameWindow, "_init_music", return_value=None):
+            gw = GameWindow(self.root, grid_size=6, theme_dir=self.tmpdir, player_name="Tester")
+            # 18 pairs from 10 images: no two pair ids show the same image
+            self.assertEqual(len(gw.face_paths), 10)
+            self.assertEqual(len(set(gw.face_paths)), 10)
+            self.assertEqual(set(gw.card_values), set(range(10)))
+            self.assertNotIn(gw.front_path, gw.face_paths)
+            gw.destroy()
+
     def test_click_match_flow(self):
         with mock.patch.object(GameWindow, "_prompt_name", return_value="Tester"), \
              mock.patch.object(GameWindow, "_init_music", return_value=None):
@@ -86,6 +115,138 @@ class TestGameWindow(unittest.TestCase):
             self.assertIn(j, gw.revealed_indices)
             gw.destroy()
 
+    def test_click_marks_only_the_clicked_card(self):
+        with mock.patch.object(GameWindow, "_prompt_name", return_value="Tester"), \
+             mock.patch.object(GameWindow, "_init_music", return_value=None):
+            gw = GameWindow(self.root, grid_size=6, theme_dir=self.tmpdir, player_name="Tester")
+            gw._draw_frame()
+            gw.on_card_click(3)
+            self.assertEqual(gw.view._dirty, {3})
+            gw._draw_frame()
+            gw.reset_game()
+            # only the card that was face-up is repainted
+            self.assertEqual(gw.view._dirty, {3})
+            gw.destroy()
+
+    def test_canvas_renderer_maps_clicks_to_cells(self):
+        with mock.patch.object(GameWindow, "_prompt_name", return_value="Tester"), \
+             mock.patch.object(GameWindow, "_init_music", return_value=None):
+            gw = GameWindow(self.root, grid_size=4, theme_dir=self.tmpdir, player_name="Tester",
+                            rows=8, cols=8, renderer="canvas")
+            self.assertEqual(len(gw.view), 64)
+            gw.view._layout_size = (800, 800)
+            # centre of row 2, column 3; the gap between tiles is not a card
+            self.assertEqual(gw.view.cell_at(350, 250), 19)
+            self.assertIsNone(gw.view.cell_at(200, 250))
+            gw.on_card_click(19)
+            self.assertEqual(gw.first_index, 19)
+            gw.destroy()
+
+    def test_hint_and_demo(self):
+        with mock.patch.object(GameWindow, "_prompt_name", return_value="Tester"), \
+             mock.patch.object(GameWindow, "_init_music", return_value=None), \
+             mock.patch("ventana.SCORE_WRITER") as writer:
+            gw = GameWindow(self.root, grid_size=4, theme_dir=self.tmpdir, player_name="Tester", seed=3)
+            vals = list(gw.card_values)
+            j = vals.index(vals[0], 1)
+            gw.on_card_click(0)
+            # the partner of card 0 was never seen: the hint points to a new card
+            gw.show_hint()
+            self.assertEqual(len(gw._hint_cells), 1)
+            self.assertNotEqual(gw._hint_cells[0], 0)
+            gw.on_card_click(j)
+            self.assertEqual(gw._hint_cells, ())
+            gw.toggle_demo()
+            while not gw.engine.done:
+                if gw.lock_input:
+                    gw._flip_back(gw.engine.first, gw.engine.second)
+                gw._demo_step()
+            self.assertFalse(gw.demo)
+            writer.submit.assert_not_called()
+            gw.reset_game()
+            self.assertTrue(gw.keep_score)
+            gw.destroy()
+
+    def test_closed_game_resumes_in_the_next_window(self):
+        with mock.patch.object(GameWindow, "_prompt_name", return_value="Tester"), \
+             mock.patch.object(GameWindow, "_init_music", return_value=None):
+            gw = GameWindow(self.root, grid_size=4, theme_dir=self.tmpdir, player_name="Tester")
+            vals = list(gw.card_values)
+            j = vals.index(vals[0], 1)
+            gw.on_card_click(0)
+            gw.on_card_click(j)
+            k = next(i for i in range(len(vals)) if i not in (0, j))
+            gw.on_card_click(k)
+            gw._on_close()
+            again = GameWindow(self.root, grid_size=4, theme_dir=self.tmpdir, player_name="Tester")
+            self.assertTrue(again.resumed)
+            self.assertEqual(list(again.card_values), vals)
+            self.assertEqual((again.attempts, again.matches, again.first_index), (1, 1, k))
+            self.assertEqual(again.revealed_indices, sorted((0, j)))
+            self.assertNotIn(0, [again.seen.next_click(-1, 0, random.Random(i)) for i in range(20)])
+            # clicks on the resumed board are not recorded without their game
+            again.on_card_click(next(i for i in range(len(vals)) if i not in (0, j, k)))
+            again._recorder.close()
+            self.assertFalse(os.path.exists(again._recorder.path))
+            again.destroy()
+            # the snapshot was used up
+            fresh = GameWindow(self.root, grid_size=4, theme_dir=self.tmpdir, player_name="Tester")
+            self.assertFalse(fresh.resumed)
+            fresh.destroy()
+
+    def test_replay_leaves_the_suspended_game_alone(self):
+        import snapshot
+        from clickstream import Game, _replay_gui
+        with mock.patch.object(GameWindow, "_prompt_name", return_value="Tester"), \
+             mock.patch.object(GameWindow, "_init_music", return_value=None):
+            gw = GameWindow(self.root, grid_size=4, theme_dir=self.tmpdir, player_name="Tester")
+            gw.on_card_click(0)
+            gw._on_close()
+            path = snapshot.snapshot_path("Tester", "facil")
+            self.assertTrue(os.path.exists(path))
+            game = Game(4, 4, 5, 0, "Tester", "facil", self.tmpdir, [])
+            with mock.patch.object(Tk, "mainloop", lambda root: root.destroy()):
+                _replay_gui(game, 1.0)
+            self.assertTrue(os.path.exists(path))
+
+    def test_reset_swaps_in_the_board_prepared_ahead(self):
+        with mock.patch.object(GameWindow, "_prompt_name", return_value="Tester"), \
+             mock.patch.object(GameWindow, "_init_music", return_value=None):
+            gw = GameWindow(self.root, grid_size=4, theme_dir=self.tmpdir, player_name="Tester")
+            self.assertIsNotNone(gw._prepare_steps)
+            for _ in gw._prepare_steps:  # the idle steps
+                pass
+            seed, values, cells_by_face = gw._next_board
+            with mock.patch("engine.deal") as deal:
+                gw.reset_game()
+            deal.assert_not_called()
+            self.assertEqual((gw.engine.seed, list(gw.card_values)), (seed, values))
+            self.assertIs(gw._cells_by_face, cells_by_face)
+            self.assertIsNone(gw._next_board)
+            # an explicit seed still deals that board
+            gw.reset_game(seed=7)
+            self.assertEqual(gw.engine.seed, 7)
+            gw.destroy()
+
+    def test_seeded_game_is_recorded_and_replays(self):
+        from clickstream import iter_games, replay
+        with mock.patch.object(GameWindow, "_prompt_name", return_value="Tester"), \
+             mock.patch.object(GameWindow, "_init_music", return_value=None):
+            gw = GameWindow(self.root, grid_size=4, theme_dir=self.tmpdir, player_name="Tester", seed=42)
+            other = GameWindow(self.root, grid_size=4, theme_dir=self.tmpdir, player_name="Tester", seed=42, record=False)
+            self.assertEqual(list(gw.card_values), list(other.card_values))
+            other.destroy()
+            vals = list(gw.card_values)
+            b = next(i for i in range(1, len(vals)) if vals[i] != vals[0])
+            gw.on_card_click(0)
+            gw.on_card_click(b)
+            gw._flip_back(0, b)
+            gw.destroy()
+        (_file, game), = iter_games([self.tmpdir])
+        self.assertEqual(game.seed, 42)
+        self.assertEqual([e[:2] for e in game.events], [(1, 0), (3, b), (5, 0)])
+        self.assertEqual(replay(game).divergences, 0)
+
 
 if __name__ == '__main__':
     unittest.main()
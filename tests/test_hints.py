@@ -0,0 +1,98 @@
+import random
+import time
+import unittest
+
+from engine import MemoryEngine, FIRST, MATCH, MISMATCH, WIN
+from hints import SeenIndex, Assist
+
+
+def _follow(engine, seen, index):
+    # what GameWindow does on every click
+    first = engine.first
+    event = engine.click(index)
+    pair = engine.values[index]
+    if event != 0:
+        seen.see(index, pair)
+        if event in (MATCH, WIN):
+            seen.matched(first, index, pair)
+    return event
+
+
+class TestSeenIndex(unittest.TestCase):
+    def test_tracks_known_pairs_and_partners(self):
+        engine = MemoryEngine(2, 4, values=[0, 1, 2, 3, 0, 1, 2, 3])
+        seen = SeenIndex(engine.size)
+        self.assertEqual(seen.hint(-1, 0), ())
+        _follow(engine, seen, 0)
+        _follow(engine, seen, 1)
+        engine.resolve()
+        self.assertIsNone(seen.known_pair())
+        _follow(engine, seen, 4)
+        # card 0 was seen: the partner of the face-up card is known
+        self.assertEqual(seen.hint(4, 0), (0,))
+        self.assertEqual(seen.next_click(4, 0, random.Random(1)), 0)
+        _follow(engine, seen, 5)
+        engine.resolve()
+        self.assertEqual(seen.known_pair(), (0, 4))
+        self.assertEqual(seen.unseen, 4)
+        self.assertEqual(_follow(engine, seen, 0), FIRST)
+        self.assertEqual(_follow(engine, seen, 4), MATCH)
+        self.assertEqual(seen.known_pair(), (1, 5))
+        self.assertIsNone(seen.partner(4, 0))
+
+    def test_repeated_faces_stay_known_after_a_match(self):
+        # four cards of pair id 0, as when a theme has fewer faces than pairs
+        seen = SeenIndex(6)
+        for cell in (0, 1, 2):
+            seen.see(cell, 0)
+        seen.matched(0, 1, 0)
+        self.assertIsNone(seen.known_pair())
+        seen.see(3, 0)
+        self.assertEqual(seen.known_pair(), (2, 3))
+
+    def test_demo_player_clears_a_large_board_quickly(self):
+        engine = MemoryEngine(100, 100, seed=5)
+        seen = SeenIndex(engine.size)
+        rng = random.Random(5)
+        t0 = time.perf_counter()
+        while not engine.done:
+            if engine.locked:
+                engine.resolve()
+            first = engine.first
+            cell = seen.next_click(first, engine.values[first] if first >= 0 else 0, rng)
+            _follow(engine, seen, cell)
+        elapsed = time.perf_counter() - t0
+        # a perfect memory never turns a card more than twice
+        self.assertLessEqual(engine.attempts, engine.size)
+        self.assertEqual(seen.unseen, 0)
+        self.assertLess(elapsed, 2.0)
+
+
+class TestAssist(unittest.TestCase):
+    def test_easier_levels_help_sooner(self):
+        easy, hard = Assist("facil"), Assist("dificil")
+        for assist in (easy, hard):
+            assist.record(MISMATCH, True)
+        self.assertTrue(easy.should_hint(True))
+        self.assertFalse(hard.should_hint(True))
+        # guesses are not lapses
+        hard.record(MISMATCH, False)
+        self.assertEqual(hard.lapses, 1)
+
+    def test_adapts_to_recalls_and_lapses(self):
+        assist = Assist("medio")
+        for _ in range(2):
+            assist.record(MATCH, True)
+        self.assertEqual(assist.threshold, 3)
+        for _ in range(4):
+            assist.record(MISMATCH, True)
+        self.assertEqual(assist.threshold, 2)
+        self.assertFalse(assist.should_hint(False))
+        self.assertTrue(assist.should_hint(True))
+        # a helped attempt counts neither way
+        assist.record(MATCH, True)
+        self.assertEqual((assist.lapses, assist.recalls, assist.given), (0, 0, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
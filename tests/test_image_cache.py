@@ -0,0 +1,57 @@
+import unittest
+
+from PIL import Image
+
+from image_cache import RenderedCardCache
+
+
+class TestRenderedCardCache(unittest.TestCase):
+    def setUp(self):
+        # identity factory keeps the tests free of Tk
+        self.cache = RenderedCardCache(max_bytes=3 * 32 * 32 * 4, factory=lambda img: img)
+        self.src = Image.new("RGB", (64, 64), (10, 20, 30))
+
+    def test_hit_and_miss_counters(self):
+        a = self.cache.get("a.png", self.src, 32, 32)
+        b = self.cache.get("a.png", self.src, 32, 32)
+        self.assertIs(a, b)
+        self.assertEqual(a.size, (32, 32))
+        stats = self.cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+
+    def test_key_includes_size_and_resample(self):
+        self.cache.get("a.png", self.src, 32, 32)
+        self.cache.get("a.png", self.src, 16, 16)
+        self.cache.get("a.png", self.src, 32, 32, resample=Image.NEAREST)
+        self.assertEqual(self.cache.stats()["misses"], 3)
+
+    def test_lru_eviction_respects_budget(self):
+        for name in ("a", "b", "c"):
+            self.cache.get(name, self.src, 32, 32)
+        # touch "a" so "b" becomes the least recently used
+        self.cache.get("a", self.src, 32, 32)
+        self.cache.get("d", self.src, 32, 32)
+        self.assertEqual(len(self.cache), 3)
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+        self.assertLessEqual(self.cache.stats()["bytes"], self.cache.max_bytes)
+        misses = self.cache.misses
+        self.cache.get("a", self.src, 32, 32)
+        self.assertEqual(self.cache.misses, misses)
+        self.cache.get("b", self.src, 32, 32)
+        self.assertEqual(self.cache.misses, misses + 1)
+
+    def test_callable_source_only_loaded_on_miss(self):
+        calls = []
+
+        def load():
+            calls.append(1)
+            return self.src
+
+        self.cache.get("lazy", load, 32, 32)
+        self.cache.get("lazy", load, 32, 32)
+        self.assertEqual(len(calls), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
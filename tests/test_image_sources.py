@@ -0,0 +1,74 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from PIL import Image
+
+from image_sources import SourceStore, decode_source
+
+
+class TestSourceStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.paths = []
+        for i, ext in enumerate(("jpg", "png", "png")):
+            path = os.path.join(self.tmpdir.name, f"{i}.{ext}")
+            Image.new("RGB", (1600, 1200), (i * 50, 10, 10)).save(path)
+            self.paths.append(path)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_decodes_at_reduced_scale(self):
+        for path in self.paths[:2]:
+            img = decode_source(path, 150)
+            self.assertEqual(min(img.size), 150)
+            self.assertAlmostEqual(img.width / img.height, 4 / 3, places=2)
+        # never upscaled
+        self.assertEqual(decode_source(self.paths[1], 5000).size, (1600, 1200))
+
+    def test_shared_with_refcounts(self):
+        store = SourceStore(max_bytes=1 << 30)
+        store.acquire(self.paths[:2])
+        store.acquire(self.paths[:1])
+        first = store.get(self.paths[0], 100)
+        self.assertIs(store.get(self.paths[0], 80), first)
+        self.assertEqual(store.stats()["decodes"], 1)
+        # a larger card decodes again at the new size
+        self.assertEqual(min(store.get(self.paths[0], 300).size), 300)
+        store.release(self.paths[:2])
+        self.assertEqual(store.stats()["referenced"], 1)
+        store.release(self.paths[:1])
+        self.assertEqual(store.stats()["bytes"], 0)
+        self.assertEqual(store.stats()["sources"], 0)
+
+    def test_concurrent_gets_decode_once(self):
+        store = SourceStore(max_bytes=1 << 30)
+        store.acquire(self.paths[:1])
+        threads = [threading.Thread(target=store.get, args=(self.paths[0], 200)) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(store.stats()["decodes"], 1)
+
+    def test_budget_evicts_unreferenced_first(self):
+        one = 200 * 150 * 3
+        store = SourceStore(max_bytes=2 * one)
+        store.acquire(self.paths[:2])
+        loaders = [store.loader(p, 150) for p in self.paths]
+        loaders[0](64)
+        loaders[2](64)  # not held by any window
+        loaders[1](64)
+        stats = store.stats()
+        self.assertLessEqual(stats["bytes"], 2 * one)
+        self.assertEqual((stats["decoded"], stats["evictions"]), (2, 1))
+        # the evicted source is decoded again when needed
+        loaders[2](64)
+        self.assertEqual(store.stats()["decodes"], 4)
+        self.assertIn("MiB", store.report())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import queue
+import unittest
+
+from image_workers import DecodePool, RenderJob
+
+
+class TestDecodePool(unittest.TestCase):
+    def test_job_runs_once_even_if_queued_twice(self):
+        calls = []
+        job = RenderJob("a", lambda: calls.append(1) or "done")
+        self.assertEqual(job.run(), "done")
+        self.assertIsNone(job.run())
+        self.assertEqual(len(calls), 1)
+
+    def test_cancelled_job_is_skipped(self):
+        job = RenderJob("a", lambda: "done")
+        job.cancelled = True
+        self.assertIsNone(job.run())
+
+    def test_results_and_errors_reach_the_outbox(self):
+        pool = DecodePool(workers=2)
+        outbox = queue.SimpleQueue()
+
+        def boom():
+            raise OSError("unreadable")
+
+        ok = RenderJob("ok", lambda: 42)
+        bad = RenderJob("bad", boom)
+        pool.submit(ok, outbox)
+        pool.submit(bad, outbox)
+        pool.submit(ok, outbox, priority=0)  # bumped duplicate, delivered once
+        results = dict(outbox.get(timeout=5) for _ in range(2))
+        self.assertEqual(results["ok"], 42)
+        self.assertIsInstance(results["bad"], OSError)
+        with self.assertRaises(queue.Empty):
+            outbox.get(timeout=0.2)
+
+
+if __name__ == '__main__':
+    unittest.main()
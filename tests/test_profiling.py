@@ -0,0 +1,70 @@
+import os
+import tempfile
+import time
+import unittest
+
+from profiling import LatencyHistogram, Profiler
+
+
+class _Target:
+    def work(self, delay=0.0):
+        time.sleep(delay)
+        return "ok"
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_percentiles_are_bucket_upper_bounds(self):
+        h = LatencyHistogram("x")
+        for ms in [0.1] * 90 + [3.0] * 9 + [50.0]:
+            h.record(ms)
+        self.assertEqual(h.count, 100)
+        self.assertLessEqual(h.percentile(0.5), 0.125)
+        self.assertGreaterEqual(h.percentile(0.95), 3.0)
+        self.assertLessEqual(h.percentile(0.95), 4.0)
+        self.assertEqual(h.percentile(1.0), 50.0)
+        self.assertEqual(sum(n for _edge, n in h.buckets()), 100)
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.profiler = Profiler(stall_ms=50)
+        self.original = _Target.work
+
+    def tearDown(self):
+        self.profiler.disable()
+
+    def test_enable_wraps_and_disable_restores(self):
+        self.profiler.enable(targets=[(_Target, "work", "work")])
+        self.assertIsNot(_Target.work, self.original)
+        self.assertEqual(_Target().work(), "ok")
+        self.assertEqual(self.profiler.histograms["work"].count, 1)
+        self.profiler.disable()
+        self.assertIs(_Target.work, self.original)
+
+    def test_stall_records_running_callback(self):
+        self.profiler.enable(targets=[(_Target, "work", "work")])
+        self.profiler.beat()
+        _Target().work(0.3)  # blocks "the event loop"
+        self.profiler.beat()
+        self.assertEqual(len(self.profiler.stalls), 1)
+        _at, ms, callback = self.profiler.stalls[0]
+        self.assertGreaterEqual(ms, 200)
+        self.assertIn("work", callback)
+
+    def test_report_is_written(self):
+        self.profiler.enable(targets=[(_Target, "work", "work")])
+        _Target().work()
+        fd, path = tempfile.mkstemp(suffix=".tsv")
+        os.close(fd)
+        try:
+            self.profiler.dump(path)
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+        finally:
+            os.remove(path)
+        self.assertTrue(text.startswith("metric\tcount"))
+        self.assertIn("\nwork\t1\t", text)
+
+
+if __name__ == '__main__':
+    unittest.main()
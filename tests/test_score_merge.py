@@ -0,0 +1,83 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import score_merge
+from score_merge import iter_entries, merge_scores
+from scores import _load_scores
+
+
+class TestScoreMerge(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp(prefix="memorama_merge_test_")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _file(self, name, text):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def test_parses_both_formats_across_chunk_boundaries(self):
+        text = ('[{"name": "Ana \\"la\\" \\u00c1guila \\ud83d\\ude00", "score": 900, "difficulty": "easy",'
+                ' "extra": [1, {"a": null}]}, {"score": 5}, 7, {"name": "Luis", "score": 1e2}]')
+        expected = [(("Ana \"la\" Águila 😀", "facil"), 900), (("Luis", "dificil"), 100)]
+        for chunk in (1, 3, 1 << 16):
+            self.assertEqual(list(iter_entries(io.StringIO(text), chunk)), expected)
+        legacy = '{\n    "fernando": 820,\n    "gg": 860\n}'
+        self.assertEqual(list(iter_entries(io.StringIO(legacy), 2)),
+                         [(("fernando", "dificil"), 820), (("gg", "dificil"), 860)])
+        with self.assertRaises(ValueError):
+            list(iter_entries(io.StringIO('[{"name": "x", "score": 1}'), 4))
+        # valid JSON, but no integer score
+        huge = '[{"name": "a", "score": 1e999}, {"name": "b", "score": -1e999}, {"name": "c", "score": 2}]'
+        self.assertEqual(list(iter_entries(io.StringIO(huge))), [(("c", "dificil"), 2)])
+
+    def test_keeps_the_best_per_name_and_difficulty(self):
+        a = self._file("a.json", '{"ana": 100, "beto": 300}')
+        b = self._file("b.json", '[{"name": "ana", "score": 250, "difficulty": "dificil"},'
+                                 ' {"name": "ana", "score": 50, "difficulty": "facil"},'
+                                 ' {"name": "beto", "score": 200, "difficulty": "hard"}]')
+        out = os.path.join(self.tmpdir, "out.json")
+        result = merge_scores([a, b], out)
+        self.assertEqual((result.files, result.entries, result.written, result.runs), (2, 5, 3, 0))
+        self.assertEqual(_load_scores(out), [
+            {"name": "ana", "score": 250, "difficulty": "dificil"},
+            {"name": "ana", "score": 50, "difficulty": "facil"},
+            {"name": "beto", "score": 300, "difficulty": "dificil"},
+        ])
+
+    def test_spills_sorted_runs_and_merges_them(self):
+        paths = []
+        for n in range(6):
+            entries = ", ".join(f'{{"name": "p{i:03d}\\tx", "score": {i * 10 + n}, "difficulty": "medio"}}'
+                                for i in range(40))
+            paths.append(self._file(f"{n}.json", f"[{entries}]"))
+        out = os.path.join(self.tmpdir, "out.json")
+        with mock.patch.object(score_merge, "MAX_FANIN", 3):
+            result = merge_scores(paths, out, max_entries=7)
+        self.assertGreater(result.runs, 3)
+        merged = _load_scores(out)
+        self.assertEqual(len(merged), 40)
+        self.assertEqual(merged[0], {"name": "p000\tx", "score": 5, "difficulty": "medio"})
+        self.assertEqual(merged[-1]["score"], 395)
+        self.assertEqual(os.listdir(self.tmpdir).count("out.json"), 1)
+
+    def test_invalid_input_leaves_the_output_alone(self):
+        out = self._file("out.json", '{"ana": 1}')
+        bad = self._file("bad.json", '[{"name": "x",')
+        with contextlib.redirect_stderr(io.StringIO()) as err:
+            self.assertEqual(score_merge.main([out, bad, "--output", out]), 1)
+        self.assertIn("bad.json", err.getvalue())
+        with open(out, encoding="utf-8") as f:
+            self.assertEqual(f.read(), '{"ana": 1}')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import scores
+from score_queue import ScoreWriter
+
+
+class TestScoreWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "scores.json")
+
+    def tearDown(self):
+        scores.close_stores()
+        self.tmpdir.cleanup()
+
+    def test_saves_in_background_and_reports_standing(self):
+        writer = ScoreWriter()
+        result = writer.submit("Ana", 300, "medio", path=self.path).result(5)
+        self.assertTrue(result.saved)
+        self.assertEqual((result.standing.best, result.standing.rank), (300, 1))
+        self.assertEqual(scores.read_scores(self.path)[0]["score"], 300)
+
+    def test_submit_does_not_wait_for_the_disk(self):
+        release = threading.Event()
+        writer = ScoreWriter()
+        with mock.patch("scores.write_score", side_effect=lambda *a, **k: release.wait(5)):
+            future = writer.submit("Ana", 300, "medio", path=self.path)
+            self.assertFalse(future.done())
+            self.assertEqual(writer.pending(), 1)
+            self.assertFalse(writer.flush(0.01))
+            release.set()
+            self.assertTrue(writer.flush(5))
+        self.assertEqual(writer.pending(), 0)
+
+    def test_retries_then_gives_up(self):
+        calls = []
+
+        def flaky(*args, **kwargs):
+            calls.append(args)
+            if len(calls) < 3:
+                raise OSError("disco ocupado")
+
+        writer = ScoreWriter(retries=2, backoff=0.001)
+        with mock.patch("scores.write_score", side_effect=flaky):
+            self.assertTrue(writer.submit("Ana", 1, "facil", path=self.path).result(5).saved)
+        self.assertEqual(len(calls), 3)
+
+        with mock.patch("scores.write_score", side_effect=OSError("sin espacio")):
+            result = writer.submit("Ana", 1, "facil", path=self.path).result(5)
+        self.assertFalse(result.saved)
+        self.assertEqual(result.error, "sin espacio")
+
+
+if __name__ == "__main__":
+    unittest.main()
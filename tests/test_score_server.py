@@ -0,0 +1,148 @@
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+
+import scores
+import score_server
+from score_server import Leaderboard, ScoreServer, ServerScoreStore
+
+
+class TestLeaderboard(unittest.TestCase):
+    def test_orders_match_sqlite_store(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = scores.SqliteScoreStore(os.path.join(tmp, "s.sqlite3"))
+            board = Leaderboard()
+            rows = [(f"p{i % 7}", (i * 37) % 101, scores.DIFFICULTIES[i % 3]) for i in range(60)]
+            store.upsert_many(rows)
+            for row in rows:
+                board.upsert(*row)
+            for order in scores.SORT_COLUMNS:
+                for desc in (True, False):
+                    for diff in (None, "medio"):
+                        got = [(e["name"], e["score"], e["difficulty"])
+                               for e in board.query(diff, "", order, desc, 0, 100)]
+                        want = [(e["name"], e["score"], e["difficulty"])
+                                for e in store.query(diff, "", order, desc, 0, 100)]
+                        if order == "score":
+                            self.assertEqual(got, want)
+                        else:
+                            # ties in the sort column may come in any order
+                            self.assertEqual(sorted(got), sorted(want))
+                            key = 0 if order == "name" else 2
+                            self.assertEqual([g[key] for g in got], [w[key] for w in want])
+            self.assertEqual(board.count("facil", "p1"), store.count("facil", "p1"))
+            self.assertEqual(board.rank("p3", "dificil"), store.rank("p3", "dificil"))
+            store.close()
+
+
+class TestScoreServer(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "scores.json")
+        self.address = os.path.join(self.tmpdir.name, "scores.sock")
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.server = None
+
+    def tearDown(self):
+        if self.server is not None:
+            self._call(self.server.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+        self.loop.close()
+        scores.close_stores()
+        self.tmpdir.cleanup()
+
+    def _call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(10)
+
+    def _start(self, group_ms=5.0):
+        self.server = ScoreServer(self.path, group_ms=group_ms)
+        self._call(self.server.start(self.address))
+
+    def test_client_roundtrip(self):
+        self._start()
+        client = ServerScoreStore(self.path, self.address)
+        client.upsert("Ana\tB", 120, "facil")
+        client.upsert("Ana\tB", 90, "facil")
+        client.upsert("Luis", 200, "facil")
+        self.assertEqual(client.count("facil"), 2)
+        self.assertEqual(client.query("facil")[1], {"name": "Ana\tB", "score": 120, "difficulty": "facil"})
+        self.assertEqual(client.rank("Ana\tB", "facil").rank, 2)
+        self.assertIsNone(client.rank("nadie", "facil"))
+        with self.assertRaises(ValueError):
+            client.query(order_by="edad")
+        # the writes reached the database
+        db = scores.get_store(self.path, "sqlite")
+        self.assertEqual(db.count("facil"), 2)
+        client.close()
+
+    def test_concurrent_writes_share_commits(self):
+        self._start(group_ms=20.0)
+        clients = [ServerScoreStore(self.path, self.address) for _ in range(20)]
+        threads = [threading.Thread(target=c.upsert, args=(f"p{i}", i, "medio")) for i, c in enumerate(clients)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        writes, commits, entries = clients[0].stats()
+        self.assertEqual((writes, entries), (20, 20))
+        self.assertLess(commits, 20)
+        for c in clients:
+            c.close()
+
+    def test_falls_back_to_file_when_server_is_down(self):
+        client = ServerScoreStore(self.path, self.address)
+        client.upsert("Eva", 50, "dificil")
+        self.assertEqual(client.query(), [{"name": "Eva", "score": 50, "difficulty": "dificil"}])
+        self.assertIsNone(client.stats())
+        # a server started later sees the scores written meanwhile
+        self._start()
+        client._down_until = 0.0
+        self.assertEqual(client.stats()[2], 1)
+        client.close()
+
+    def test_commit_during_reload_is_not_lost(self):
+        self._start()
+        read_all = self.server.store.all
+
+        def slow_all():
+            # the snapshot is taken before the write below is committed
+            rows = read_all()
+            threading.Event().wait(0.2)
+            return rows
+
+        async def scenario():
+            self.server.store.all = slow_all
+            reload = asyncio.ensure_future(self.server._reload())
+            await asyncio.sleep(0.05)
+            await self.server.write("Ana", 70, "facil")
+            await reload
+
+        self._call(scenario())
+        self.assertEqual(self.server.board.count("facil"), 1)
+
+    def test_reloads_writes_from_other_processes(self):
+        self._start()
+        old = score_server.RELOAD_INTERVAL
+        score_server.RELOAD_INTERVAL = 0.01
+        try:
+            self._call(self.server.close())
+            self._start()
+            client = ServerScoreStore(self.path, self.address)
+            scores.get_store(self.path, "sqlite").upsert("Otro", 10, "facil")
+            for _ in range(200):
+                if client.count() == 1:
+                    break
+                threading.Event().wait(0.01)
+            self.assertEqual(client.count(), 1)
+            client.close()
+        finally:
+            score_server.RELOAD_INTERVAL = old
+
+
+if __name__ == "__main__":
+    unittest.main()
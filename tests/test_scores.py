@@ -1,3 +1,4 @@
+import multiprocessing
 import os
 import tempfile
 import unittest
@@ -5,6 +6,11 @@ import unittest
 import scores
 
 
+def _write_many(path, worker, count):
+    for i in range(count):
+        scores.write_score(f"p{worker}_{i}", i, path=path)
+
+
 class TestScores(unittest.TestCase):
     def setUp(self):
         fd, self.tmp = tempfile.mkstemp(prefix="scores_", suffix=".json")
@@ -14,10 +20,12 @@ class TestScores(unittest.TestCase):
             f.write("{}")
 
     def tearDown(self):
-        try:
-            os.remove(self.tmp)
-        except FileNotFoundError:
-            pass
+        scores.close_stores()
+        for p in (self.tmp, scores.sqlite_path(self.tmp), self.tmp + ".lock"):
+            try:
+                os.remove(p)
+            except FileNotFoundError:
+                pass
 
     def test_write_and_keep_highest(self):
         scores.write_score("Alice", 100, path=self.tmp)
@@ -51,6 +59,106 @@ class TestScores(unittest.TestCase):
         self.assertEqual(easy["score"], 100)
         self.assertEqual(hard["score"], 150)
 
+    def test_migrates_legacy_dict_format(self):
+        # format written by json.py: {name: score}, assumed 'dificil'
+        with open(self.tmp, "w", encoding="utf-8") as f:
+            f.write('{"fernando": 820, "gg": 860}')
+        data = scores.read_scores(path=self.tmp)
+        self.assertEqual([(e["name"], e["score"], e["difficulty"]) for e in data],
+                         [("gg", 860, "dificil"), ("fernando", 820, "dificil")])
+
+    def test_reimports_legacy_file_when_it_changes(self):
+        scores.write_score("Eva", 300, difficulty="facil", path=self.tmp)
+        with open(self.tmp, "w", encoding="utf-8") as f:
+            f.write('[{"name": "Eva", "score": 500, "difficulty": "facil"},'
+                    ' {"name": "Leo", "score": 10, "difficulty": "medio"}]')
+        os.utime(self.tmp, ns=(1, 1))
+        data = scores.read_scores(path=self.tmp)
+        self.assertEqual(len(data), 2)
+        self.assertEqual(data[0], {"name": "Eva", "score": 500, "difficulty": "facil"})
+
+    def test_json_backend_keeps_list_format(self):
+        store = scores.get_store(self.tmp, backend="json")
+        store.upsert("Ana", 90, "medio")
+        store.upsert("Ana", 80, "medio")
+        self.assertEqual(scores._load_scores(self.tmp), [{"name": "Ana", "score": 90, "difficulty": "medio"}])
+
+    def test_concurrent_writers_do_not_lose_updates(self):
+        scores.close_stores()
+        procs = [multiprocessing.Process(target=_write_many, args=(self.tmp, w, 25)) for w in range(4)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        self.assertEqual(len(scores.read_scores(path=self.tmp)), 100)
+
+    def test_query_pages_filters_and_orders(self):
+        for i in range(30):
+            scores.write_score(f"jugador{i:02d}", i * 10, difficulty="facil" if i % 2 else "medio", path=self.tmp)
+        top = scores.top_scores("facil", 3, path=self.tmp)
+        self.assertEqual([e["score"] for e in top], [290, 270, 250])
+        page = scores.query_scores(offset=5, limit=5, path=self.tmp)
+        self.assertEqual([e["score"] for e in page], [240, 230, 220, 210, 200])
+        by_name = scores.query_scores(order_by="name", descending=False, limit=2, path=self.tmp)
+        self.assertEqual([e["name"] for e in by_name], ["jugador00", "jugador01"])
+        found = scores.query_scores(name_prefix="jugador1", path=self.tmp)
+        self.assertEqual(len(found), 10)
+        self.assertEqual(scores.count_scores("medio", path=self.tmp), 15)
+        self.assertEqual(scores.count_scores(name_prefix="jugador2", path=self.tmp), 10)
+        with self.assertRaises(ValueError):
+            scores.query_scores(order_by="rowid", path=self.tmp)
+
+    def test_json_backend_query_matches(self):
+        store = scores.get_store(self.tmp, backend="json")
+        for name, sc in (("Bea", 30), ("Ari", 50), ("Beto", 40)):
+            store.upsert(name, sc, "facil")
+        self.assertEqual([e["name"] for e in store.query(name_prefix="Be")], ["Beto", "Bea"])
+        self.assertEqual(store.count(difficulty="facil"), 3)
+
+    def test_rank_percentile_and_gap(self):
+        for name, sc in (("Ana", 900), ("Beto", 800), ("Caro", 800), ("Dani", 500), ("Eva", 300)):
+            scores.write_score(name, sc, difficulty="facil", path=self.tmp)
+        scores.write_score("Ana", 100, difficulty="medio", path=self.tmp)
+        info = scores.rank_for("Dani", "facil", path=self.tmp)
+        self.assertEqual((info.best, info.rank, info.total), (500, 4, 5))
+        self.assertAlmostEqual(info.percentile, 40.0)
+        self.assertEqual((info.next_score, info.next_rank, info.gap), (800, 2, 300))
+        self.assertIsNone(scores.rank_for("Ana", "facil", path=self.tmp).next_score)
+        self.assertIsNone(scores.rank_for("Nadie", "facil", path=self.tmp))
+        # loaded ranks follow later writes of this process...
+        scores.write_score("Dani", 850, difficulty="facil", path=self.tmp)
+        self.assertEqual(scores.rank_for("Dani", "facil", path=self.tmp).rank, 2)
+        # ...and of other connections
+        other = scores.SqliteScoreStore(scores.sqlite_path(self.tmp))
+        other.upsert("Fede", 990, "facil")
+        other.close()
+        info = scores.rank_for("Dani", "facil", path=self.tmp)
+        self.assertEqual((info.rank, info.total), (3, 6))
+
+    def test_json_backend_rank(self):
+        store = scores.get_store(self.tmp, backend="json")
+        for name, sc in (("Ana", 70), ("Beto", 50), ("Caro", 90)):
+            store.upsert(name, sc, "dificil")
+        info = store.rank("Beto", "dificil")
+        self.assertEqual((info.rank, info.total, info.gap), (3, 3, 20))
+
+    def test_score_ranks_match_sorting(self):
+        import random
+        rng = random.Random(5)
+        values = [rng.randrange(0, 1001, 20) for _ in range(500)]
+        counts = {}
+        for v in values[:400]:
+            counts[v] = counts.get(v, 0) + 1
+        ranks = scores.ScoreRanks(counts)
+        for v in values[400:]:
+            ranks.add(v)
+        ranks.add(values[0], -1)
+        kept = sorted(values[1:])
+        for probe in range(-10, 1010, 7):
+            above = [v for v in kept if v > probe]
+            self.assertEqual(ranks.count_above(probe), len(above))
+            self.assertEqual(ranks.next_above(probe), min(above) if above else None)
+
 
 if __name__ == '__main__':
     unittest.main()
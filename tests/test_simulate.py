@@ -0,0 +1,34 @@
+import random
+import unittest
+
+import simulate
+from engine import MemoryEngine
+
+
+class TestSimulate(unittest.TestCase):
+    def test_players_finish_the_board(self):
+        rng = random.Random(3)
+        for model, play in simulate.PLAYERS.items():
+            eng = MemoryEngine(4, 4, rng=rng)
+            attempts = play(eng, rng, 0.3)
+            self.assertTrue(eng.done, model)
+            self.assertGreaterEqual(attempts, eng.pairs)
+
+    def test_perfect_memory_beats_random(self):
+        _task, perfect = simulate.run_chunk((4, 4, "perfect", 0.0, 300, 1))
+        _task, rand = simulate.run_chunk((4, 4, "random", 1.0, 300, 1))
+        mean = lambda h: sum(a * n for a, n in h.items()) / sum(h.values())
+        self.assertEqual(sum(perfect.values()), 300)
+        self.assertLess(mean(perfect), mean(rand))
+
+    def test_tasks_cover_all_games(self):
+        tasks = list(simulate.make_tasks([(4, 4), (5, 6)], ["random", "decay"], 0.2, 2500, 1000, 7))
+        self.assertEqual(sum(t[4] for t in tasks), 4 * 2500)
+        self.assertEqual(len({t[5] for t in tasks}), len(tasks))
+
+    def test_parse_grids_pads_odd_squares(self):
+        self.assertEqual(simulate.parse_grids("4,5,8x10"), [(4, 4), (5, 6), (8, 10)])
+
+
+if __name__ == '__main__':
+    unittest.main()
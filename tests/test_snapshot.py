@@ -0,0 +1,84 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import snapshot
+from engine import MemoryEngine, FIRST, MATCH, MISMATCH
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp(prefix="memorama_snapshot_")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _played(self, rows=6, cols=6, seed=11):
+        engine = MemoryEngine(rows, cols, seed=seed)
+        vals = list(engine.values)
+        j = vals.index(vals[0], 1)
+        self.assertEqual(engine.click(0), FIRST)
+        self.assertEqual(engine.click(j), MATCH)
+        k = next(i for i in range(len(vals)) if i not in (0, j))
+        engine.click(k)
+        return engine, k
+
+    def test_round_trip_restores_without_dealing(self):
+        engine, k = self._played()
+        snap = snapshot.take(engine, "Ana", "dificil", "ImagenesPython")
+        data = snapshot.encode(snap)
+        self.assertLess(len(data), 160)
+        back = snapshot.decode(data)
+        self.assertEqual(back, snap)
+        other = MemoryEngine(6, 6, seed=99)
+        snapshot.restore(back, other)
+        self.assertEqual(list(other.values), list(engine.values))
+        self.assertEqual((other.seed, other.matched, other.first, other.attempts, other.matches),
+                         (engine.seed, engine.matched, k, 1, 1))
+
+    def test_mismatched_pair_is_saved_turned_back(self):
+        engine = MemoryEngine(2, 2, values=[0, 1, 0, 1])
+        engine.click(0)
+        self.assertEqual(engine.click(1), MISMATCH)
+        snap = snapshot.decode(snapshot.encode(snapshot.take(engine)))
+        self.assertEqual((snap.first, snap.attempts, snap.seed), (-1, 1, None))
+
+    def test_damaged_or_foreign_data_is_rejected(self):
+        engine, _k = self._played()
+        data = snapshot.encode(snapshot.take(engine, "Ana"))
+        for bad in (data[:-1], data[:20], b"MREC" + data[4:], data[:4] + b"\x09" + data[5:],
+                    data[:30] + bytes((data[30] ^ 1,)) + data[31:]):
+            with self.assertRaises(ValueError):
+                snapshot.decode(bad)
+        with self.assertRaises(ValueError):
+            snapshot.restore(snapshot.decode(data), MemoryEngine(4, 4))
+
+    def test_atomic_save_is_fast(self):
+        engine, _k = self._played(40, 40)
+        path = os.path.join(self.tmpdir, "a" + snapshot.SUFFIX)
+        snapshot.save(snapshot.take(engine, "Ana"), path)
+        self.assertEqual(os.listdir(self.tmpdir), [os.path.basename(path)])
+        n = 50
+        t0 = time.perf_counter()
+        for _ in range(n):
+            snapshot.save(snapshot.take(engine, "Ana"), path)
+        self.assertLess((time.perf_counter() - t0) / n, 0.005)
+        self.assertEqual(snapshot.load(path).values, engine.values)
+        self.assertIsNone(snapshot.load(os.path.join(self.tmpdir, "missing")))
+
+    def test_path_per_player_and_difficulty(self):
+        os.environ[snapshot.SUSPENDED_ENV] = self.tmpdir
+        try:
+            a = snapshot.snapshot_path("Ana/..", "facil")
+            self.assertEqual(os.path.dirname(a), self.tmpdir)
+            self.assertNotEqual(a, snapshot.snapshot_path("Ana/..", "medio"))
+            os.environ[snapshot.SUSPENDED_ENV] = "0"
+            self.assertIsNone(snapshot.snapshot_path("Ana", "facil"))
+        finally:
+            del os.environ[snapshot.SUSPENDED_ENV]
+
+
+if __name__ == '__main__':
+    unittest.main()
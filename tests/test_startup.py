@@ -0,0 +1,29 @@
+import unittest
+
+from startup import StartupTimer
+
+
+class TestStartupTimer(unittest.TestCase):
+    def test_marks_are_relative_to_t0(self):
+        timer = StartupTimer()
+        first = timer.mark("import menu")
+        second = timer.mark("first paint")
+        self.assertGreaterEqual(first, 0.0)
+        self.assertGreaterEqual(second, first)
+        self.assertEqual(timer.get("first paint"), second)
+        self.assertIsNone(timer.get("missing"))
+
+    def test_budget_verdict(self):
+        timer = StartupTimer()
+        # without a first paint the budget counts as exceeded
+        self.assertTrue(timer.over_budget(1000.0))
+        timer.marks.append(("first paint", 120.0))
+        self.assertFalse(timer.over_budget(1000.0))
+        self.assertTrue(timer.over_budget(100.0))
+        report = timer.report(100.0)
+        self.assertIn("first paint", report)
+        self.assertIn("EXCEDIDO", report)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+import theme_manifest
+from theme_manifest import load_manifest, natural_key
+
+
+class TestThemeManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp(prefix="memorama_manifest_")
+        self.theme = os.path.join(self.tmpdir, "tema")
+        os.mkdir(self.theme)
+        for i in (1, 2, 10):
+            Image.new("RGB", (30, 20), (i * 20, 0, 0)).save(os.path.join(self.theme, f"{i}.png"))
+
+    def tearDown(self):
+        theme_manifest._manifests.clear()
+        theme_manifest._canonical.clear()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _touch_dir(self, offset_ns):
+        st = os.stat(self.theme)
+        os.utime(self.theme, ns=(st.st_atime_ns, st.st_mtime_ns + offset_ns))
+
+    def test_natural_order_and_default_back(self):
+        self.assertLess(natural_key("2.png"), natural_key("10.png"))
+        m = load_manifest(self.theme)
+        self.assertEqual(m.faces, ["1.png", "2.png", "10.png"])
+        self.assertEqual(os.path.normpath(os.path.join(self.theme, m.back)), theme_manifest.DEFAULT_BACK)
+        self.assertEqual((m.images["10.png"].width, m.images["10.png"].height), (30, 20))
+        self.assertTrue(os.path.exists(theme_manifest.manifest_path(self.theme)))
+
+    def test_named_back_is_never_a_face(self):
+        Image.new("RGB", (30, 20)).save(os.path.join(self.theme, "Reverso.jpg"))
+        m = load_manifest(self.theme)
+        self.assertEqual(m.back, "Reverso.jpg")
+        self.assertNotIn("Reverso.jpg", m.faces)
+
+    def test_reloads_only_on_change(self):
+        first = load_manifest(self.theme)
+        with mock.patch("theme_manifest._digest", wraps=theme_manifest._digest) as digest:
+            self.assertIs(load_manifest(self.theme), first)
+            # the directory changed but no image did: same manifest, no hashing
+            self._touch_dir(10 ** 9)
+            theme_manifest._manifests.clear()
+            theme_manifest._manifests[os.path.abspath(self.theme)] = first
+            self.assertIs(load_manifest(self.theme), first)
+            self.assertEqual(digest.call_count, 0)
+            Image.new("RGB", (30, 20), (0, 99, 0)).save(os.path.join(self.theme, "3.png"))
+            self._touch_dir(2 * 10 ** 9)
+            second = load_manifest(self.theme)
+            self.assertEqual(digest.call_count, 1)
+        self.assertIsNot(second, first)
+        self.assertEqual(second.faces, ["1.png", "2.png", "3.png", "10.png"])
+
+    def test_cached_file_is_used_by_a_new_process(self):
+        load_manifest(self.theme)
+        theme_manifest._manifests.clear()
+        with mock.patch("theme_manifest._describe") as describe:
+            m = load_manifest(self.theme)
+        describe.assert_not_called()
+        self.assertEqual(m.faces, ["1.png", "2.png", "10.png"])
+
+    def test_identical_files_share_one_path(self):
+        other = os.path.join(self.tmpdir, "copia")
+        shutil.copytree(self.theme, other)
+        a, b = load_manifest(self.theme), load_manifest(other)
+        self.assertEqual(a.path("2.png"), os.path.join(self.theme, "2.png"))
+        self.assertEqual(b.path("2.png"), a.path("2.png"))
+        self.assertNotEqual(a.path("1.png"), a.path("2.png"))
+
+    def _rewrite(self, path, color):
+        # same size and directory mtime; only the file's own mtime moves
+        st, dir_st = os.stat(path), os.stat(os.path.dirname(path))
+        Image.new("RGB", (30, 20), color).save(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+        os.utime(os.path.dirname(path), ns=(dir_st.st_atime_ns, dir_st.st_mtime_ns))
+
+    def test_image_overwritten_in_place_is_rescanned(self):
+        first = load_manifest(self.theme)
+        old = first.images["2.png"].digest
+        self._rewrite(os.path.join(self.theme, "2.png"), (0, 200, 0))
+        second = load_manifest(self.theme)
+        self.assertIsNot(second, first)
+        self.assertNotEqual(second.images["2.png"].digest, old)
+        self.assertEqual(second.images["1.png"], first.images["1.png"])
+
+    def test_changed_canonical_file_is_not_shared(self):
+        other = os.path.join(self.tmpdir, "copia")
+        shutil.copytree(self.theme, other)
+        a, b = load_manifest(self.theme), load_manifest(other)
+        a.path("1.png")
+        self.assertEqual(b.path("1.png"), os.path.join(self.theme, "1.png"))
+        self._rewrite(os.path.join(self.theme, "1.png"), (0, 200, 0))
+        self.assertEqual(b.path("1.png"), os.path.join(other, "1.png"))
+        a = load_manifest(self.theme)
+        self.assertEqual(a.path("1.png"), os.path.join(self.theme, "1.png"))
+
+
+if __name__ == '__main__':
+    unittest.main()
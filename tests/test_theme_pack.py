@@ -0,0 +1,63 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from PIL import Image
+
+import theme_pack
+
+
+class TestThemePack(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp(prefix="memorama_pack_")
+        self.theme = os.path.join(self.tmpdir, "tema")
+        os.mkdir(self.theme)
+        for i in range(5):
+            Image.new("RGB", (80, 40), (i * 40, 10, 200 - i * 40)).save(os.path.join(self.theme, f"{i+1}.png"))
+
+    def tearDown(self):
+        theme_pack._packs.clear()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_compile_and_read_back(self):
+        Image.new("RGB", (40, 40), (0, 0, 90)).save(os.path.join(self.theme, "reverso.png"))
+        path = theme_pack.compile_theme(self.theme, sizes=(16, 32))
+        self.assertEqual(path, self.theme + theme_pack.PACK_SUFFIX)
+        pack = theme_pack.ThemePack(path)
+        self.assertEqual(pack.back, "reverso.png")
+        self.assertEqual(pack.faces, ["1.png", "2.png", "3.png", "4.png", "5.png"])
+        self.assertEqual(pack.sizes, [16, 32])
+        card = pack.view(3, 32)
+        self.assertEqual(card.size, (32, 32))
+        expected = Image.open(os.path.join(self.theme, "3.png")).convert("RGB").resize((32, 32), Image.BICUBIC)
+        self.assertEqual(card.tobytes(), expected.tobytes())
+
+    def test_source_for_picks_nearest_larger_size(self):
+        pack = theme_pack.ThemePack(theme_pack.compile_theme(self.theme, sizes=(16, 32)))
+        self.assertEqual(pack.source_for(0, 20).size, (32, 32))
+        self.assertEqual(pack.source_for(0, 16).size, (16, 16))
+        self.assertEqual(pack.source_for(0, 100).size, (32, 32))
+
+    def test_stale_or_missing_pack_is_ignored(self):
+        self.assertIsNone(theme_pack.open_pack(self.theme))
+        path = theme_pack.compile_theme(self.theme, sizes=(16,))
+        self.assertIsNotNone(theme_pack.open_pack(self.theme))
+        # the directory changed after the pack was built
+        os.utime(path, (1, 1))
+        self.assertIsNone(theme_pack.open_pack(self.theme))
+
+    def test_image_overwritten_in_place_makes_the_pack_stale(self):
+        path = theme_pack.compile_theme(self.theme, sizes=(16,))
+        self.assertIsNotNone(theme_pack.open_pack(self.theme))
+        # rewriting a file leaves the directory mtime alone
+        built = os.stat(path).st_mtime_ns
+        os.utime(self.theme, ns=(built - 10 ** 9, built - 10 ** 9))
+        image = os.path.join(self.theme, "3.png")
+        Image.new("RGB", (80, 40), (0, 255, 0)).save(image)
+        os.utime(image, ns=(built + 10 ** 9, built + 10 ** 9))
+        self.assertIsNone(theme_pack.open_pack(self.theme))
+
+
+if __name__ == '__main__':
+    unittest.main()
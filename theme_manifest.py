@@ -0,0 +1,244 @@
+"""
+theme_manifest.py
+
+Cached description of the images of a theme directory.
+
+A manifest lists the back image and the faces of a theme (faces in natural
+order, so ``2.png`` comes before ``10.png``) together with the size, content
+hash and dimensions of every file. It is kept in memory and in
+``<theme_dir>.manifest`` next to the directory, and only rebuilt when the
+directory's mtime or the size or mtime of a listed file changes (an image
+overwritten in place); even then, files whose size and mtime did not change
+keep their stored hash instead of being read again.
+
+The back is explicit: a file named ``back``, ``reverso``, ``dorso`` or
+``fondo`` (any image extension), or the card back shipped in ``photos/``
+when the theme has none. It is never taken from the faces.
+
+Identical files in different themes (the repo ships ``ImagenesPython`` and
+``photos/pythonFotos`` with the same images) resolve to one canonical path
+through their hash, so they are decoded and rendered once for all themes.
+A canonical file that changed or disappeared since it was registered hands
+its place to the next theme that asks.
+
+File format, one tab-separated record per line::
+
+    version 1
+    mtime   <directory mtime, ns>
+    back    <name relative to the theme directory>
+    image   <name> <size> <mtime ns> <hash> <width> <height>
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from PIL import Image
+
+VERSION = 1
+MANIFEST_SUFFIX = ".manifest"
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+BACK_NAMES = ("back", "reverso", "dorso", "fondo")
+DEFAULT_BACK = os.path.join(os.path.dirname(os.path.abspath(__file__)), "photos",
+                            "46949760-blue-back-playing-card.jpg")
+
+
+class ImageInfo(NamedTuple):
+    size: int
+    mtime_ns: int
+    digest: str
+    width: int
+    height: int
+
+
+def natural_key(name: str) -> Tuple:
+    """Sort key that orders the numbers inside names by value."""
+    return tuple(int(part) if part.isdigit() else part.lower() for part in re.split(r"(\d+)", name))
+
+
+def manifest_path(theme_dir: str) -> str:
+    """Return where the manifest of a theme is cached (``ImagenesPython`` -> ``ImagenesPython.manifest``)."""
+    return os.path.normpath(theme_dir) + MANIFEST_SUFFIX
+
+
+def _digest(path: str) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _describe(path: str, st: os.stat_result) -> ImageInfo:
+    with Image.open(path) as img:  # reads the header only
+        width, height = img.size
+    return ImageInfo(st.st_size, st.st_mtime_ns, _digest(path), width, height)
+
+
+class ThemeManifest:
+    """Back, faces and per-file info of one theme.
+
+    Args:
+        theme_dir (str): Directory of the theme.
+        mtime_ns (int): Directory mtime the manifest was built for.
+        back (str): Back image, relative to ``theme_dir``.
+        images (dict): ``ImageInfo`` by file name, back included.
+    """
+
+    def __init__(self, theme_dir: str, mtime_ns: int, back: str, images: Dict[str, ImageInfo]):
+        self.theme_dir = theme_dir
+        self.mtime_ns = mtime_ns
+        self.back = back
+        self.images = images
+        self.faces: List[str] = sorted((n for n in images if n != back), key=natural_key)
+
+    def same_content(self, other: Optional["ThemeManifest"]) -> bool:
+        """True if ``other`` shows the same images as this manifest."""
+        return (other is not None and other.back == self.back and other.faces == self.faces
+                and all(other.images[n].digest == self.images[n].digest for n in self.names))
+
+    @property
+    def names(self) -> List[str]:
+        return [self.back] + self.faces
+
+    def path(self, name: str) -> str:
+        """Canonical file for ``name``: the first file registered with the same content."""
+        info = self.images.get(name)
+        own = os.path.normpath(os.path.join(self.theme_dir, name))
+        if info is None:
+            return own
+        with _lock:
+            entry = _canonical.get(info.digest)
+            if entry is None or (entry[0] != own and not _unchanged(entry[0], entry[1])):
+                entry = _canonical[info.digest] = (own, info)
+        return entry[0]
+
+    def dump(self) -> str:
+        lines = [f"version\t{VERSION}", f"mtime\t{self.mtime_ns}", f"back\t{self.back}"]
+        for name, i in sorted(self.images.items()):
+            lines.append(f"image\t{name}\t{i.size}\t{i.mtime_ns}\t{i.digest}\t{i.width}\t{i.height}")
+        return "\n".join(lines) + "\n"
+
+
+def _parse(theme_dir: str, text: str) -> Optional[ThemeManifest]:
+    mtime = version = None
+    back = ""
+    images: Dict[str, ImageInfo] = {}
+    for line in text.splitlines():
+        kind, *fields = line.split("\t")
+        if kind == "version":
+            version = int(fields[0])
+        elif kind == "mtime":
+            mtime = int(fields[0])
+        elif kind == "back":
+            back = fields[0]
+        elif kind == "image":
+            name, size, mtime_ns, digest, width, height = fields
+            images[name] = ImageInfo(int(size), int(mtime_ns), digest, int(width), int(height))
+    if version != VERSION or mtime is None or back not in images:
+        return None
+    return ThemeManifest(theme_dir, mtime, back, images)
+
+
+def _read_cached(theme_dir: str) -> Optional[ThemeManifest]:
+    try:
+        with open(manifest_path(theme_dir), encoding="utf-8") as f:
+            return _parse(theme_dir, f.read())
+    except (OSError, ValueError, UnicodeDecodeError):
+        return None
+
+
+def _write_cached(manifest: ThemeManifest) -> None:
+    path = manifest_path(manifest.theme_dir)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(manifest.dump())
+        os.replace(tmp, path)
+    except OSError:
+        pass  # read-only install: the manifest is rebuilt in every process
+
+
+def _scan(theme_dir: str, mtime_ns: int, previous: Optional[ThemeManifest]) -> ThemeManifest:
+    known = previous.images if previous is not None else {}
+    images: Dict[str, ImageInfo] = {}
+    back = ""
+    for name in sorted(os.listdir(theme_dir), key=natural_key):
+        stem, ext = os.path.splitext(name)
+        if ext.lower() not in IMAGE_EXTENSIONS:
+            continue
+        path = os.path.join(theme_dir, name)
+        st = os.stat(path)
+        old = known.get(name)
+        if old is not None and (old.size, old.mtime_ns) == (st.st_size, st.st_mtime_ns):
+            images[name] = old
+        else:
+            images[name] = _describe(path, st)
+        if not back and stem.lower() in BACK_NAMES:
+            back = name
+    if not images:
+        raise RuntimeError("No se encontraron imágenes en la carpeta de tema")
+    if not back:
+        try:
+            back = os.path.relpath(DEFAULT_BACK, theme_dir)
+        except ValueError:
+            back = DEFAULT_BACK  # another drive; joining keeps it absolute
+        old = known.get(back)
+        st = os.stat(DEFAULT_BACK)
+        if old is not None and (old.size, old.mtime_ns) == (st.st_size, st.st_mtime_ns):
+            images[back] = old
+        else:
+            images[back] = _describe(DEFAULT_BACK, st)
+    return ThemeManifest(theme_dir, mtime_ns, back, images)
+
+
+def _unchanged(path: str, info: ImageInfo) -> bool:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    return (st.st_size, st.st_mtime_ns) == (info.size, info.mtime_ns)
+
+
+def _files_unchanged(theme_dir: str, manifest: ThemeManifest) -> bool:
+    # rewriting a file in place leaves the directory mtime alone
+    return all(_unchanged(os.path.join(theme_dir, name), info) for name, info in manifest.images.items())
+
+
+# content hash -> first path seen with it and its info then, shared by every theme
+_canonical: Dict[str, Tuple[str, ImageInfo]] = {}
+_manifests: Dict[str, ThemeManifest] = {}
+_lock = threading.Lock()
+
+
+def load_manifest(theme_dir: str) -> ThemeManifest:
+    """Return the manifest of a theme, rebuilding it only if its files changed.
+
+    While the images stay the same, the same object is returned, so callers
+    can compare manifests by identity to know whether to reload.
+
+    Raises:
+        RuntimeError: If the directory has no images.
+    """
+    key = os.path.abspath(theme_dir)
+    mtime_ns = os.stat(theme_dir).st_mtime_ns
+    with _lock:
+        current = _manifests.get(key)
+        if current is not None and current.mtime_ns == mtime_ns and _files_unchanged(theme_dir, current):
+            return current
+        cached = _read_cached(theme_dir)
+        if cached is not None and cached.mtime_ns == mtime_ns and _files_unchanged(theme_dir, cached):
+            fresh = cached
+        else:
+            fresh = _scan(theme_dir, mtime_ns, cached or current)
+            _write_cached(fresh)
+        if fresh.same_content(current):
+            # touched, not changed: keep the object, with the new stats
+            current.mtime_ns = mtime_ns
+            current.images = fresh.images
+            return current
+        _manifests[key] = fresh
+        return fresh
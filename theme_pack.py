@@ -0,0 +1,204 @@
+"""
+theme_pack.py
+
+Precompiled theme packs: the back image and every face of a theme,
+pre-resampled to a ladder of card sizes and stored as raw pixels in one
+file that GameWindow memory-maps instead of decoding the PNGs.
+
+Layout of ``<theme_dir>.mpack``:
+    magic ``MPAK``, u16 version, u16 reserved, u32 manifest length,
+    the manifest (UTF-8, one tab-separated record per line), zero padding
+    up to ``ALIGN`` and then one vertical strip of square cards per size.
+
+Example:
+    python theme_pack.py ImagenesPython --sizes 64,96,128,160,200,256
+"""
+from __future__ import annotations
+
+import argparse
+import mmap
+import os
+import struct
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from PIL import Image
+
+from theme_manifest import load_manifest
+
+MAGIC = b"MPAK"
+VERSION = 1
+HEADER = struct.Struct("<4sHHI")
+ALIGN = 4096
+PACK_SUFFIX = ".mpack"
+DEFAULT_SIZES = (48, 64, 96, 128, 160, 200, 256)
+PACK_MODE = "RGB"
+
+
+def theme_files(theme_dir: str) -> Tuple[str, List[str]]:
+    """Return the back image and the face images of a theme directory.
+
+    Names are relative to ``theme_dir``; see theme_manifest.py for how the
+    back is chosen.
+
+    Raises:
+        RuntimeError: If the directory has no images.
+    """
+    manifest = load_manifest(theme_dir)
+    return manifest.back, manifest.faces
+
+
+def pack_path(theme_dir: str) -> str:
+    """Return where the pack of a theme lives (``ImagenesPython`` -> ``ImagenesPython.mpack``)."""
+    return os.path.normpath(theme_dir) + PACK_SUFFIX
+
+
+def compile_theme(theme_dir: str, out_path: str | None = None,
+                  sizes: Sequence[int] = DEFAULT_SIZES, resample: int = Image.BICUBIC) -> str:
+    """Decode a theme once and write its pack.
+
+    Args:
+        theme_dir (str): Directory with the theme images.
+        out_path (str, optional): Pack file; defaults to ``pack_path(theme_dir)``.
+        sizes (sequence): Card sides, in pixels, to pre-resample.
+        resample (int): PIL resampling filter.
+
+    Returns:
+        str: Path of the written pack.
+    """
+    out_path = out_path or pack_path(theme_dir)
+    sizes = sorted({int(s) for s in sizes if int(s) > 0})
+    back, faces = theme_files(theme_dir)
+    names = [back] + faces
+
+    manifest: List[str] = [f"mode\t{PACK_MODE}", f"back\t{back}"]
+    manifest += [f"face\t{name}" for name in faces]
+    offset = 0
+    for side in sizes:
+        manifest.append(f"size\t{side}\t{offset}")
+        offset += side * side * len(PACK_MODE) * len(names)
+    text = ("\n".join(manifest) + "\n").encode("utf-8")
+    data_start = _align(HEADER.size + len(text))
+
+    tmp = out_path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(text)))
+        f.write(text)
+        f.write(b"\0" * (data_start - HEADER.size - len(text)))
+        for side in sizes:
+            for name in names:
+                with Image.open(os.path.join(theme_dir, name)) as img:
+                    img.draft(PACK_MODE, (side, side))
+                    card = img.convert(PACK_MODE).resize((side, side), resample)
+                f.write(card.tobytes())
+    os.replace(tmp, out_path)
+    return out_path
+
+
+def _align(n: int) -> int:
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+class ThemePack:
+    """Read-only, memory-mapped view of a compiled theme.
+
+    Cards are indexed like the manifest: 0 is the back, 1.. the faces.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        magic, version, _reserved, mlen = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} no es un paquete de tema válido")
+        self.mode = PACK_MODE
+        self.back = ""
+        self.faces: List[str] = []
+        self.levels: Dict[int, int] = {}
+        text = self._map[HEADER.size:HEADER.size + mlen].decode("utf-8")
+        for line in text.splitlines():
+            kind, *fields = line.split("\t")
+            if kind == "mode":
+                self.mode = fields[0]
+            elif kind == "back":
+                self.back = fields[0]
+            elif kind == "face":
+                self.faces.append(fields[0])
+            elif kind == "size":
+                self.levels[int(fields[0])] = int(fields[1])
+        self._data = _align(HEADER.size + mlen)
+        self._count = 1 + len(self.faces)
+        self.sizes = sorted(self.levels)
+
+    @property
+    def names(self) -> List[str]:
+        return [self.back] + self.faces
+
+    def view(self, index: int, side: int) -> Image.Image:
+        """Return card ``index`` at a stored size, backed by the mapped file (no copy)."""
+        bpp = len(self.mode)
+        start = self._data + self.levels[side] + index * side * side * bpp
+        buf = memoryview(self._map)[start:start + side * side * bpp]
+        return Image.frombuffer(self.mode, (side, side), buf, "raw", self.mode, 0, 1)
+
+    def source_for(self, index: int, side: int) -> Image.Image:
+        """Return the smallest stored version of a card that is at least ``side`` pixels."""
+        level = next((s for s in self.sizes if s >= side), self.sizes[-1])
+        return self.view(index, level)
+
+
+# packs are shared by every window; the mapping stays open for the process
+_packs: Dict[str, Tuple[int, ThemePack]] = {}
+
+
+def _newest_source_ns(theme_dir: str) -> int:
+    # the directory mtime covers added and removed images, the files' own an
+    # image overwritten in place
+    newest = os.stat(theme_dir).st_mtime_ns
+    for name in load_manifest(theme_dir).names:
+        newest = max(newest, os.stat(os.path.join(theme_dir, name)).st_mtime_ns)
+    return newest
+
+
+def open_pack(theme_dir: str) -> Optional[ThemePack]:
+    """Return the pack of a theme, or None if there is none or it is stale.
+
+    A pack is stale when the theme directory or any of its images is newer.
+    """
+    path = pack_path(theme_dir)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+        if mtime < _newest_source_ns(theme_dir):
+            return None
+    except (OSError, RuntimeError):
+        return None
+    cached = _packs.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    try:
+        pack = ThemePack(path)
+    except (OSError, ValueError, struct.error):
+        return None
+    _packs[path] = (mtime, pack)
+    return pack
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Compila un tema en un paquete de imágenes prerredimensionadas.")
+    parser.add_argument("theme_dir", help="carpeta del tema, p. ej. ImagenesPython")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="lados de carta en píxeles, separados por comas")
+    parser.add_argument("--out", default=None, help="archivo de salida (por defecto <tema>.mpack)")
+    args = parser.parse_args(argv)
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    out = compile_theme(args.theme_dir, args.out, sizes)
+    pack = ThemePack(out)
+    print(f"{out}: {len(pack.names)} imágenes x {len(pack.sizes)} tamaños, {os.path.getsize(out) // 1024} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,81 @@
 from tkinter import *
 from tkinter import ttk, simpledialog, messagebox
-from PIL import Image, ImageTk
-import random
+from PIL import Image
 import os
-
-from scores import write_score
+import queue
+import random
+import time
+
+from score_queue import SCORE_WRITER
+from image_cache import CARD_CACHE, DEFAULT_RESAMPLE
+from image_sources import SOURCES
+from image_workers import DECODE_POOL, RenderJob, PRIORITY_BACK, PRIORITY_FACE, PRIORITY_URGENT
+from theme_pack import open_pack
+from theme_manifest import load_manifest
+from board_view import view_class, card_side
+from audio import AUDIO, MUSIC_FILE
+from clickstream import new_recorder
+import snapshot
+from flip_anim import FlipAnimator, flip_frames, flip_key, FLIP_STEPS
+from hints import SeenIndex, Assist
+from engine import MemoryEngine, board_shape, IGNORED, FIRST, MATCH, MISMATCH, WIN
+
+# wait for the window to settle before re-rendering the cards
+RESIZE_DEBOUNCE_MS = 80
+# how long a mismatched pair stays face-up
+FLIP_BACK_MS = 700
+# how often finished background renders are picked up
+RENDER_POLL_MS = 15
+# shown until a card image has been decoded
+PLACEHOLDER_COLOR = "#1f2937"
+# how often the win popup checks whether the score was saved
+SAVE_POLL_MS = 50
+# longest wait for a pending score when the window closes
+CLOSE_FLUSH_TIMEOUT = 2.0
+# how long hinted cards stay framed
+HINT_MS = 1500
+# pause between two clicks of the demo
+DEMO_STEP_MS = 400
+# cells indexed per idle step while the next board is prepared
+PREPARE_CHUNK = 4096
+
+
+# sound of each click outcome, see audio.py
+_EFFECTS = {FIRST: "flip", MATCH: "match", MISMATCH: "mismatch", WIN: "win"}
+
+
+def _render_card_frames(load, w: int, h: int):
+    """Resize a source to the card size and make its flip frames (worker thread)."""
+    card = load(w).resize((w, h), DEFAULT_RESAMPLE)
+    return card, flip_frames(card, PLACEHOLDER_COLOR)
 
 
 class GameWindow(Toplevel):
     """Memorama game window with click validation, matching logic and basic scoring."""
 
-    def __init__(self, master, grid_size: int = 4, theme_dir: str = "ImagenesPython", player_name: str | None = None):
+    def __init__(self, master, grid_size: int = 4, theme_dir: str = "ImagenesPython", player_name: str | None = None,
+                 rows: int | None = None, cols: int | None = None, renderer: str | None = None,
+                 seed: int | None = None, record: bool = True, assist: bool = False, resume: bool = True):
         super().__init__(master)
+        self._t0 = time.perf_counter()
+        # seconds since construction: interactive, back_ready, faces_ready
+        self.load_timings = {}
         self.title("Memorama - Programación")
         self.geometry("800x800")
         self.minsize(600, 600)
         self.grid_size = grid_size
+        default_rows, default_cols = board_shape(grid_size)
+        self.rows = rows or default_rows
+        self.cols = cols or default_cols
+        # "buttons", "canvas" or None to choose by board size
+        self.renderer = renderer
         self.theme_dir = theme_dir
         self.player_name = player_name or self._prompt_name()
         self.difficulty = self._difficulty_from_grid(grid_size)
         self.configure(bg="#0f172a")  # slate-900
 
         # UI: header with status and reset
-        header = Frame(self, bg="#0f172a")
+        self.header = header = Frame(self, bg="#0f172a")
         header.pack(side=TOP, fill=X, padx=16, pady=12)
 
         self.status_var = StringVar(value=f"Jugador: {self.player_name} | Dificultad: {self.difficulty} | Intentos: 0 | Aciertos: 0")
@@ -31,6 +84,10 @@ class GameWindow(Toplevel):
 
         self.reset_btn = Button(header, text="Reiniciar", command=self.reset_game, bg="#22c55e", fg="white", activebackground="#16a34a", relief=GROOVE)
         self.reset_btn.pack(side=RIGHT)
+        self.demo_btn = Button(header, text="Demo", command=self.toggle_demo, bg="#6366f1", fg="white", activebackground="#4f46e5", relief=GROOVE)
+        self.demo_btn.pack(side=RIGHT, padx=(0, 8))
+        self.hint_btn = Button(header, text="Pista", command=self.show_hint, bg="#eab308", fg="white", activebackground="#ca8a04", relief=GROOVE)
+        self.hint_btn.pack(side=RIGHT, padx=(0, 8))
 
         # Game board frame
         self.board = Frame(self, bg="#0f172a")
@@ -38,19 +95,59 @@ class GameWindow(Toplevel):
 
         # Load images
         self.front_img = None  # back of card (common)
+        self._source_paths = []  # files referenced in SOURCES, see image_sources.py
         self.card_images = []  # per pair
         self.buttons = []
-        self.card_values = []  # pair identifiers
-        self.revealed_indices = []
-        self.lock_input = False
-        self.attempts = 0
-        self.matches = 0
+        self.view = None  # widgets showing the cards, see board_view.py
+        self.engine = None  # board state and rules, see engine.py
+        self._cells_by_face = {}
+        # one repaint per frame: dirty cells and the status line
+        self._frame_job = None
+        self._status_dirty = False
+        self._resize_job = None
+        self._flip_job = None
+        self._rendered_size = None
+        # background renders: outbox drained on the Tk thread, jobs by card
+        self._renders = queue.SimpleQueue()
+        self._render_jobs = {}
+        self._render_gen = 0
+        self._drain_job = None
+        self.placeholder_img = None
+        # flip animations; frames per image, indexed like the loaders (0 is the back)
+        self._flips = FlipAnimator(self, self._render_card)
+        self._flip_frames = []
+        # every game is dealt from a seed and its clicks are recorded, see clickstream.py
+        self._seed = seed
+        self._recorder = new_recorder() if record else None
+        # continue this player's game left unfinished here, see snapshot.py
+        self._resume_enabled = resume
+        self.resumed = False
+        # replays show the win popup without saving the score
+        self.keep_score = True
+        # scores are saved in the background, see score_queue.py
+        self._save_job = None
+        # what the player has seen (see hints.py); the assist hints on its own
+        self.seen = None
+        self.assist = Assist(self.difficulty) if assist else None
+        self._partner_known = False
+        self._hint_cells = ()
+        self._hint_job = None
+        # the demo plays the board from the same index; its games are not scored
+        self.demo = False
+        self._demo_job = None
+        self._demo_rng = random.Random()
+        self._score_before_demo = None
+        # the next board, dealt and indexed ahead in idle time: (seed, values, cells by face)
+        self._next_board = None
+        self._prepare_steps = None
+        self._prepare_job = None
 
         self._load_images()
         self._build_grid()
+        self._mark("interactive")
+        self._prepare_next()
         self.bind("<Configure>", self._on_resize)
         # Music and close protocol
-        self._mixer = None
         self._music_on = False
         self._init_music()
         self.protocol("WM_DELETE_WINDOW", self._on_close)
@@ -65,181 +162,428 @@ class GameWindow(Toplevel):
         return "facil" if gs == 4 else "medio" if gs == 5 else "dificil"
 
     def _asset_paths(self):
-        # choose a default back and N unique faces from theme dir
-        files = [f for f in os.listdir(self.theme_dir) if f.lower().endswith((".png", ".jpg", ".jpeg"))]
-        files.sort()
-        if not files:
-            raise RuntimeError("No se encontraron imágenes en la carpeta de tema")
-        back = files[0]
-        # need grid_size*grid_size/2 unique faces
-        need = (self.grid_size * self.grid_size) // 2
-        faces = files[1:1+need]
-        if len(faces) < need:
-            # fallback by repeating
-            faces = (faces * ((need // max(1, len(faces))) + 1))[:need]
-        return os.path.join(self.theme_dir, back), [os.path.join(self.theme_dir, f) for f in faces]
+        # names and files of the back and of the faces this board needs
+        if self.pack is not None:
+            back, files = self.pack.back, self.pack.faces
+            path_of = lambda name: os.path.join(self.theme_dir, name)
+        else:
+            manifest = load_manifest(self.theme_dir)
+            back, files = manifest.back, manifest.faces
+            # identical files of other themes share a path, hence one decode
+            path_of = manifest.path
+        # rows*cols/2 faces; a smaller theme makes pairs share faces (see MemoryEngine)
+        names = [back] + files[:(self.rows * self.cols) // 2]
+        return names, [path_of(name) for name in names]
 
     def _load_images(self):
-        back_path, face_paths = self._asset_paths()
-        # placeholders; actual resize happens on draw/resize
-        self.front_src = Image.open(back_path)
-        self.face_srcs = [Image.open(p) for p in face_paths]
+        # a compiled pack (see theme_pack.py) avoids decoding the images
+        self.pack = open_pack(self.theme_dir)
+        names, paths = self._asset_paths()
+        self.front_path = paths[0]
+        self.face_paths = paths[1:]
+        if self.pack is not None:
+            index = {name: i for i, name in enumerate(self.pack.names)}
+            # loaders take the card side and return a source at least that big
+            self._loaders = [lambda side, i=index[name]: self.pack.source_for(i, side) for name in names]
+        else:
+            # decoded lazily on the worker threads, reduced to the largest
+            # card this board can show and shared with the other windows
+            max_side = self._max_card_side()
+            self._source_paths = paths
+            SOURCES.acquire(self._source_paths)
+            self._loaders = [SOURCES.loader(p, max_side) for p in self._source_paths]
+
+        # pair assignment; pair id i shows face_paths[i]
+        self.engine = MemoryEngine(self.rows, self.cols, seed=self._seed, faces=len(self.face_paths))
+        self.seen = SeenIndex(self.engine.size)
+        self.resumed = self._resume()
+        self._index_faces()
+        if not self.resumed:
+            # a resumed board's earlier clicks were recorded elsewhere, so the
+            # recorder drops its clicks until reset_game starts a new board
+            self._start_recording()
+
+    def _resume(self) -> bool:
+        path = snapshot.snapshot_path(self.player_name, self.difficulty) if self._resume_enabled else None
+        snap = snapshot.load(path) if path else None
+        if snap is None or snap.theme != self.theme_dir:
+            return False
+        try:
+            snapshot.restore(snap, self.engine)
+        except ValueError:
+            return False
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        for i in self.engine.matched_indices():
+            self.seen.drop(i)
+        if self.engine.first >= 0:
+            self.seen.see(self.engine.first, self.engine.values[self.engine.first])
+        return True
+
+    def _suspend(self):
+        # an unfinished, scored game is kept for the next window of this player
+        engine = self.engine
+        if not self.keep_score or engine is None or engine.done or (engine.attempts == 0 and engine.first < 0):
+            return
+        path = snapshot.snapshot_path(self.player_name, self.difficulty)
+        if path is None:
+            return
+        try:
+            snapshot.save(snapshot.take(engine, self.player_name, self.difficulty, self.theme_dir), path)
+        except OSError:
+            pass  # closing must not fail because of it
+
+    def _max_card_side(self) -> int:
+        # cards of a maximized window; the board frame is a bit smaller
+        return card_side(self.winfo_screenwidth(), self.winfo_screenheight(), self.rows, self.cols)
+
+    def _start_recording(self):
+        if self._recorder is not None:
+            self._recorder.start_game(self.rows, self.cols, self.engine.seed, self.player_name,
+                                      self.difficulty, self.theme_dir, self.engine.faces)
+
+    def _index_faces(self):
+        # cells holding each face, so a decoded face repaints only its cells
+        self._cells_by_face = {}
+        for i, v in enumerate(self.engine.values):
+            self._cells_by_face.setdefault(v, []).append(i)
+
+    def _prepare_next(self):
+        # "Reiniciar" and "Jugar de nuevo" then only swap the board in; the
+        # work is split in short idle steps so clicks are never kept waiting
+        if self._next_board is not None or self._prepare_steps is not None:
+            return
+        self._prepare_steps = self._next_board_steps()
+        self._prepare_job = self.after_idle(self._prepare_step)
 
-        # pair assignment
-        ids = list(range(len(self.face_srcs)))
-        pairs = ids * 2
-        random.shuffle(pairs)
-        self.card_values = pairs
+    def _prepare_step(self):
+        self._prepare_job = None
+        try:
+            next(self._prepare_steps)
+        except StopIteration:
+            self._prepare_steps = None
+            return
+        self._prepare_job = self.after_idle(self._prepare_step)
+
+    def _next_board_steps(self):
+        # the card renders at this size stay in card_images, so the board
+        # itself is all there is to prepare
+        seed, values = self.engine.deal()
+        yield
+        cells_by_face = {}
+        for start in range(0, len(values), PREPARE_CHUNK):
+            for i in range(start, min(start + PREPARE_CHUNK, len(values))):
+                cells_by_face.setdefault(values[i], []).append(i)
+            yield
+        self._next_board = (seed, values, cells_by_face)
+
+    # Board state lives in the engine; these views keep the old attribute names.
+    @property
+    def card_values(self):
+        return self.engine.values
+
+    @property
+    def revealed_indices(self):
+        return self.engine.matched_indices()
+
+    @property
+    def first_index(self):
+        return self.engine.first if self.engine.first >= 0 else None
+
+    @property
+    def lock_input(self) -> bool:
+        return self.engine.locked
+
+    @property
+    def attempts(self) -> int:
+        return self.engine.attempts
+
+    @attempts.setter
+    def attempts(self, value: int):
+        self.engine.attempts = value
+
+    @property
+    def matches(self) -> int:
+        return self.engine.matches
 
     def _build_grid(self):
-        # clear previous
-        for w in self.board.winfo_children():
-            w.destroy()
-        self.buttons.clear()
-        gs = self.grid_size
-        for r in range(gs):
-            self.board.rowconfigure(r, weight=1)
-            for c in range(gs):
-                self.board.columnconfigure(c, weight=1)
-                idx = r * gs + c
-                btn = Button(self.board, relief=RAISED, bd=2, bg="#1f2937", activebackground="#374151")
-                btn.grid(row=r, column=c, sticky="nsew", padx=8, pady=8)
-                btn.configure(command=lambda i=idx: self.on_card_click(i))
-                self.buttons.append(btn)
+        view_cls = view_class(self.renderer, self.rows * self.cols)
+        self.view = view_cls(self.board, self.rows, self.cols, self.on_card_click)
+        self.buttons = self.view.buttons
         self._redraw_images()
 
     def _card_size(self):
-        # estimate cell size based on board size
-        bw = max(self.board.winfo_width(), 200)
-        bh = max(self.board.winfo_height(), 200)
-        gs = self.grid_size
-        cw = bw // gs - 20
-        ch = bh // gs - 20
-        side = max(32, min(cw, ch))
-        return side, side
+        return self.view.card_size()
+
+    def _mark(self, name: str):
+        self.load_timings.setdefault(name, time.perf_counter() - self._t0)
 
     def _redraw_images(self):
         w, h = self._card_size()
-        self.front_img = ImageTk.PhotoImage(self.front_src.resize((w, h)))
-        self.card_images = [ImageTk.PhotoImage(img.resize((w, h))) for img in self.face_srcs]
-        for i, btn in enumerate(self.buttons):
-            # keep revealed pairs face-up; show current first selection; others back
-            if i in self.revealed_indices:
-                face_id = self.card_values[i]
-                btn.config(image=self.card_images[face_id])
-                btn.image = self.card_images[face_id]
-            elif getattr(self, "first_index", None) == i and not self.lock_input:
-                face_id = self.card_values[i]
-                btn.config(image=self.card_images[face_id])
-                btn.image = self.card_images[face_id]
+        self._rendered_size = (w, h)
+        self._cancel_renders()
+        self.placeholder_img = CARD_CACHE.get(
+            f"placeholder:{PLACEHOLDER_COLOR}", lambda: Image.new("RGB", (w, h), PLACEHOLDER_COLOR), w, h, master=self
+        )
+        # frames of the old size cannot be mixed with the new cards
+        self._flips.stop()
+        # renders and their flip frames are shared with every other window
+        # through the card cache; missing ones are made on the worker threads
+        rendered = []
+        self._flip_frames = []
+        # faces already showing (a resumed game, a resize) come with the back
+        showing = {self.engine.values[i] + 1 for i in self.engine.face_up_indices()}
+        showing.add(0)
+        for k, (path, load) in enumerate(zip([self.front_path] + self.face_paths, self._loaders)):
+            img = CARD_CACHE.lookup(path, w, h, master=self)
+            frames = [CARD_CACHE.lookup(flip_key(path, n), w, h, master=self) for n in range(FLIP_STEPS - 1)]
+            if img is None or None in frames:
+                job = RenderJob((self._render_gen, k), lambda load=load: _render_card_frames(load, w, h))
+                self._render_jobs[k] = job
+                DECODE_POOL.submit(job, self._renders, PRIORITY_BACK if k in showing else PRIORITY_FACE)
+            rendered.append(img)
+            self._flip_frames.append(frames)
+        self.front_img = rendered[0]
+        self.card_images = rendered[1:]
+        self.view.mark_all()
+        self._schedule_frame()
+        self._after_renders()
+
+    def _cancel_renders(self):
+        # renders for an old size are no longer wanted
+        for job in self._render_jobs.values():
+            job.cancelled = True
+        self._render_jobs = {}
+        self._render_gen += 1
+        if self._drain_job is not None:
+            self.after_cancel(self._drain_job)
+            self._drain_job = None
+
+    def _after_renders(self):
+        if self.front_img is not None:
+            self._mark("back_ready")
+        if self._render_jobs:
+            self._drain_job = self.after(RENDER_POLL_MS, self._drain_renders)
+        else:
+            self._mark("faces_ready")
+
+    def _drain_renders(self):
+        self._drain_job = None
+        w, h = self._rendered_size
+        paths = [self.front_path] + self.face_paths
+        while True:
+            try:
+                (gen, k), result = self._renders.get_nowait()
+            except queue.Empty:
+                break
+            if gen != self._render_gen or k not in self._render_jobs:
+                continue
+            del self._render_jobs[k]
+            if isinstance(result, Exception):
+                continue  # keep the placeholder for an unreadable image
+            card, frames = result
+            img = CARD_CACHE.store(paths[k], w, h, card, master=self)
+            self._flip_frames[k] = [CARD_CACHE.store(flip_key(paths[k], n), w, h, f, master=self)
+                                    for n, f in enumerate(frames)]
+            if k == 0:
+                self.front_img = img
+                # the view skips cells whose image does not change
+                self.view.mark_all()
             else:
-                btn.config(image=self.front_img)
-                btn.image = self.front_img
+                self.card_images[k - 1] = img
+                for i in self._cells_by_face.get(k - 1, ()):
+                    self.view.mark(i)
+            self._schedule_frame()
+        self._after_renders()
+
+    def _image_for(self, i: int):
+        frame = self._flips.frame(i)
+        if frame is not None:
+            return frame
+        # matched pairs and the current selection face-up; others back
+        if self.engine.is_face_up(i):
+            img = self.card_images[self.engine.values[i]]
+        else:
+            img = self.front_img
+        return self.placeholder_img if img is None else img
+
+    def _render_card(self, i: int):
+        self.view.mark(i)
+        self._schedule_frame()
+
+    def _schedule_frame(self):
+        if self._frame_job is None:
+            self._frame_job = self.after_idle(self._draw_frame)
+
+    def _draw_frame(self):
+        self._frame_job = None
+        self.view.flush(self._image_for)
+        if self._status_dirty:
+            self._status_dirty = False
+            self.status_var.set(self._status_text())
+
+    def _on_resize(self, event):
+        # <Configure> also fires for every child widget; only the window matters
+        if event.widget is not self:
+            return
+        # restart the timer so only the final size of a drag gets rendered
+        if self._resize_job is not None:
+            self.after_cancel(self._resize_job)
+        self._resize_job = self.after(RESIZE_DEBOUNCE_MS, self._apply_resize)
 
-    def _on_resize(self, _event):
-        self.after(50, self._redraw_images)
+    def _apply_resize(self):
+        self._resize_job = None
+        if self._card_size() != self._rendered_size:
+            self._redraw_images()
 
     def _init_music(self):
-        """Start background music if pygame is available and the file exists."""
-        try:
-            # Import locally to avoid hard dependency if not installed
-            import pygame
-            from pygame import mixer
-            if not pygame.get_init():
-                pygame.init()
-            if not mixer.get_init():
-                mixer.init()
-            base_dir = os.path.dirname(os.path.abspath(__file__))
-            music_path = os.path.join(base_dir, "musica.mp3")
-            if os.path.exists(music_path):
-                mixer.music.load(music_path)
-                mixer.music.play(-1)  # loop
-                self._mixer = mixer
-                self._music_on = True
-        except Exception:
-            # Silently ignore if pygame or device not available
-            self._mixer = None
-            self._music_on = False
+        """Start background music if the file exists.
+
+        The shared audio service initializes the mixer on its own thread and
+        silently does nothing if pygame or an audio device is missing.
+        """
+        if os.path.exists(MUSIC_FILE):
+            AUDIO.play_music(MUSIC_FILE)
+            self._music_on = True
 
     def _stop_music(self):
-        try:
-            if self._mixer and self._music_on:
-                self._mixer.music.stop()
-                self._mixer.quit()
-        except Exception:
-            pass
-        finally:
-            self._mixer = None
+        # the mixer stays up so the next game does not pay for it again
+        if self._music_on:
+            AUDIO.stop_music()
             self._music_on = False
 
     def on_card_click(self, index: int):
-        if self.lock_input:
+        first = self.engine.first
+        event = self.engine.click(index)
+        if self._recorder is not None:
+            self._recorder.click(index, event)
+        if event == IGNORED:
             return
-        if index < 0 or index >= len(self.buttons):
+        AUDIO.play_effect(_EFFECTS[event])
+        face_id = self.engine.values[index]
+        self._clear_hint()
+        self._follow_click(index, face_id, first, event)
+        self._flips.flip(index, self._flip_frames[0], self._flip_frames[face_id + 1])
+        self._render_card(index)
+        if self.card_images[face_id] is None:
+            # the player is waiting on this face: decode it next
+            job = self._render_jobs.get(face_id + 1)
+            if job is not None:
+                DECODE_POOL.submit(job, self._renders, PRIORITY_URGENT)
+        if event == MISMATCH:
+            # no match -> flip back after short delay; input stays locked
+            fi, si = self.engine.first, self.engine.second
+            self._flip_job = self.after(FLIP_BACK_MS, lambda: self._flip_back(fi, si))
+        self._update_status()
+        if event == WIN:
+            self._win()
+
+    def _follow_click(self, index: int, face_id: int, first: int, event: int):
+        # O(1) per click, however large the board
+        seen = self.seen
+        if event == FIRST:
+            self._partner_known = seen.partner(index, face_id) is not None
+            seen.see(index, face_id)
+            if self.assist is not None and not self.demo and self.assist.should_hint(self._partner_known):
+                self._show_hint(seen.hint(index, face_id))
             return
-        if index in self.revealed_indices:
-            # already matched; ignore
+        seen.see(index, face_id)
+        if event != MISMATCH:
+            seen.matched(first, index, face_id)
+        if self.assist is not None and not self.demo:
+            self.assist.record(event, self._partner_known)
+
+    def show_hint(self):
+        """Frame the partner of the face-up card or a pair already seen.
+
+        With nothing useful seen yet, frames a card not turned so far.
+        """
+        engine = self.engine
+        if engine.locked or engine.done:
             return
-
-        # If the card is temporarily face-up in current attempt, ignore
-        # Find if index is already the first selection
-        if getattr(self, "first_index", None) == index:
+        first = engine.first
+        first_pair = engine.values[first] if first >= 0 else 0
+        cells = self.seen.hint(first, first_pair)
+        if not cells:
+            cell = self.seen.unseen_cell(self._demo_rng)
+            cells = () if cell is None else (cell,)
+        self._show_hint(cells)
+
+    def _show_hint(self, cells):
+        self._clear_hint()
+        for i in cells:
+            self.view.highlight(i, True)
+        self._hint_cells = tuple(cells)
+        if self._hint_cells:
+            self._hint_job = self.after(HINT_MS, self._clear_hint)
+
+    def _clear_hint(self):
+        if self._hint_job is not None:
+            self.after_cancel(self._hint_job)
+            self._hint_job = None
+        for i in self._hint_cells:
+            self.view.highlight(i, False)
+        self._hint_cells = ()
+
+    def toggle_demo(self):
+        """Start or stop the demo, which plays the rest of the board by itself."""
+        if self.demo:
+            self._stop_demo()
             return
-
-        # reveal card
-        face_id = self.card_values[index]
-        self.buttons[index].config(image=self.card_images[face_id])
-        self.buttons[index].image = self.card_images[face_id]
-
-        if not hasattr(self, "first_index") or self.first_index is None:
-            self.first_index = index
-            self._update_status()
+        if self.engine.done:
             return
-
-        # second click
-        second_index = index
-        first_id = self.card_values[self.first_index]
-        second_id = self.card_values[second_index]
-        self.attempts += 1
-        if first_id == second_id and self.first_index != second_index:
-            # match
-            self.revealed_indices.extend([self.first_index, second_index])
-            self.matches += 1
-            self.first_index = None
-            self._update_status()
-            if self.matches == len(self.card_values) // 2:
-                self._win()
-        else:
-            # no match -> flip back after short delay
-            fi, si = self.first_index, second_index
-            self.first_index = None
-            self.lock_input = True
-            self.after(700, lambda: self._flip_back(fi, si))
-            self._update_status()
+        if self._score_before_demo is None:
+            self._score_before_demo = self.keep_score
+        self.keep_score = False
+        self.demo = True
+        self.demo_btn.configure(text="Detener")
+        self._demo_job = self.after(DEMO_STEP_MS, self._demo_step)
+
+    def _stop_demo(self):
+        if self._demo_job is not None:
+            self.after_cancel(self._demo_job)
+            self._demo_job = None
+        if self.demo:
+            self.demo = False
+            self.demo_btn.configure(text="Demo")
+
+    def _demo_step(self):
+        self._demo_job = None
+        engine = self.engine
+        if not engine.locked:
+            first = engine.first
+            cell = self.seen.next_click(first, engine.values[first] if first >= 0 else 0, self._demo_rng)
+            if cell is not None:
+                self.on_card_click(cell)
+        if engine.done:
+            self._stop_demo()
+        elif self.demo:
+            self._demo_job = self.after(DEMO_STEP_MS, self._demo_step)
 
     def _flip_back(self, i: int, j: int):
-        if i not in self.revealed_indices:
-            self.buttons[i].config(image=self.front_img)
-            self.buttons[i].image = self.front_img
-        if j not in self.revealed_indices:
-            self.buttons[j].config(image=self.front_img)
-            self.buttons[j].image = self.front_img
-        self.lock_input = False
+        self._flip_job = None
+        if self.engine.resolve() is not None and self._recorder is not None:
+            self._recorder.resolve()
+        AUDIO.play_effect("flip")
+        for k in (i, j):
+            self._flips.flip(k, self._flip_frames[self.engine.values[k] + 1], self._flip_frames[0])
+            self._render_card(k)
 
     def _score(self) -> int:
-        total_pairs = len(self.card_values) // 2
-        # simple scoring: start from 1000 and subtract attempts beyond optimal
-        penalty = max(0, self.attempts - total_pairs)
-        return max(0, 1000 - penalty * 20)
+        return self.engine.score()
+
+    def _status_text(self) -> str:
+        return f"Jugador: {self.player_name} | Dificultad: {self.difficulty} | Intentos: {self.attempts} | Aciertos: {self.matches} | Puntaje: {self._score()}"
 
     def _update_status(self):
-        self.status_var.set(
-            f"Jugador: {self.player_name} | Dificultad: {self.difficulty} | Intentos: {self.attempts} | Aciertos: {self.matches} | Puntaje: {self._score()}"
-        )
+        # written once per frame however many clicks happened
+        self._status_dirty = True
+        self._schedule_frame()
 
     def _win(self):
         score = self._score()
-        write_score(self.player_name, score, difficulty=self.difficulty)
         # Custom modal popup with 'Salir' button
         popup = Toplevel(self)
         popup.title("¡Ganaste!")
@@ -249,13 +593,24 @@ class GameWindow(Toplevel):
 
         msg = Label(popup, text=f"¡Completaste el memorama!\nPuntaje: {score}", fg="#e2e8f0", bg="#0f172a", font=("Lato", 16, "bold"))
         msg.pack(padx=24, pady=(24, 12))
-
-        btn = Button(popup, text="Salir", command=lambda: self._close_after_popup(popup), bg="#ef4444", fg="white", activebackground="#dc2626")
-        btn.pack(pady=(0, 24), ipadx=16, ipady=6)
+        if self.keep_score:
+            # the popup opens at once; the save status replaces this text
+            saved = SCORE_WRITER.submit(self.player_name, score, self.difficulty)
+            status = Label(popup, text="Guardando puntaje…", fg="#94a3b8", bg="#0f172a",
+                           font=("Lato", 12), justify=CENTER)
+            status.pack(padx=24, pady=(0, 12))
+            self._poll_save(saved, status)
+
+        buttons = Frame(popup, bg="#0f172a")
+        buttons.pack(pady=(0, 24))
+        again = Button(buttons, text="Jugar de nuevo", command=lambda: self._play_again(popup), bg="#22c55e", fg="white", activebackground="#16a34a")
+        again.pack(side=LEFT, padx=8, ipadx=16, ipady=6)
+        btn = Button(buttons, text="Salir", command=lambda: self._close_after_popup(popup), bg="#ef4444", fg="white", activebackground="#dc2626")
+        btn.pack(side=LEFT, padx=8, ipadx=16, ipady=6)
 
         # Center popup over game window
         self.update_idletasks()
-        pw, ph = 360, 160
+        pw, ph = (380, 240) if self.keep_score else (360, 160)
         try:
             gx = self.winfo_rootx()
             gy = self.winfo_rooty()
@@ -268,10 +623,60 @@ class GameWindow(Toplevel):
             popup.geometry(f"{pw}x{ph}")
 
         popup.bind("<Escape>", lambda _e: self._close_after_popup(popup))
+        popup.bind("<Return>", lambda _e: self._play_again(popup))
+        # the next board is normally ready already; if not, it is made now
+        self._prepare_next()
+
+    def _poll_save(self, saved, status: Label):
+        self._save_job = None
+        if not saved.done():
+            self._save_job = self.after(SAVE_POLL_MS, self._poll_save, saved, status)
+            return
+        result = saved.result()
+        if not result.saved:
+            text = "No se pudo guardar el puntaje"
+        elif result.standing is None:
+            text = "Puntaje guardado"
+        else:
+            text = self._standing_text(result.standing)
+        try:
+            status.configure(text=text)
+        except TclError:
+            pass  # the popup was closed meanwhile
 
     def _on_close(self):
         self._stop_music()
+        self._suspend()
         self.destroy()
+        # a score still being written must not be lost with the window
+        SCORE_WRITER.flush(CLOSE_FLUSH_TIMEOUT)
+
+    def destroy(self):
+        # pending callbacks would touch widgets that no longer exist
+        self._cancel_flip()
+        self._cancel_renders()
+        self._flips.stop()
+        self._stop_demo()
+        self._clear_hint()
+        for job in (self._resize_job, self._frame_job, self._save_job, self._prepare_job):
+            if job is not None:
+                self.after_cancel(job)
+        self._resize_job = self._frame_job = self._save_job = self._prepare_job = None
+        if self._recorder is not None:
+            self._recorder.close()
+        SOURCES.release(self._source_paths)
+        self._source_paths = []
+        super().destroy()
+
+    def _standing_text(self, standing) -> str:
+        lines = [f"Puesto {standing.rank} de {standing.total} en {self.difficulty} "
+                 f"(percentil {standing.percentile:.0f})",
+                 f"Mejor marca personal: {standing.best}"]
+        if standing.next_score is None:
+            lines.append("¡Vas en primer lugar!")
+        else:
+            lines.append(f"Te faltan {standing.gap} puntos para el puesto {standing.next_rank}")
+        return "\n".join(lines)
 
     def _close_after_popup(self, popup: Toplevel):
         try:
@@ -281,19 +686,44 @@ class GameWindow(Toplevel):
             pass
         self._on_close()
 
-    def reset_game(self):
-        # reshuffle
-        ids = list(range(len(self.face_srcs)))
-        pairs = ids * 2
-        random.shuffle(pairs)
-        self.card_values = pairs
-        self.revealed_indices.clear()
-        self.first_index = None
-        self.lock_input = False
-        self.attempts = 0
-        self.matches = 0
-        self._redraw_images()
+    def _play_again(self, popup: Toplevel):
+        try:
+            popup.grab_release()
+            popup.destroy()
+        except Exception:
+            pass
+        self.reset_game()
+
+    def _cancel_flip(self):
+        if self._flip_job is not None:
+            self.after_cancel(self._flip_job)
+            self._flip_job = None
+
+    def reset_game(self, seed: int | None = None):
+        # a pending flip-back and running flips belong to the previous board
+        self._cancel_flip()
+        self._flips.stop()
+        self._stop_demo()
+        self._clear_hint()
+        if self._score_before_demo is not None:
+            # the demo only gave up the score of its own board
+            self.keep_score, self._score_before_demo = self._score_before_demo, None
+        # only the cards that were face-up need repainting
+        for i in self.engine.face_up_indices():
+            self.view.mark(i)
+        if seed is None and self._next_board is not None:
+            # dealt ahead, see _prepare_next
+            seed, values, self._cells_by_face = self._next_board
+            self._next_board = None
+            self.engine.reset(values, seed, check=False)
+        else:
+            self.engine.reset(seed=seed)
+            self._index_faces()
+        self.seen.reset()
+        self._start_recording()
+        self._schedule_frame()
         self._update_status()
+        self._prepare_next()
 
 
 # Allow running this file directly for quick test